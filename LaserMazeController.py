@@ -1,35 +1,77 @@
+import time
+_BOOT_TIME = time.perf_counter()  # start of the startup timing report
 import tkinter as tk
 from tkinter import messagebox, simpledialog, ttk
-import time
 import sys
-import os
-
-# Hide the pygame welcome message
-os.environ['PYGAME_HIDE_SUPPORT_PROMPT'] = "hide"
-import pygame
+import threading
 import random
+from collections import deque
+
+from audiocues import AudioCues
+from i2cworker import I2CWorker, PRIORITY_SAFETY, PRIORITY_PENALTY, PRIORITY_BACKGROUND
+from routedbus import RoutedBus
+from raceclock import RaceClock
+from lanes import LANE_LAYOUTS, build_lanes
+import pdtelemetry
+import profiling
+import racelog
+import topologycache
 
 # Move TEST_MODE definition to the top, before any function or class definitions
 TEST_MODE = "--test" in sys.argv
 
+def _arg_value(flag, default):
+    """Number following flag on the command line (e.g. --lanes 4), or default."""
+    if flag in sys.argv[:-1]:
+        try:
+            return type(default)(sys.argv[sys.argv.index(flag) + 1])
+        except ValueError:
+            print(f"Ignoring bad value for {flag}")
+    return default
+
+# Lane layout: "--lanes 4" runs four single-bus lanes instead of two lanes of two buses
+LANE_COUNT = _arg_value("--lanes", 2)
+if LANE_COUNT not in LANE_LAYOUTS:
+    print(f"No layout for {LANE_COUNT} lanes, using 2")
+    LANE_COUNT = 2
+
 # ------------------- TEST MODE / HARDWARE IMPORTS -------------------
 if not TEST_MODE:
     try:
         import smbus
         import RPi.GPIO as GPIO
-        from opticamqfunclib import *
         import time  # Make sure time is imported
     except ImportError:
         TEST_MODE = True
         print("Hardware imports failed - running in test mode")
+
+from opticamqfunclib import *
+
+if TEST_MODE:
+    # Simulated Pi: fake GPIO plus virtual Arduinos (main_V8.ino command set)
+    # behind a simulated route mux and SMBus
+    import simhardware
+    smbus = simhardware
+    GPIO = simhardware.GPIO
         
 
 
 # ------------------- Laser Maze UI -------------------
 class LaserMazeUI(tk.Tk):
-    def __init__(self):
+    # Screens other than the main menu are built on first use: name -> (frame attribute, builder)
+    SCREENS = {
+        "setup": ("setup_frame", "_build_setup_mode"),
+        "game": ("game_frame", "_build_game_mode"),
+        "calib": ("calib_frame", "_build_power_calibration_mode"),
+    }
+
+    def __init__(self, lane_count=None):
         global TEST_MODE  # Add this line to fix the variable scope issue
+        init_start = time.perf_counter()
         super().__init__()
+        # Startup timing report: [(step, seconds)], printed once the menu is drawn
+        self.startup_times = [("imports", init_start - _BOOT_TIME)]
+        self._startup_last = init_start
         self.title("Laser Maze Control")
         self.geometry("1024x1024")
         
@@ -42,43 +84,47 @@ class LaserMazeUI(tk.Tk):
                 self.iconphoto(True, icon)
         except Exception as e:
             print(f"Could not load window icon: {e}")
+        self._startup_mark("window")
 
         # central address list
         self.scanned_addresses = []
-
-        # Initialize pygame mixer for sound with error handling
-        try:
-            pygame.mixer.init()
-            self.audio_available = True
-            # Load sound effect once
-            try:
-                self.laser_sound = pygame.mixer.Sound("laser.mp3")
-            except Exception as e:
-                print("Could not load laser.mp3:", e)
-                self.laser_sound = None
-        except Exception as e:
-            print("Audio initialization failed:", e)
-            self.audio_available = False
-            self.laser_sound = None
+        self.known_addresses = {}  # {bus: [addr, ...]} from the last scan, probed first next time
+        self.module_details = {}   # {addr: {color, current, threshold}} saved with the topology cache
+        # Optional background re-check of the module settings cache (seconds, 0 = off)
+        self._cache_recheck_interval = 60.0 if "--cache-recheck" in sys.argv else 0
+
+        # Groups buses to lanes (by default RJ1 and 2 are lane 1 and RJ3 and 4 are lane 2)
+        self.bus_to_lane = dict(LANE_LAYOUTS[lane_count or LANE_COUNT])
+        # Per-lane state and timer widgets; race_lanes are the ones with modules in the current race
+        self.lanes = build_lanes(self.bus_to_lane)
+        self.race_lanes = []
+
+        # Sound cues are pre-decoded in the background (pygame is imported there
+        # too, so it doesn't delay the first frame); until then the game runs silently
+        self.audio = AudioCues()
+        self.audio_available = False
+        threading.Thread(target=self._load_audio, name="audio-loader", daemon=True).start()
 
         # hardware init
         GPIO.setmode(GPIO.BCM)
         
 #         self.start_game_pin ={11}
-        # Set up finish button pins
-        self.lane_finish_pins = {
-            1: 7,   # Lane 1 finish button uses GPIO 7
-            2: 8    # Lane 2 finish button uses GPIO 8
-        }
+        # Set up finish button pins (lane 1 uses GPIO 7, lane 2 GPIO 8, see lanes.FINISH_PINS)
+        self.lane_finish_pins = {lane: l.finish_pin for lane, l in self.lanes.items()}
         
         self.shutdown_pin = {
             1: 11,   # Shutdown Pin
         }
         
-        # Lane finish state tracking
-        self.lane_finished = {1: False, 2: False}
-        self.lane_finish_times = {1: 0.0, 2: 0.0}
+        # Lane finish state tracking (Lane.finished / Lane.finish_time)
         self.winner_determined = False
+        self._margin_label = None  # winner's "Win margin" label
+        # Lane times come from monotonic start/finish instants plus penalty totals
+        self.race_clock = RaceClock(lanes=self.lane_finish_pins)
+        self._finish_edges_armed = False
+        # Append-only race event log, opened on the first race (race_logs/)
+        self.race_log = None
+        self._race_open = False
         
         # Set up beam block detection pins
         # Each pin corresponds to a specific lane (RJ45 port)
@@ -91,37 +137,78 @@ class LaserMazeUI(tk.Tk):
         
         # Set up i2c routing pins
         self.i2c_routing_pins = (5, 6)
+        # Route-aware wrapper around the smbus object; only moves the mux when the route changes
+        self.router = RoutedBus(GPIO, self.i2c_routing_pins)
+
+        # Beam block detection: 'edge' uses GPIO falling-edge callbacks on the
+        # bus_to_gpio pins, 'poll' queries the pins from the hardware scheduler (_poll_hardware)
+        self.beam_detect_mode = 'poll' if "--poll" in sys.argv else 'edge'
+        self._beam_edges_armed = False
+        self._beam_bouncetime_ms = 20
+        self.penalty_latencies = deque(maxlen=500)  # edge -> penalty shown, seconds
+        self.beam_events = deque(maxlen=1000)       # (monotonic time, addr, lane, bus) of latched breaks
+        self._legacy_beam_modules = set()           # modules without CMD_READ_EVENTS firmware
+        # Adaptive beam queries during a race (query_bus_blocked(adaptive=True)):
+        # modules that broke recently are asked first, a bus stops being queried
+        # once its line is released, and a module whose beam was still blocked
+        # (so its laser is now off) is skipped for a growing back-off period
+        self._break_history = {}      # {addr: (decayed break count, monotonic time)}
+        self._break_half_life = 20.0  # seconds
+        self._beam_backoff = {}       # {addr: (skip until, next back-off)}
+        self._beam_backoff_max = 30.0
+        self._sweep_due = {}          # {bus: monotonic time} to query the modules an early stop skipped
+        self._sweep_delay = 0.5
+        # Poll mode: a break that clears between two polls leaves no low line, so
+        # every bus is also drained this often (its latched time sets the penalty)
+        self._drain_interval = 0.5
+        self._next_drain = 0.0
+        self.beam_query_stats = {"queries": 0, "stopped_early": 0, "backed_off": 0}
+        
+        # Set up GPIO pins (real or simulated)
+        GPIO.setmode(GPIO.BCM)
         
-        # Only set up GPIO pins in real mode
-        if not TEST_MODE:
-            GPIO.setmode(GPIO.BCM)
+        # Set up all GPIO pins
+        for pin in self.bus_to_gpio.values():
+            GPIO.setup(pin, GPIO.IN)
             
-            # Set up all GPIO pins
-            for pin in self.bus_to_gpio.values():
-                GPIO.setup(pin, GPIO.IN)
-                
-            # Set up finish button pins with pull-up resistors (, pull_up_down=GPIO.PUD_UP
-            for pin in self.lane_finish_pins.values():
-                GPIO.setup(pin, GPIO.IN) 
-            # Set up start button pins with pull-up resistors (, pull_up_down=GPIO.PUD_UP
-            for pin in self.shutdown_pin.values():
-                GPIO.setup(pin, GPIO.IN)
-                
-            for p in self.i2c_routing_pins:
-                GPIO.setup(p, GPIO.OUT, initial=GPIO.LOW)
-                
-            # Default to Lane 1 (J1)
-            self.set_i2c_route(1)
-    
+        # Set up finish button pins with pull-up resistors (, pull_up_down=GPIO.PUD_UP
+        for pin in self.lane_finish_pins.values():
+            GPIO.setup(pin, GPIO.IN) 
+        # Set up start button pins with pull-up resistors (, pull_up_down=GPIO.PUD_UP
+        for pin in self.shutdown_pin.values():
+            GPIO.setup(pin, GPIO.IN)
+            
+        for p in self.i2c_routing_pins:
+            GPIO.setup(p, GPIO.OUT, initial=GPIO.LOW)
+            
+        # Default to Lane 1 (J1)
+        self.set_i2c_route(1)
+
+        self._startup_mark("GPIO")
+
         # Initialize I2C bus normally without custom clock speed
         try:
-            self.bus = smbus.SMBus(1)  # Use default I2C bus
+            self.router.attach(smbus.SMBus(1))  # Use default I2C bus
+            self.bus = self.router
             set_bus(self.bus)
         except Exception as e:
             print(f"I2C initialization failed: {e}")
             if not TEST_MODE:
                 TEST_MODE = True
                 print("Falling back to test mode")
+                # Simulated modules behind the real routing pins
+                import simhardware
+                self.router.attach(simhardware.SimSMBus(simhardware.build_maze(GPIO)))
+                self.bus = self.router
+                set_bus(self.bus)
+
+        # Background I/O thread that owns the bus during a race. Safety and penalty
+        # jobs go ahead of background reads; same-route jobs are grouped.
+        self.i2c_worker = I2CWorker(current_route=lambda: self.router.active_route)
+        self.i2c_worker.start()
+        self._i2c_poll_interval = 0.02
+        self._i2c_poll_id = None
+        self._startup_mark("I2C bus")
 
         # setup module state storage
         self.module_frames = {}
@@ -134,30 +221,96 @@ class LaserMazeUI(tk.Tk):
         self.calib_current       = {}
         self.selected_calib_addr = None
 
+        # PD voltage telemetry (pdtelemetry.py), created when its view is first opened
+        self.pd_telemetry = None
+
         # game timer storage
         self.timer_window    = None
         self.timer_label     = None
-        self._timer_updater  = None
-        self._last_elapsed   = 0.0
-        self._poll_interval  = 0.2
+        # The display and the hardware run on separate after() loops: the timer
+        # redraws at _display_fps from the race clock, while buttons and (poll
+        # mode) beam checks run every _hw_interval, which adapts between
+        # _poll_interval_min and _poll_interval_max around _poll_interval
+        self._timer_updater  = None   # display scheduler handle
+        self._hw_poller      = None   # hardware scheduler handle
+        self._display_fps    = max(1.0, _arg_value("--fps", 30.0))
+        self._poll_interval  = 1.0 / max(0.5, _arg_value("--poll-hz", 5.0))
+        self._poll_interval_min = max(0.02, self._poll_interval / 4)
+        self._poll_interval_max = max(1.0, self._poll_interval)
+        self._hw_interval    = self._poll_interval
         self._penalty_flash_id = None
+        self._penalty_flash_time = 0.5  # seconds a penalty's "+Ns" stays on the lane
+        self._race_id = 0  # bumped on reset/stop so late worker results are dropped
+        self._render_pending = False  # a lane render is queued with after_idle
+        self.render_stats = {"renders": 0, "configs": 0}  # Tk config calls made by lane renders
 
         # Add lane assignments dictionary
         self.lane_assignments = {}  # {addr: bus_number}
     
-        # Add separate timers for each lane
-        self._lane1_timer = 0.0
-        self._lane2_timer = 0.0
-
         # Add a list to store dynamically created UI elements
         self.dynamic_ui_elements = []
 
-        # build UI
+        # build UI (the other screens are built by _ensure_screen when first shown)
+        self.setup_frame = self.game_frame = self.calib_frame = None
         self._build_main_menu()
-        self._build_setup_mode()
-        self._build_game_mode()
-        self._build_power_calibration_mode()
         self.show_main_menu()
+        self._startup_mark("main menu")
+
+        # Optional timing instrumentation (--profile): nothing is wrapped without it.
+        # F12 opens the overlay; the numbers are also dumped to profile.json.
+        self.profiler = None
+        if "--profile" in sys.argv:
+            self.profiler = profiling.install(self)
+            profiling.start_dumps(self, self.profiler)
+            self.bind_all("<F12>", lambda e: profiling.show_overlay(self, self.profiler))
+
+        # Start draining worker results on the Tk thread
+        self._poll_i2c_results()
+
+        # Reuse the last scan if the modules are still where they were
+        self._restore_topology()
+        if self._cache_recheck_interval:
+            self.after(int(self._cache_recheck_interval * 1000), self._schedule_cache_recheck)
+        self.after_idle(self._report_startup)
+
+    def _startup_mark(self, step):
+        """Record the time since the previous mark as one step of the startup report."""
+        now = time.perf_counter()
+        self.startup_times.append((step, now - self._startup_last))
+        self._startup_last = now
+
+    def _report_startup(self):
+        """Print the boot-to-menu time once the main menu has been drawn."""
+        self.update_idletasks()
+        self._startup_mark("first frame")
+        steps = ", ".join(f"{step} {seconds * 1000:.0f}" for step, seconds in self.startup_times)
+        print(f"Startup: menu shown {(time.perf_counter() - _BOOT_TIME) * 1000:.0f} ms after boot ({steps} ms)")
+
+    def _load_audio(self):
+        """Start the mixer and pre-decode the audio cues (audio loader thread)."""
+        if self.audio.load():
+            self.audio_available = True
+            self.startup_times.append(("audio, in the background", self.audio.load_time))
+            print(f"Audio cues ready after {self.audio.load_time * 1000:.0f} ms")
+
+    def _ensure_screen(self, name):
+        """Build a screen ("setup", "game" or "calib") if it hasn't been yet; returns its frame."""
+        attr, build = self.SCREENS[name]
+        if getattr(self, attr) is None:
+            t0 = time.perf_counter()
+            getattr(self, build)()
+            self.startup_times.append((f"{name} screen", time.perf_counter() - t0))
+        return getattr(self, attr)
+
+    def _hide_screens(self, *frames):
+        for f in frames:
+            if f is not None:
+                f.pack_forget()
+
+    def _poll_i2c_results(self):
+        """Run callbacks for finished I2C worker jobs, then reschedule."""
+        self.i2c_worker.poll_results()
+        self._i2c_poll_id = self.after(int(self._i2c_poll_interval * 1000), self._poll_i2c_results)
 
     # ---------- Main Menu ----------
     def _build_main_menu(self):
@@ -202,14 +355,20 @@ class LaserMazeUI(tk.Tk):
                                 anchor='w',
                                 text="Automatic Lane Detection:\n" +
                                   "• Modules are automatically assigned to lanes based on physical connections\n" +
-                                  "• Lane 1 , Lane 2 \n" +
+                                  "• " + " , ".join(f"Lane {lane}" for lane in self.lanes) + " \n" +
                                   "• Click on any module to see details or toggle its state")
         instructions.pack(pady=10, padx=10, fill='x')
         
         
         # ---------- Scan Modules ----------
-        tk.Button(self.setup_frame, text="Scan All Modules", width=20,
-                  command=self.scan_modules).pack(pady=(10,5))
+        scan_ctl = tk.Frame(self.setup_frame)
+        scan_ctl.pack(pady=(10,5))
+        tk.Button(scan_ctl, text="Scan All Modules", width=20,
+                  command=self.scan_modules).pack(side='left', padx=5)
+        tk.Button(scan_ctl, text="Quick Scan", width=20,
+                  command=lambda: self.scan_modules(fast=True)).pack(side='left', padx=5)
+        self.scan_note = tk.Label(self.setup_frame, text="", font=('Arial', 9), fg='gray')
+        self.scan_note.pack()
         
         
         # ---------- Global Turn on and Turn off  ----------
@@ -222,6 +381,8 @@ class LaserMazeUI(tk.Tk):
                   command=self.turn_all_off).pack(side= 'left', padx=5)
         tk.Button(global_ctl, text="Turn All On", width=20,
                   command=self.turn_all_on).pack(side= 'left', padx=5)
+        tk.Button(global_ctl, text="PD Telemetry", width=20,
+                  command=self.show_pd_telemetry).pack(side= 'left', padx=5)
         
         
         # ---------- Module Container  ----------
@@ -235,30 +396,18 @@ class LaserMazeUI(tk.Tk):
         lane_container = tk.Frame(ctl)
         lane_container.pack(anchor='center')
         
-        # ----- LANE 1 -----
-        
-        lane1_col =tk.Frame(lane_container)
-        lane1_col.pack(side='left', padx=40, fill='y')
-        tk.Label(lane1_col, text ="Lane 1 Controls", font = ("Arial", 12, "bold")).pack(pady=(0,5))
-        
-        
-        tk.Button(lane1_col, text= "Toggle Lane 1", width=20, command= lambda:self.toggle_lane_modules(1)).pack(pady=5)
-        tk.Button(lane1_col, text= "Align Lane 1", width=20, command= lambda:self.align_lane(1)).pack(pady=5)
-        tk.Button(lane1_col, text= "Set Game Threshold Lane 1", width=20, command= lambda:self.prompt_and_set_lane_threshold(1)).pack(pady=5)
-        tk.Button(lane1_col, text= "Read Game Threshold Lane 1", width=20, command= lambda:self.read_lane_game_threshold(1)).pack(pady=5)
-        
-        
-        # ----- LANE 2 -----
-        
-        lane2_col =tk.Frame(lane_container)
-        lane2_col.pack(side='left', padx=40, fill='y')
-        tk.Label(lane2_col, text ="Lane 2 Controls", font = ("Arial", 12, "bold")).pack(pady=(0,5))
-        
-        
-        tk.Button(lane2_col, text= "Toggle Lane 2", width=20, command= lambda:self.toggle_lane_modules(2)).pack(pady=5)
-        tk.Button(lane2_col, text= "Align Lane 2", width=20, command= lambda:self.align_lane(2)).pack(pady=5)
-        tk.Button(lane2_col, text= "Set Game Threshold Lane 2", width=20, command= lambda:self.prompt_and_set_lane_threshold(2)).pack(pady=5)
-        tk.Button(lane2_col, text= "Read Game Threshold Lane 2", width=20, command= lambda:self.read_lane_game_threshold(2)).pack(pady=5)
+        # ----- One column per lane -----
+        # Narrower columns when four lanes share the window
+        col_padx = 40 if len(self.lanes) <= 2 else 10
+        for lane in self.lanes:
+            lane_col =tk.Frame(lane_container)
+            lane_col.pack(side='left', padx=col_padx, fill='y')
+            tk.Label(lane_col, text =f"Lane {lane} Controls", font = ("Arial", 12, "bold")).pack(pady=(0,5))
+            
+            tk.Button(lane_col, text= f"Toggle Lane {lane}", width=20, command= lambda l=lane:self.toggle_lane_modules(l)).pack(pady=5)
+            tk.Button(lane_col, text= f"Align Lane {lane}", width=20, command= lambda l=lane:self.align_lane(l)).pack(pady=5)
+            tk.Button(lane_col, text= f"Set Game Threshold Lane {lane}", width=20, command= lambda l=lane:self.prompt_and_set_lane_threshold(l)).pack(pady=5)
+            tk.Button(lane_col, text= f"Read Game Threshold Lane {lane}", width=20, command= lambda l=lane:self.read_lane_game_threshold(l)).pack(pady=5)
         
         
         # ---------- Voltage Container  ----------
@@ -292,6 +441,62 @@ class LaserMazeUI(tk.Tk):
                   command=self.show_main_menu).pack(pady=(0,10))
 
 
+    def print_bus_stats(self):
+        """Print route switch / settle time / transaction counters from the routed bus (and audio cue timings)."""
+        st = self.router.stats
+        print(f"I2C routing: {st['route_switches']} switches for {st['route_requests']} route requests, "
+              f"{st['settle_time']*1000:.0f} ms settling, {st['transactions']} transactions")
+        qs = self.beam_query_stats
+        print(f"Beam queries: {qs['queries']} module queries, {qs['stopped_early']} early stops, "
+              f"{qs['backed_off']} skipped while backed off")
+        ws = self.i2c_worker.stats
+        waits = ", ".join(f"p{p} {w*1000:.1f} ms" for p, w in sorted(ws['max_wait'].items()))
+        print(f"I2C worker: {ws['jobs']} jobs, {ws['route_grouped']} run early to stay on the route, "
+              f"max queue wait {waits or '-'}")
+        rs = retry_stats
+        print(f"Bus errors: {rs['retries']} retries, {rs['gave_up']} given up, {rs['parked']} modules parked "
+              f"({rs['recovered']} recovered), {rs['skipped']} calls skipped while parked")
+        print(self.audio.summary())
+
+    def _log_event(self, event, **fields):
+        """Append an event to the race log. Logging problems never stop a race."""
+        if self.race_log is None:
+            try:
+                self.race_log = racelog.RaceLog.new_session()
+            except OSError as e:
+                print(f"Race log disabled: {e}")
+                self.race_log = False
+        if self.race_log:
+            self.race_log.log(event, **fields)
+
+    def _log_stop(self, reason):
+        """Log the end of the current race (once) and write the buffered events out."""
+        if not self._race_open:
+            return
+        self._race_open = False
+        self._log_event(racelog.STOP, value=reason)
+        if self.race_log:
+            self.race_log.flush()
+
+    def _bus_of(self, addr):
+        """Bus (RJ45 port) a module was found on, or None if it hasn't been scanned."""
+        if addr in getattr(self, 'module_bus', {}):
+            return self.module_bus[addr]
+        assignment = self.lane_assignments.get(addr)
+        if isinstance(assignment, dict):
+            return assignment.get("bus")
+        return assignment
+
+    def _modules_by_bus(self, lanes=None):
+        """Flatten bus_groups_by_lane into {bus: [addr, ...]} (optionally for some lanes only)."""
+        modules_by_bus = {}
+        for lane, bus_groups in getattr(self, 'bus_groups_by_lane', {}).items():
+            if lanes is not None and lane not in lanes:
+                continue
+            for bus, modules in bus_groups.items():
+                modules_by_bus.setdefault(bus, []).extend(modules)
+        return modules_by_bus
+
     def _get_bus_color(self, bus_num):
         """Get background color for bus assignment"""
         if bus_num == 1:
@@ -448,7 +653,6 @@ class LaserMazeUI(tk.Tk):
         
         for bus, modules in lane_group.items():
             self.set_i2c_route(bus)
-            time.sleep(0.05)
             for addr in modules:
                 try:
                     self.bus.write_byte(addr, 0x03)
@@ -465,44 +669,73 @@ class LaserMazeUI(tk.Tk):
         container = tk.Frame(win)
         container.pack(fill='both' , expand = True, padx=10, pady=10)
         voltage_labels={}
+        timing_label = tk.Label(win, text="", font=("Arial", 9), fg='#555')
         
-        def read_pd_voltages():
-#             print(f"[DEBUG] Reading PD VOltages for lane{lane}")
-            for widget in container.winfo_children():
-                    widget.destroy()
-                
+        def read_lane_voltages():
+            """Bulk read every module in the lane, one batch per bus. Runs on the I2C worker."""
+            t0 = time.monotonic()
+            readings = {}
             for bus, modules in lane_group.items():
                 self.set_i2c_route(bus)
-                time.sleep(0.05)
-                for addr in modules:
-                    try:
-                        voltage = READ_PD_VOLT(addr)
-#                         print(f"[DEBUG] Lane {lane} Bus {bus} Module {addr: 02X} Voltage {voltage: .3f}V")
-                        row= tk.Frame(container)
-                        row.pack(fill ='x', pady=2)
-                        tk.Label(row, text =f"Mod {addr} bus({bus})",
-                                 width=14, anchor ='w').pack(side='left')
-                        lbl = tk.Label(row, text =f"{voltage:.3f}V",
-                                 width=10, anchor ='e', bg='#EEE' )
-                        lbl.pack(side='right') 
-                        voltage_labels[(bus, addr)] =lbl
-                    except Exception as e:
-                        print(f"[Debug] error Failed to read PD from {addr}:{e}")
-                                    
-        def refresh_readings():
+                for addr, voltage in READ_PD_VOLTS(modules).items():
+                    readings[(bus, addr)] = voltage
+            return readings, time.monotonic() - t0
+
+        def show_timing(elapsed):
+            if win.winfo_exists():
+                timing_label.config(text=f"Read {len(voltage_labels)} modules in {elapsed*1000:.0f} ms")
+
+        def build_rows(result):
+            """Build one row per module from a bulk read (existing rows are updated in place)."""
+            readings, elapsed = result
+            if not win.winfo_exists():
+                return
+            if voltage_labels and set(voltage_labels) == set(readings):
+                update_rows(result)
+                return
+            for widget in container.winfo_children():
+                    widget.destroy()
+            voltage_labels.clear()
+            for (bus, addr), voltage in readings.items():
+#                 print(f"[DEBUG] Lane {lane} Bus {bus} Module {addr: 02X} Voltage {voltage}")
+                row= tk.Frame(container)
+                row.pack(fill ='x', pady=2)
+                tk.Label(row, text =f"Mod {addr} bus({bus})",
+                         width=14, anchor ='w').pack(side='left')
+                text, bg = (f"{voltage:.3f}V", '#EEE') if voltage is not None else ("ERR", '#FFA07A')
+                lbl = tk.Label(row, text =text,
+                         width=10, anchor ='e', bg=bg )
+                lbl.pack(side='right') 
+                voltage_labels[(bus, addr)] =lbl
+            show_timing(elapsed)
+
+        def update_rows(result):
             """ refresh exisiting labels without rebuilding the whole UI."""
-            for (bus, addr) , lbl in voltage_labels.items():
-                try:
-                    self.set_i2c_route(bus)
-                    voltage =READ_PD_VOLT(addr)
-                    lbl.config(text = f"{voltage:.3f} V")
-                    print("refreshed") 
-                except Exception:
+            readings, elapsed = result
+            if not win.winfo_exists():
+                return
+            for key, lbl in voltage_labels.items():
+                voltage = readings.get(key)
+                if voltage is None:
                     lbl.config(text="ERR", bg='#FFA07A')
+                else:
+                    lbl.config(text = f"{voltage:.3f} V", bg='#EEE')
+            show_timing(elapsed)
+
+        # Reads run on the I2C worker so the window stays responsive while mirrors are adjusted
+        def read_pd_voltages():
+            self.i2c_worker.submit(read_lane_voltages, tag=('align', lane), on_done=build_rows,
+                                   priority=PRIORITY_BACKGROUND)
+
+        def refresh_readings():
+            self.i2c_worker.submit(read_lane_voltages, tag=('align', lane), on_done=update_rows,
+                                   priority=PRIORITY_BACKGROUND)
                     
                     
         tk.Button(win, text ="Read PD Voltages", command = read_pd_voltages).pack(pady=5)
         tk.Button(win, text= "Refresh" , command= refresh_readings).pack(pady=5)
+        tk.Button(win, text= "Live Telemetry" , command= lambda: self.show_pd_telemetry(lane)).pack(pady=5)
+        timing_label.pack()
         
             
         def on_close():
@@ -517,7 +750,6 @@ class LaserMazeUI(tk.Tk):
                 lane_group = self.bus_groups_by_lane.get(lane,{})
                 for bus, modules in lane_group.items():
                     self.set_i2c_route(bus)
-                    time.sleep(0.05)
                     for addr in modules:
                         try:
                             self.write_byte(addr, 0x04)
@@ -537,48 +769,182 @@ class LaserMazeUI(tk.Tk):
             
             
             
-    def scan_modules(self):
-        for w in self.module_container.winfo_children():
-            w.destroy()
-        self.module_frames.clear()
-        self.module_states.clear()
+    def show_pd_telemetry(self, lane=None):
+        """Stream PD voltages of the scanned modules and open a live view (of one lane, or all)."""
+        modules_by_bus = self._modules_by_bus()
+        if not modules_by_bus:
+            messagebox.showwarning("No Modules", "Please scan for modules first")
+            return
+        telemetry = self.pd_telemetry
+        if telemetry is None or telemetry.modules_by_bus != {b: m for b, m in modules_by_bus.items() if m}:
+            # New scan since the last view: start a fresh history
+            if telemetry is not None:
+                telemetry.stop()
+            telemetry = self.pd_telemetry = pdtelemetry.PDTelemetry(self, modules_by_bus)
+        if lane is None:
+            pdtelemetry.show_view(self, telemetry)
+        else:
+            addresses = [a for addrs in self._modules_by_bus(lanes=[lane]).values() for a in addrs]
+            pdtelemetry.show_view(self, telemetry, addresses, title=f"PD Telemetry Lane {lane}")
 
+    def _scan_all_buses(self, fast=False):
+        """Probe all four buses for modules. Runs on the I2C worker.
 
-        
-        # Show scanning progress
+        Addresses found last time are probed first on each bus; a fast scan
+        also skips the A6/A7 address bits unless a known module uses them.
+        Progress is published in self._scan_progress for the Tk thread.
+        Returns {bus: [addr, ...]}.
+        """
+        known_all = [a for addrs in self.known_addresses.values() for a in addrs]
+        plans = {bus: SCAN_ADDRESSES(known_all, fast) for bus in range(1, 5)}
+        total = sum(len(addrs) for addrs in plans.values())
+        done = 0
+        found = {}
+        for bus in self.router.route_order(plans):
+            try:
+                self.set_i2c_route(bus)
+                found[bus] = SCAN_I2C_BUS(plans[bus], known=self.known_addresses.get(bus),
+                                          progress=lambda i, n, bus=bus, base=done:
+                                              setattr(self, '_scan_progress', (base + i, total, bus)))
+            except Exception as e:
+                print(f"Scan of bus {bus} failed: {e}")
+                found[bus] = []
+            done += len(plans[bus])
+        self.known_addresses = {bus: list(addrs) for bus, addrs in found.items() if addrs}
+        return found
+
+    def _run_scan(self, fast, on_done):
+        """Scan on the I2C worker behind a live progress window, then call on_done(found)."""
         progress = tk.Toplevel(self)
         progress.title("Scanning Modules")
-        progress.geometry("300x100")
-        tk.Label(progress, text="Scanning for modules...", font=('Arial', 12)).pack(pady=10)
+        progress.geometry("300x110")
+        tk.Label(progress, text="Quick scan..." if fast else "Scanning for modules...",
+                 font=('Arial', 12)).pack(pady=(10,5))
         progress_var = tk.IntVar()
         progress_bar = tk.ttk.Progressbar(progress, variable=progress_var, maximum=100)
         progress_bar.pack(fill='x', padx=20)
-        progress.update()
+        status = tk.Label(progress, text="", font=('Arial', 9))
+        status.pack(pady=5)
+        self._scan_progress = (0, 1, None)
+
+        def update_progress():
+            if not progress.winfo_exists():
+                return
+            done, total, bus = self._scan_progress
+            progress_var.set(int(100 * done / max(1, total)))
+            if bus is not None:
+                status.config(text=f"Bus {bus} (J{bus}): {done}/{total} addresses probed")
+            progress.after(50, update_progress)
+
+        def finished(found):
+            if progress.winfo_exists():
+                progress.destroy()
+            on_done(found)
+            if any(found.values()):
+                self.i2c_worker.submit(self._save_topology, found, tag='topology_save',
+                                       on_done=lambda details: setattr(self, 'module_details', details),
+                                       priority=PRIORITY_BACKGROUND)
+
+        if not self.i2c_worker.submit(self._scan_all_buses, fast, tag='scan', on_done=finished):
+            progress.destroy()  # a scan is already running
+            return
+        update_progress()
+
+    # ---------- Topology cache ----------
+    def _save_topology(self, found):
+        """Read colour/current/threshold of the found modules and write the topology cache. Runs on the I2C worker."""
+        details = {}
+        INVALIDATE_MODULE_CACHE()  # a fresh scan may have found swapped modules
+
+        def read_details(bus, addrs):
+            # One status read per module; modules on older firmware fall back to three reads
+            for addr, status in READ_STATUSES(addrs).items():
+                if status is not None:
+                    details[addr] = {key: status[key] for key in ("color", "current", "threshold")}
+                    continue
+                try:
+                    details[addr] = {"color": READ_LASER_COLOR(addr),
+                                     "current": READ_LASER_CURRENT(addr),
+                                     "threshold": READ_GAME_THRESHOLD(addr)}
+                except Exception as e:
+                    print(f"Could not read settings of module 0x{addr:02X}: {e}")
+
+        self.router.for_each_route({bus: addrs for bus, addrs in found.items() if addrs}, read_details)
+        topologycache.save(found, self.bus_to_lane, details)
+        return details
+
+    def _restore_topology(self):
+        """Load the cached topology and check it with one ping per module instead of a full scan."""
+        if "--rescan" in sys.argv:
+            return
+        cache = topologycache.load()
+        if cache is None:
+            return
+
+        def checked(missing):
+            if missing:
+                print(f"Module topology changed ({len(missing)} cached modules not answering) - rescanning")
+                self.scan_modules()
+                return
+            found = topologycache.buses(cache)
+            self.known_addresses = dict(found)
+            self.module_details = topologycache.details(cache)
+            SEED_MODULE_CACHE(self.module_details)
+            self._apply_module_scan(found, announce=False)
+            self._apply_calib_scan(found, announce=False)
+            for addr, d in self.module_details.items():
+                self.calib_color[addr] = d.get("color")
+                self.calib_current[addr] = d.get("current")
+            # The ping only finds cached modules that went missing, not ones added since
+            self.scan_note.config(text="Modules restored from the last scan - scan again to find added modules")
+            print(f"Module topology restored from cache ({len(self.scanned_addresses)} modules)")
+
+        self.i2c_worker.submit(topologycache.verify, cache, self.router, PROBE_MODULE,
+                               tag='topology_check', on_done=checked)
+
+    def _recheck_module_cache(self):
+        """Compare cached module settings with the hardware. Runs on the I2C worker."""
+        changed = []
+        for result in self.router.for_each_route(self._modules_by_bus(),
+                                                 lambda bus, addrs: RECHECK_MODULE_CACHE(addrs)).values():
+            changed.extend(result)
+        return changed
+
+    def _schedule_cache_recheck(self):
+        """Re-check the module settings cache in the background between races."""
+        racing = self.timer_window is not None and self.timer_window.winfo_exists()
+        if not racing and self.scanned_addresses:
+            def report(changed):
+                for addr, key, cached, actual in changed:
+                    print(f"Module 0x{addr:02X} {key} changed outside the controller: {cached} -> {actual}")
+                    self.module_details.setdefault(addr, {})[key] = actual
+            self.i2c_worker.submit(self._recheck_module_cache, tag='cache_recheck', on_done=report,
+                                   priority=PRIORITY_BACKGROUND)
+        self.after(int(self._cache_recheck_interval * 1000), self._schedule_cache_recheck)
+
+    def scan_modules(self, fast=False):
+        """Scan all buses in the background and rebuild the setup grid when done."""
+        self._run_scan(fast, self._apply_module_scan)
+
+    def _apply_module_scan(self, found, announce=True):
+        """Rebuild lane/bus assignments and the module grid from a scan result."""
+        self._ensure_screen("setup")
+        self.scan_note.config(text="")
+        for w in self.module_container.winfo_children():
+            w.destroy()
+        self.module_frames.clear()
+        self.module_states.clear()
         
-        # Scan modules directly without retries or extra delays
         all_addresses = [] 
         lane_modules = {}  # Dictionary to group modules by lane
         self.bus_modules={}
         self.lane_assignments= {}
         self.bus_groups_by_lane={} 
         
-            # Groups buses to lane *(RJ1 and 2 are lane 1 and RJ3 and 4 are lane 2)
-        bus_to_lane_map = {
-            1:1 ,
-            2:1 ,
-            3:2 ,
-            4:2
-        }
-            # In real mode, scan only lanes 1 and 2 (J1, J2)
-        for lane_idx, bus in enumerate(range(1, 5)):  # <--- changed: only J1 and J2
-            progress_var.set(lane_idx * 25)  # 50% per lane
-            progress.update()
-                
-                # Set I2C routing to this lane
-            self.set_i2c_route(bus)
-                
-                # Direct scan without retries or slow scan options
-            bus_addresses = SCAN_I2C_BUS()
+        bus_to_lane_map = self.bus_to_lane
+ 
+        for bus in sorted(found):
+            bus_addresses = found[bus]
                 
             if bus_addresses:
                 lane = bus_to_lane_map[bus]
@@ -588,10 +954,6 @@ class LaserMazeUI(tk.Tk):
                 if lane not in lane_modules: 
                     lane_modules[lane] = []
                 lane_modules[lane].extend(bus_addresses)
-                    
-                if bus not in self.bus_modules:
-                    self.bus_modules[bus] =[]
-                self.bus_modules[bus].extend(bus_addresses)
             
                     # Add lane information to addresses found
                 for addr in bus_addresses:
@@ -604,12 +966,10 @@ class LaserMazeUI(tk.Tk):
             print(f"Module {addr:02X}:lane {assign['lane']} , bus{assign['bus']}")
             
         self.scanned_addresses = all_addresses
-        
-        # Close progress window
-        progress.destroy()
                 
         if not self.scanned_addresses:
-            messagebox.showinfo("Scan Result", "No I²C devices found.")
+            if announce:
+                messagebox.showinfo("Scan Result", "No I²C devices found.")
             return
         
     
@@ -667,7 +1027,8 @@ class LaserMazeUI(tk.Tk):
                 
         # Show summary message
         lane_summary = ", ".join([f"Lane {lane}: {len(modules)} modules" for lane, modules in lane_modules.items()])
-        messagebox.showinfo("Scan Complete", f"Found {len(self.scanned_addresses)} modules\n{lane_summary}")
+        if announce:
+            messagebox.showinfo("Scan Complete", f"Found {len(self.scanned_addresses)} modules\n{lane_summary}")
     
     def on_module_click(self, addr):
         
@@ -675,7 +1036,6 @@ class LaserMazeUI(tk.Tk):
             assignment = self.lane_assignments[addr]
             bus= assignment["bus"]
             self.set_i2c_route(bus)
-            time.sleep(0.05)
             
             
             
@@ -710,21 +1070,19 @@ class LaserMazeUI(tk.Tk):
             messagebox.showing("No Devices", "Scan First")
             return
         
-        for lane, bus_groups in self.bus_groups_by_lane.items():
-            for bus, modules in bus_groups.items():
-                
-            
-                self.set_i2c_route(bus)
-                time.sleep(0.05)
-                for addr in modules:
-                    try:
-                        self.bus.write_byte(addr, 0x04)
-                        self.module_states[addr]= False
-                        f, lbl = self.module_frames[addr]
-                        f.config(bg='red')
-                        lbl.config(bg='red')
-                    except Exception as e:
-                        print(f"I2C error with module {addr:02X}:{e}")
+        # One route switch per bus, starting with the bus already routed
+        modules_by_bus = self._modules_by_bus()
+        for bus in self.router.route_order(modules_by_bus):
+            self.set_i2c_route(bus)
+            BROADCAST_ALL(modules_by_bus[bus], CMD_TURN_OFF)
+            for addr in modules_by_bus[bus]:
+                try:
+                    self.module_states[addr]= False
+                    f, lbl = self.module_frames[addr]
+                    f.config(bg='red')
+                    lbl.config(bg='red')
+                except Exception as e:
+                    print(f"I2C error with module {addr:02X}:{e}")
                         
         messagebox.showinfo("Action", "All lasers turned off") 
 
@@ -735,21 +1093,19 @@ class LaserMazeUI(tk.Tk):
             messagebox.showing("No Devices", "Scan First")
             return
         
-        for lane, bus_groups in self.bus_groups_by_lane.items():
-            for bus, modules in bus_groups.items():
-                
-            
-                self.set_i2c_route(bus)
-                time.sleep(0.05)
-                for addr in modules:
-                    try:
-                        self.bus.write_byte(addr, 0x03)
-                        self.module_states[addr]= True
-                        f, lbl = self.module_frames[addr]
-                        f.config(bg='green')
-                        lbl.config(bg='green')
-                    except Exception as e:
-                        print(f"I2C error with module {addr:02X}:{e}")
+        # One route switch per bus, starting with the bus already routed
+        modules_by_bus = self._modules_by_bus()
+        for bus in self.router.route_order(modules_by_bus):
+            self.set_i2c_route(bus)
+            BROADCAST_ALL(modules_by_bus[bus], CMD_TURN_ON)
+            for addr in modules_by_bus[bus]:
+                try:
+                    self.module_states[addr]= True
+                    f, lbl = self.module_frames[addr]
+                    f.config(bg='green')
+                    lbl.config(bg='green')
+                except Exception as e:
+                    print(f"I2C error with module {addr:02X}:{e}")
                         
         messagebox.showinfo("Action", "All lasers turned on") 
         
@@ -765,7 +1121,6 @@ class LaserMazeUI(tk.Tk):
             
         for bus, modules in bus_groups.items():
             self.set_i2c_route(bus)
-            time.sleep(0.05)
             
             for addr in modules:
                 
@@ -812,7 +1167,6 @@ class LaserMazeUI(tk.Tk):
         lane_group = self.bus_groups_by_lane[lane]
         for bus, modules in lane_group.items():
             self.set_i2c_route(bus)
-            time.sleep(0.05)
             print(f"{bus}")
             for addr in modules:
                 self.set_module_game_threshold(addr, voltage)
@@ -859,7 +1213,6 @@ class LaserMazeUI(tk.Tk):
         
         for bus, modules in lane_groups.items():
             self.set_i2c_route(bus)
-            time.sleep(0.05)
             for addr in modules:
                 voltage = self.read_module_game_threshold(addr)
                 
@@ -956,19 +1309,30 @@ class LaserMazeUI(tk.Tk):
         tk.Button(self.game_frame, text="Back", width=20,
                   command=self.show_main_menu).pack(pady=(20,10))
 
+    def _reset_lane_results(self):
+        """Clear every lane's finish flag and time."""
+        for lane in self.lanes.values():
+            lane.reset()
+        self.winner_determined = False
+        self._margin_label = None
+
+    def _lane_font(self, size):
+        """Timer window font, scaled down when more than two lanes share the window."""
+        scale = 2 / max(2, len(self.race_lanes))
+        return ('Arial', max(12, int(size * scale)), 'bold')
+
     def reset_finish_status(self):
         """Reset the lane finish status for testing"""
-        self.lane_finished = {1: False, 2: False}
-        self.lane_finish_times = {1: 0.0, 2: 0.0}
-        self.winner_determined = False
+        self._reset_lane_results()
+        self.race_clock.clear_finish()
         
         # Clean up any UI elements from previous games
         self._cleanup_game_ui()
         
         # If timer window exists, update the displays with current timer values
-        if hasattr(self, 'lane1_timer') and hasattr(self, 'lane2_timer'):
-            self.lane1_timer.config(text=f"{self._lane1_timer:.2f} s")
-            self.lane2_timer.config(text=f"{self._lane2_timer:.2f} s")
+        for lane in self.race_lanes:
+            lane.set("timer", text=f"{self.race_clock.lane_time(lane.number):.2f} s")
+        self._request_render()
             
         messagebox.showinfo("Reset", "Lane finish status has been reset")
 
@@ -976,11 +1340,12 @@ class LaserMazeUI(tk.Tk):
         """Start game with countdown timer window"""
         # Reset any leftover state from previous game so we always start fresh
         self._reset_for_new_game()
+        # No telemetry reads on the bus during a race (open views show "paused")
+        if self.pd_telemetry:
+            self.pd_telemetry.stop()
 
         # Reset finish status and flags (again, for clarity)
-        self.lane_finished = {1: False, 2: False}
-        self.lane_finish_times = {1: 0.0, 2: 0.0}
-        self.winner_determined = False
+        self._reset_lane_results()
 #         self.cleanup_game_ui()
         
         if not getattr(self, "scanned_addresses", None):
@@ -989,21 +1354,26 @@ class LaserMazeUI(tk.Tk):
         
         # Clean up any UI elements from previous games
         # (kept for compatibility; _reset_for_new_game already handles cleanu
-        for lane, bus_groups in self.bus_groups_by_lane.items():
-            for bus, modules in bus_groups.items():
-                self.set_i2c_route(bus)
-                time.sleep(0.005)
-                GAME_MODE_ON(modules)
-                
-#         time.sleep(0.05)
-        print("checking modules") 
-        blocked_modules = self.check_and_get_blocked_beam()
+        def arm_all_lanes():
+            self.router.for_each_route(self._modules_by_bus(),
+                                       lambda bus, modules: BROADCAST_ALL(modules, CMD_GAME))
+
+#             time.sleep(0.05)
+            print("checking modules")
+            return self.check_and_get_blocked_beam()
+
+        # Runs on the I2C worker so it can't interleave with a queued race job
+        try:
+            blocked_modules = self.i2c_worker.call(arm_all_lanes)
+        except (RuntimeError, TimeoutError) as e:
+            messagebox.showerror("Cannot Start Game", f"The I2C bus is not responding ({e}). Restart the controller.")
+            return
         print(blocked_modules)
         if blocked_modules:
             msg_lines = []
             for item in blocked_modules:
-                if len(item) ==4:
-                    addr, lane, bus, penalty =item
+                if len(item) ==5:
+                    addr, lane, bus, penalty, t =item
                     msg_lines.append(f"Module 0x{addr} (Lane {lane} , Bus {bus})")
                 else:
                     msg_lines.append(str(item)) 
@@ -1014,104 +1384,104 @@ class LaserMazeUI(tk.Tk):
             return
             
 
-        if not self.timer_window or not tk.Toplevel.winfo_exists(self.timer_window):
-            self.timer_window = tk.Toplevel(self)
-            self.timer_window.title("Race Timers")
-            self.timer_window.geometry("1200x600")
-            
-            # Store frame references
-            self.left_frame = tk.Frame(self.timer_window, bg='black')
-            self.left_frame.pack(side=tk.LEFT, expand=True, fill='both')
-            
-            self.right_frame = tk.Frame(self.timer_window, bg='black')
-            self.right_frame.pack(side=tk.RIGHT, expand=True, fill='both')
-            
-            # Store header references
-            self.lane1_header = tk.Label(self.left_frame, text="LANE 1", 
-                                   font=('Arial', 48, 'bold'),
-                                   fg='white', bg='black')
-            self.lane1_header.pack(pady=20)
-            
-            self.lane2_header = tk.Label(self.right_frame, text="LANE 2", 
-                                   font=('Arial', 48, 'bold'),
-                                   fg='white', bg='black')
-            self.lane2_header.pack(pady=20)
-            
-            # Create container frames for timers to maintain centering
-            timer1_container = tk.Frame(self.left_frame, bg='black')
-            timer1_container.pack(expand=True)
-            
-            timer2_container = tk.Frame(self.right_frame, bg='black')
-            timer2_container.pack(expand=True)
-            
-            # Timer labels in containers
-            self.lane1_timer = tk.Label(timer1_container, text="0.00",
-                                  font=('Arial', 120, 'bold'),
-                                  fg='white', bg='black',
-                                  width=10)  # Fixed width to prevent jumping
-            self.lane1_timer.pack()
-            
-            self.lane2_timer = tk.Label(timer2_container, text="0.00",
-                                  font=('Arial', 120, 'bold'),
-                                  fg='white', bg='black',
-                                  width=10)  # Fixed width to prevent jumping
-            self.lane2_timer.pack()
-
-        
-          
-          
+        # Only lanes with modules race; the others get no timer and aren't polled
+        race_lanes = [self.lanes[lane] for lane in sorted(self.bus_groups_by_lane) if lane in self.lanes]
+        self._build_timer_window(race_lanes)
         
         # Reset timers and tracking variables
-        self._last_elapsed = 0.0
-        self._lane1_timer = 0.0
-        self._lane2_timer = 0.0
+        self.race_clock.reset(lanes=self.lane_numbers())
         
-  # Play countdown sound if available
+  # Play countdown sound if available (pre-decoded, so this never waits on the SD card)
         if self.audio_available:
-            try:
-                pygame.mixer.music.load("countdown.mp3")
-                print("Countdown Audio")
-                pygame.mixer.music.play()
-            except Exception as e:
-                print("Could not play countdown.mp3:", e)
-                 
-                 
+            self.audio.play("countdown")
         
         self.countdown(3)
 
+    def _build_timer_window(self, race_lanes):
+        """(Re)build the race timer window with one column per racing lane."""
+        numbers = [lane.number for lane in race_lanes]
+        if self.timer_window and tk.Toplevel.winfo_exists(self.timer_window):
+            if numbers == self.lane_numbers():
+                return
+            self.timer_window.destroy()
+        for lane in self.lanes.values():
+            lane.attach()
+        self.race_lanes = race_lanes
+
+        self.timer_window = tk.Toplevel(self)
+        self.timer_window.title("Race Timers")
+        self.timer_window.geometry(f"{600 * max(2, len(race_lanes))}x600")
+        
+        for lane in race_lanes:
+            looks = {
+                "frame": {"bg": 'black'},
+                "header": {"text": lane.title, "font": self._lane_font(48), "fg": 'white', "bg": 'black'},
+                "timer": {"text": "0.00", "font": self._lane_font(120), "fg": 'white', "bg": 'black'},
+            }
+            frame = tk.Frame(self.timer_window, **looks["frame"])
+            frame.pack(side=tk.LEFT, expand=True, fill='both')
+            
+            header = tk.Label(frame, **looks["header"])
+            header.pack(pady=20)
+            
+            # Container frame for the timer to maintain centering
+            timer_container = tk.Frame(frame, bg='black')
+            timer_container.pack(expand=True)
+            
+            timer = tk.Label(timer_container, width=10, **looks["timer"])  # Fixed width to prevent jumping
+            timer.pack()
+            lane.attach(frame, header, timer, looks)
+
+    def _request_render(self):
+        """Push the lanes' changed looks to Tk once the current batch of updates is done."""
+        if self._render_pending:
+            return
+        self._render_pending = True
+        self.after_idle(self._render_lanes)
+
+    def _render_lanes(self):
+        """Apply pending lane render state (one config call per changed widget)."""
+        self._render_pending = False
+        self.render_stats["renders"] += 1
+        for lane in self.race_lanes:
+            if lane.has_display():
+                self.render_stats["configs"] += lane.render()
+
+    def lane_numbers(self):
+        """Numbers of the lanes in the current race."""
+        return [lane.number for lane in self.race_lanes]
+
     def countdown(self, n):
-        """Countdown on both lane displays"""
+        """Countdown on every lane display"""
         cmap = {3:'red', 2:'orange', 1:'green'}
         if n > 0:
             c = cmap[n]
-            # Change entire frames and labels
-            self.left_frame.config(bg=c)
-            self.right_frame.config(bg=c)
-            self.lane1_timer.config(text=str(n), fg='white', bg=c)
-            self.lane2_timer.config(text=str(n), fg='white', bg=c)
-            self.lane1_header.config(bg=c)  # Change header backgrounds too
-            self.lane2_header.config(bg=c)
+            self._log_event(racelog.COUNTDOWN, value=n)
+            # Change entire frames, headers and timers
+            for lane in self.race_lanes:
+                lane.paint(c, text=str(n), fg='white')
+            self._request_render()
             self.timer_window.after(1000, lambda: self.countdown(n-1))
         else:
-            self.left_frame.config(bg='green')
-            self.right_frame.config(bg='green')
-            self.lane1_timer.config(text="Go!", fg='white', bg='green')
-            self.lane2_timer.config(text="Go!", fg='white', bg='green')
-            self.lane1_header.config(bg='green')
-            self.lane2_header.config(bg='green')
+            for lane in self.race_lanes:
+                lane.paint('green', text="Go!", fg='white')
+            self._request_render()
             START_TIMER()
-            self.timer_window.after(2000, self._update_timer)
+            self.race_clock.start()
+            self._race_open = True
+            self._log_event(racelog.START, value=self._race_id, t_ns=self.race_clock.start_ns)
+            self._arm_beam_edges()
+            self._arm_finish_edges()
+            # Timers and hardware polling start once "Go!" has been shown
+            self._timer_updater = self.after(2000, self._start_race_loops)
             # Reset backgrounds after "Go!"
             self.timer_window.after(2500, self._reset_timer_backgrounds)
 
     def _reset_timer_backgrounds(self):
         """Reset timer window backgrounds to black"""
-        self.left_frame.config(bg='black')
-        self.right_frame.config(bg='black')
-        self.lane1_timer.config(bg='black')
-        self.lane2_timer.config(bg='black')
-        self.lane1_header.config(bg='black')
-        self.lane2_header.config(bg='black')
+        for lane in self.race_lanes:
+            lane.paint('black')
+        self._request_render()
         
     def set_i2c_route(self, lane):
         """Set GPIO pins 5 and 6 to route I2C to the specified lane/RJ45 port
@@ -1120,6 +1490,9 @@ class LaserMazeUI(tk.Tk):
         Lane 2 (J2): Pin 5 High, Pin 6 Low
         Lane 3 (J3): Pin 5 Low, Pin 6 High
         Lane 4 (J4): Pin 5 High, Pin 6 High
+
+        The pins are only driven (and the 5 ms settle delay only paid) when the
+        route actually changes; see RoutedBus.
         """
             
         # Ensure lane is valid
@@ -1127,297 +1500,580 @@ class LaserMazeUI(tk.Tk):
             print(f"Invalid lane: {lane}")
             return
             
-        # Set routing pins based on lane
-        if lane == 1:  # J1
-            GPIO.output(self.i2c_routing_pins[0], GPIO.LOW)
-            GPIO.output(self.i2c_routing_pins[1], GPIO.LOW)
-        elif lane == 2:  # J2
-            GPIO.output(self.i2c_routing_pins[0], GPIO.HIGH)
-            GPIO.output(self.i2c_routing_pins[1], GPIO.LOW)
-        elif lane == 3:  # J3
-            GPIO.output(self.i2c_routing_pins[0], GPIO.LOW)
-            GPIO.output(self.i2c_routing_pins[1], GPIO.HIGH)
-        elif lane == 4:  # J4
-            GPIO.output(self.i2c_routing_pins[0], GPIO.HIGH)
-            GPIO.output(self.i2c_routing_pins[1], GPIO.HIGH)
-        
-        # Small delay to ensure routing is established
-        time.sleep(0.005)
-        
-    def check_and_get_blocked_beam(self):
+        self.router.set_route(lane)
+        
+    def check_and_get_blocked_beam(self, adaptive=False):
         """Check if any beam is blocked and return the address and penalty seconds.
 
-        This function checks lane GPIO pins (J1/J2). If the lane input indicates a block,
-        it routes the I2C to that lane and queries each Arduino using CMD_BEAM_BLOCKED.
-        The Arduino's response is interpreted as: 1 = blocked, 0 = clear.
+        This function checks the beam GPIO pin of every bus with modules. If a bus input
+        indicates a block, it routes the I2C to that bus and queries each Arduino using
+        CMD_BEAM_BLOCKED. The Arduino's response is interpreted as: 1 = blocked, 0 = clear.
+        adaptive is passed on to query_bus_blocked (race polling; arming checks every module).
         """
         blocked =[] 
-            
-        gpio_to_bus_map= {
-            16:1,
-            19:2,
-            20:3,
-            21:4 }
         
-        for pin, bus in gpio_to_bus_map.items():
-            lane = 1 if bus in (1,2) else 2
-            lane_signal =GPIO.input(pin)
-#             print(f"[DEBUG] GPIO {pin} (Bus {bus}, Lane {lane}) = {lane_signal} ")
+        low_buses = []
+        for bus in self._active_buses():
+            lane_signal =GPIO.input(self.bus_to_gpio[bus])
+#             print(f"[DEBUG] GPIO {pin} (Bus {bus}) = {lane_signal} ")
             
 
             if lane_signal == 0:
 #                 print(f"[DEBUG] Block detected on GPIO pin {pin} checking modules...")
-                
-                
-                modules= self. bus_modules.get(bus, [])
-                if not modules:
+                low_buses.append(bus)
+
+        # Visit the low buses starting with the one already routed
+        for bus in self.router.route_order(low_buses):
+            blocked.extend(self.query_bus_blocked(bus, adaptive))
+        return blocked if blocked else None
+
+    def _active_buses(self):
+        """Buses that have modules; only these are polled, armed and routed to."""
+        return [bus for bus in sorted(getattr(self, 'bus_modules', {})) if bus in self.bus_to_gpio]
+
+    def query_bus_blocked(self, bus, adaptive=False):
+        """Route to one bus and drain each Arduino's latched beam-break events.
+
+        Returns a list of (addr, lane, bus, penalty_seconds, t), one entry per break,
+        t being the time.monotonic() time the module latched it (the read time if
+        the module couldn't say). Break times also go to self.beam_events. Modules on firmware without
+        CMD_READ_EVENTS get the plain beam-blocked query instead.
+
+        With adaptive=False (the arming check) a beam that is blocked with nothing
+        latched counts as a break: the module is misaligned. During a race only
+        latched breaks count; a beam that stays blocked was already reported (its
+        laser is off now).
+
+        With adaptive=True (during a race) modules are asked in order of recent
+        breaks, backed-off modules are skipped, and if the bus line was low the
+        query stops as soon as a break has been found and the line is high again;
+        the modules not asked yet are swept shortly after by _poll_hardware.
+
+        Each module is asked once, without retries, and parked modules (see
+        retry_call) are skipped, so a failing module costs the race loop at most
+        one bus error. Its latched breaks are picked up by a sweep.
+        """
+        blocked = []
+        failed = False
+        lane = self.bus_to_lane.get(bus, 0)
+        modules= self.bus_modules.get(bus, []) if hasattr(self, 'bus_modules') else []
+        if adaptive:
+            modules = self._beam_query_order(modules)
+        if not modules:
+            return blocked
+        
+        self.set_i2c_route(bus)
+        # Only a line that was low can "return high"; after a short break that has
+        # already cleared, the line says nothing and every module is asked
+        pin = self.bus_to_gpio.get(bus)
+        line_was_low = adaptive and GPIO.input(pin) == GPIO.LOW
+            
+        for addr in modules:
+            if line_was_low and blocked and GPIO.input(pin) == GPIO.HIGH:
+                # Line released: the break was found (its laser is off now). Latched
+                # breaks on the rest of the bus are picked up by a sweep.
+                self.beam_query_stats["stopped_early"] += 1
+                self._sweep_due.setdefault(bus, time.monotonic() + self._sweep_delay)
+                break
+            self.beam_query_stats["queries"] += 1
+            penalty_seconds = 3
+            if addr not in self._legacy_beam_modules:
+                try:
+                    events = retry_call(addr, READ_BEAM_EVENTS, addr, attempts=1)
+                except ValueError:
+                    print(f"Module 0x{addr:02X} has no beam event buffer, polling its beam state instead")
+                    self._legacy_beam_modules.add(addr)
+                except ModuleUnavailable:
+                    continue
+                except Exception:
+                    failed = True
+                    continue
+                else:
+                    times = events["events"]
+                    if not adaptive and not times and events["blocked"]:
+                        times = [time.monotonic()]  # blocked right after arming: nothing latched yet
+                    for t in times:
+                        self.beam_events.append((t, addr, lane, bus))
+                        if self._race_open:
+                            self._log_event(racelog.BEAM_BREAK, lane=lane, bus=bus, addr=addr, t_ns=int(t * 1e9))
+                        blocked.append((addr, lane, bus, penalty_seconds, t))
+                    if events["dropped"]:
+                        # Breaks that did not fit in the buffer lost their time; they are
+                        # stamped with the read time and flagged, so the log still has one
+                        # record per penalty
+                        print(f"Module 0x{addr:02X} overflowed its event buffer ({events['dropped']} breaks without a time)")
+                        t = time.monotonic()
+                        for _ in range(events["dropped"]):
+                            self.beam_events.append((t, addr, lane, bus))
+                            if self._race_open:
+                                self._log_event(racelog.BEAM_BREAK, lane=lane, bus=bus, addr=addr,
+                                                t_ns=int(t * 1e9), value=1)
+                            blocked.append((addr, lane, bus, penalty_seconds, t))
+                    if adaptive:
+                        self._note_beam_result(addr, len(times) + events["dropped"], events["blocked"])
                     continue
+            try:
+                is_blocked = retry_call(addr, read_response, addr, CMD_BEAM_BLOCKED, attempts=1)
+            except ModuleUnavailable:
+                continue
+            except Exception:
+                failed = True
+                continue
+
+                # Arduino convention: 1 = blocked, 0 = clear (typical for digitalRead HIGH/LOW)
+            if is_blocked == 1:
+                    # Debug: print which lane/module tripped
+#                 print(f"Beam blocked detected: addr=0x{addr:02X} lane={lane} bus= {bus}")
+                penalty_seconds = 3
                 
-                self.set_i2c_route(bus)
-                time.sleep(0.01)
-                    
-                for addr in modules:
-                    try:
-                        
-                        self.bus.write_byte(addr, 0xFE)  # CMD_BEAM_BLOCKED
-                        time.sleep(0.001)
-                        is_blocked = self.bus.read_byte(addr)
-                    except Exception:
-                        continue
+                blocked.append((addr, lane, bus, penalty_seconds, time.monotonic()))
+            if adaptive:
+                self._note_beam_result(addr, 1 if is_blocked == 1 else 0, is_blocked == 1)
+        else:
+            if adaptive:
+                self._sweep_due.pop(bus, None)  # every module was asked
+        if adaptive and failed:
+            # Ask the module that errored again shortly, off this query's path
+            self._sweep_due.setdefault(bus, time.monotonic() + self._sweep_delay)
+        return blocked
+
+    def _beam_query_order(self, modules):
+        """Modules to ask, most breaks recently first; modules in back-off are left out."""
+        now = time.monotonic()
+        ready = []
+        for addr in modules:
+            if self._beam_backoff.get(addr, (0.0, 0.0))[0] > now:
+                self.beam_query_stats["backed_off"] += 1
+            else:
+                ready.append(addr)
+        # sorted() is stable, so modules without breaks keep their scan order
+        return sorted(ready, key=lambda addr: -self._break_score(addr, now))
+
+    def _break_score(self, addr, now):
+        score, t = self._break_history.get(addr, (0.0, now))
+        return score * 0.5 ** ((now - t) / self._break_half_life)
+
+    def _note_beam_result(self, addr, breaks, still_blocked):
+        """Update break history and back-off for one adaptive query."""
+        now = time.monotonic()
+        if breaks:
+            self._break_history[addr] = (self._break_score(addr, now) + breaks, now)
+        if still_blocked:
+            # The firmware turned this laser off; it can't break again until re-armed
+            _, delay = self._beam_backoff.get(addr, (0.0, 1.0))
+            self._beam_backoff[addr] = (now + delay, min(self._beam_backoff_max, delay * 2))
+        else:
+            self._beam_backoff.pop(addr, None)
 
-                        # Arduino convention: 1 = blocked, 0 = clear (typical for digitalRead HIGH/LOW)
-                    if is_blocked == 1:
-                            # Debug: print which lane/module tripped
-#                         print(f"Beam blocked detected: addr=0x{addr:02X} lane={lane} bus= {bus}")
-                        penalty_seconds = 3
-                        
-                        blocked.append((addr, lane, bus, penalty_seconds))
-        return blocked if blocked else None
+    def _reset_beam_queries(self):
+        """Forget back-offs and pending sweeps (the modules are re-armed for a new race)."""
+        self._beam_backoff = {}
+        self._sweep_due = {}
+        self._next_drain = 0.0
+
+    def _arm_beam_edges(self):
+        """Enable falling-edge callbacks on the beam block pins of buses with modules (edge detection mode)."""
+        if self.beam_detect_mode != 'edge' or self._beam_edges_armed:
+            return
+        for bus in self._active_buses():
+            pin = self.bus_to_gpio[bus]
+            try:
+                GPIO.add_event_detect(pin, GPIO.FALLING, callback=self._on_beam_edge,
+                                      bouncetime=self._beam_bouncetime_ms)
+            except Exception as e:
+                # Fall back to polling rather than race without beam detection
+                print(f"Edge detection failed on GPIO {pin} ({e}), falling back to polling")
+                self._disarm_beam_edges()
+                self.beam_detect_mode = 'poll'
+                return
+        self._beam_edges_armed = True
+
+    def _disarm_beam_edges(self):
+        """Remove the beam block edge callbacks."""
+        for pin in self.bus_to_gpio.values():
+            try:
+                GPIO.remove_event_detect(pin)
+            except Exception:
+                pass
+        self._beam_edges_armed = False
+
+    def _on_beam_edge(self, pin):
+        """GPIO event thread: a beam line went low. Queue a query for that bus only."""
+        edge_time = time.monotonic()
+        bus = next((b for b, p in self.bus_to_gpio.items() if p == pin), None)
+        if bus is None:
+            return
+        race_id = self._race_id
+        # Not coalesced: each edge gets its own query so back-to-back breaks aren't lost
+        self.i2c_worker.submit(self.query_bus_blocked, bus, True, priority=PRIORITY_PENALTY, route=bus,
+                               on_done=lambda blocked: self._apply_blocked_modules(blocked, race_id, edge_time))
 
 
+    def _arm_finish_edges(self):
+        """Record lane finishes from the finish button falling edge (edge detection mode)."""
+        if self.beam_detect_mode != 'edge' or self._finish_edges_armed:
+            return
+        for pin in [lane.finish_pin for lane in self.race_lanes]:
+            try:
+                GPIO.add_event_detect(pin, GPIO.FALLING, callback=self._on_finish_edge,
+                                      bouncetime=self._beam_bouncetime_ms)
+            except Exception as e:
+                # _poll_hardware polls the buttons instead
+                print(f"Edge detection failed on finish GPIO {pin} ({e}), polling the finish buttons")
+                self._disarm_finish_edges()
+                return
+        self._finish_edges_armed = True
+
+    def _disarm_finish_edges(self):
+        """Remove the finish button edge callbacks."""
+        for pin in self.lane_finish_pins.values():
+            try:
+                GPIO.remove_event_detect(pin)
+            except Exception:
+                pass
+        self._finish_edges_armed = False
+
+    def _on_finish_edge(self, pin):
+        """GPIO event thread: stamp the finish at the edge; the next tick shows it."""
+        at_ns = time.monotonic_ns()
+        lane = next((l for l, p in self.lane_finish_pins.items() if p == pin), None)
+        if lane is not None:
+            self.race_clock.finish(lane, at_ns)
+
+    def _start_race_loops(self):
+        """Start the display and hardware schedulers."""
+        self._cancel_race_loops()
+        self._hw_interval = self._poll_interval
+        self._update_timer()
+        self._poll_hardware()
+
+    def _cancel_race_loops(self):
+        """Cancel the display and hardware scheduler callbacks."""
+        for attr in ('_timer_updater', '_hw_poller'):
+            handle = getattr(self, attr, None)
+            if handle:
+                try:
+                    self.after_cancel(handle)
+                except Exception:
+                    pass
+            setattr(self, attr, None)
+
     def _update_timer(self):
-        """Update both lane timers"""
+        """Display scheduler: redraw every racing lane's timer at _display_fps"""
      
-            # Read hardware timer but track increments separately for each lane
-        elapsed = READ_TIMER()
-            # Calculate the time difference since last update
-        time_diff = elapsed - self._last_elapsed
-        self._last_elapsed = elapsed
-            
-            # Add the time difference to each lane's timer separately
-        if not self.lane_finished[1]:
-            self._lane1_timer += time_diff
-        if not self.lane_finished[2]:
-            self._lane2_timer += time_diff
-        
-        # Update display for both lanes
-        self.lane1_timer.config(text=f"{self._lane1_timer:.2f} s")
-        self.lane2_timer.config(text=f"{self._lane2_timer:.2f} s")
-        
-        # Check for button presses
-  
-        for lane, pin in self.lane_finish_pins.items():
-            if not self.lane_finished[lane] and GPIO.input(pin) == GPIO.LOW:
-                self.handle_lane_finish(lane)
+        # Lane times are derived from the race clock, not accumulated per tick
+        times = self.race_clock.lane_times()
+        
+        # A finish recorded by _on_finish_edge or _poll_hardware is shown on the next frame
+        now = time.monotonic()
+        for lane in self.race_lanes:
+            if lane.finished:
+                continue
+            if not lane.flashing(now):  # leave a penalty's "+Ns" up until its flash ends
+                lane.set("timer", text=f"{times[lane.number]:.2f} s")
+            if self.race_clock.finished(lane.number):
+                self.handle_lane_finish(lane.number)
+        # One batched redraw per frame, of the labels whose text actually changed
+        self._request_render()
+    
+        # Schedule next frame
+        self._timer_updater = self.after(
+            int(1000 / self._display_fps),
+            self._update_timer
+        )
+
+    def _poll_hardware(self):
+        """Hardware scheduler: finish/shutdown buttons and (poll mode) the beam check."""
+        # Check for button presses. With edge detection the finish instant was
+        # already recorded by _on_finish_edge; polling records it at this tick.
+        if not self._finish_edges_armed:
+            for lane in self.race_lanes:
+                if not lane.finished and GPIO.input(lane.finish_pin) == GPIO.LOW:
+                    self.race_clock.finish(lane.number)
         
         # check for shutdown button
-        shutdown = False
         if GPIO.input(11) == GPIO.LOW:
-            shutdown = True
-            self.lane_finished = {1: False, 2: False}
-            self.lane_finish_times = {1: 0.0, 2: 0.0}
-            self.winner_determined = False
-            
-            # Stop the game mode for all lanes
-            if TEST_MODE:
-                STOP_GAME_MODE()
-            else:
-                # Handle each lane
-                for lane in range(1, 5):  # Currently using lanes 1 and 2
-                    self.set_i2c_route(lane)
-                    time.sleep(0.001)
-                    STOP_GAME_MODE()
-            
-                # Cancel any timer updates
-                if getattr(self, '_timer_updater', None):
-                    self.timer_window.after_cancel(self._timer_updater)
-                if getattr(self, '_penalty_flash_id', None):
-                    self.timer_window.after_cancel(self._penalty_flash_id)
-                    
-                # Update UI if timer window exists
-                if hasattr(self, 'lane1_timer') and hasattr(self, 'lane2_timer'):
-                    self.lane1_timer.config(text="Stopped", font=('Arial',180,'bold'),
-                                            fg='white', bg='black')
-                    self.lane2_timer.config(text="Stopped", font=('Arial',180,'bold'),
-                                            fg='white', bg='black')
-                self.timer_window.config(bg='black')
+            self._log_stop(racelog.STOP_SHUTDOWN)
+            self._reset_lane_results()
+            self._race_id += 1  # beam queries still queued must not add penalties after "Stopped"
+            
+            # Stop the game mode for all lanes (on the I2C worker)
+            self._disarm_beam_edges()
+            self._disarm_finish_edges()
+            self.i2c_worker.submit(self._stop_all_lanes, tag='stop_all', priority=PRIORITY_SAFETY)
+            # Cancel both schedulers and any penalty flash
+            self._cancel_race_loops()
+            if getattr(self, '_penalty_flash_id', None):
+                self.timer_window.after_cancel(self._penalty_flash_id)
+                
+            # Update UI if timer window exists
+            self._show_stopped()
+            return
         
         # Check for blocked beams
             # In real mode, we need to check the GPIO pin and then query each Arduino
-            # to find out which one was blocked, then apply penalty to the correct lane
-        blocked_modules = self.check_and_get_blocked_beam()
-        if blocked_modules:
-            for addr,lane,bus, penalty_seconds  in blocked_modules:
-                print(f"address: {addr}, pen: {penalty_seconds}")
-                print(f"lane assignments: {lane}")
-                self._show_penalty(penalty_seconds, lane)
+            # to find out which one was blocked, then apply penalty to the correct lane.
+            # The bus work runs on the I2C worker; a check still in flight is not re-queued.
+        now = time.monotonic()
+        if self.beam_detect_mode == 'poll' and now >= self._next_drain:
+            # Drain every bus, low line or not, so short breaks don't wait for the next low
+            self._next_drain = now + self._drain_interval
+            for bus in self._active_buses():
+                self._sweep_due.setdefault(bus, now)
+
+        # Sweep the modules an early-stopped query didn't reach (and the poll-mode drains)
+        for bus, due in list(self._sweep_due.items()):
+            if now >= due:
+                self._sweep_due.pop(bus, None)
+                race_id = self._race_id
+                self.i2c_worker.submit(self.query_bus_blocked, bus, True, tag=f'sweep_{bus}',
+                                       priority=PRIORITY_PENALTY, route=bus,
+                                       on_done=lambda blocked, race_id=race_id: self._apply_blocked_modules(blocked, race_id))
+
+        # Probe parked (failing) modules in the background, never from the race path
+        if parked_modules(due=True):
+            self.i2c_worker.submit(self._recheck_parked_modules, tag='breaker_recheck',
+                                   priority=PRIORITY_BACKGROUND, on_done=self._sweep_recovered_modules)
+
+        if self.beam_detect_mode == 'poll':
+            race_id = self._race_id
+            queued = self.i2c_worker.submit(self.check_and_get_blocked_beam, True, tag='beam_check',
+                                            priority=PRIORITY_PENALTY,
+                                            on_done=lambda blocked: self._apply_blocked_modules(blocked, race_id))
+            if not queued:
+                # The bus can't keep up: back off
+                self._hw_interval = min(self._poll_interval_max, self._hw_interval * 2)
+            elif self._hw_interval < self._poll_interval:
+                # Quiet again after a break: ease back to the normal rate
+                self._hw_interval = min(self._poll_interval, self._hw_interval * 1.5)
+            else:
+                self._hw_interval = max(self._poll_interval, self._hw_interval / 2)
     
-        # Schedule next update
-        if not shutdown:
-            self._timer_updater = self.after(
-                int(self._poll_interval * 1000),
-                self._update_timer
-            )
-
-    def _show_penalty(self, sec, lane):
-        """Show penalty for specific lane"""
-        # Do not apply penalty flash to a lane that has already finished
-        if self.lane_finished.get(lane, False):
+        # Schedule next poll
+        self._hw_poller = self.after(
+            int(self._hw_interval * 1000),
+            self._poll_hardware
+        )
+
+    def _apply_blocked_modules(self, blocked_modules, race_id, edge_time=None):
+        """Apply penalties from a finished beam check (runs on the Tk thread)."""
+        if race_id != self._race_id or not blocked_modules:
+            return  # result from a race that has since been stopped/reset
+        if edge_time is None:
+            # Polling found a break: poll fast for a while to catch the next one sooner
+            self._hw_interval = self._poll_interval_min
+        for addr,lane,bus, penalty_seconds, t  in blocked_modules:
+            print(f"address: {addr}, pen: {penalty_seconds}")
+            print(f"lane assignments: {lane}")
+            self._show_penalty(penalty_seconds, lane, addr, bus, t)
+        if edge_time is not None:
+            self.penalty_latencies.append(time.monotonic() - edge_time)
+
+    def _recheck_parked_modules(self):
+        """Probe the parked modules that are due, bus by bus. Runs on the I2C worker.
+
+        Returns {bus: [recovered addr, ...]}.
+        """
+        due = set(parked_modules(due=True))
+        modules_by_bus = {bus: [a for a in addrs if a in due] for bus, addrs in self._modules_by_bus().items()}
+        modules_by_bus = {bus: addrs for bus, addrs in modules_by_bus.items() if addrs}
+        recovered = {}
+        for bus in self.router.route_order(modules_by_bus):
+            self.set_i2c_route(bus)
+            found = RECHECK_PARKED_MODULES(modules_by_bus[bus])
+            if found:
+                recovered[bus] = found
+        return recovered
+
+    def _sweep_recovered_modules(self, recovered):
+        """Drain what recovered modules latched while parked, through the normal penalty path."""
+        if not recovered or not self.race_clock.running:
+            return
+        for bus in recovered:
+            self._sweep_due[bus] = time.monotonic()
+
+    def _stop_all_lanes(self):
+        """Turn every lane off. Runs on the I2C worker."""
+        modules_by_bus = self._modules_by_bus()
+        if modules_by_bus:
+            # One general call per bus, starting with the one already routed
+            self.router.for_each_route(modules_by_bus,
+                                       lambda bus, modules: BROADCAST_ALL(modules, CMD_TURN_OFF))
             return
+        # Nothing scanned yet: find the modules on each bus the slow way
+        for bus in self.router.route_order(range(1, 5)):
+            self.set_i2c_route(bus)
+            STOP_GAME_MODE()
 
-        # Add penalty time and prepare UI refs
-        if lane == 1:
-            self._lane1_timer += sec
-            timer_label = self.lane1_timer
-            frame = self.left_frame
-            header = self.lane1_header
-            current_text = f"{self._lane1_timer:.2f} s"
-        else:
-            self._lane2_timer += sec
-            timer_label = self.lane2_timer
-            frame = self.right_frame
-            header = self.lane2_header
-            current_text = f"{self._lane2_timer:.2f} s"
+    def _show_penalty(self, sec, lane, addr=0, bus=0, at=None):
+        """Show penalty for specific lane (addr/bus of the module that tripped, for the race log)
+
+        at is the time.monotonic() time of the break. A break latched before the
+        lane finished counts even if it is read after the finish, one latched
+        during the countdown doesn't; without at the penalty only counts while
+        the lane is running.
+        """
+        lane_state = self.lanes.get(lane)
+        if lane_state is None or not lane_state.has_display():
+            return
+
+        # Add penalty time (decided by when the break happened, not when it was read)
+        at_ns = None if at is None else self.race_clock.instant_ns(at)
+        if not self.race_clock.add_penalty(lane, sec, at_ns):
+            return
+        self._log_event(racelog.PENALTY, lane=lane, bus=bus, addr=addr, value=int(sec * 1000))
+
+        if lane_state.finished:
+            # The finish is already shown: correct its time instead of flashing
+            self._correct_finish(lane_state)
+            if self.audio_available:
+                self.audio.play("laser")
+            return
 
         # Save original header text/fg to restore later
-        orig_header_text = header.cget('text')
-        orig_header_fg = header.cget('fg')
+        orig_header_text = lane_state.get("header", "text")
+        orig_header_fg = lane_state.get("header", "fg")
 
-        # Flash entire side red with temporary "+Ns" text
-        frame.config(bg='red')
-        timer_label.config(bg='red', text=f"+{sec}s")
-        header.config(bg='red')
+        # Flash entire side red with temporary "+Ns" text (_update_timer leaves it until flash_until)
+        lane_state.flash_until = time.monotonic() + self._penalty_flash_time
+        lane_state.paint('red', text=f"+{sec}s")
+        self._request_render()
 
         # Play sound effect
-        if self.audio_available and self.laser_sound:
-            try:
-                self.laser_sound.play()
-            except Exception as e:
-                print(f"Could not play laser sound: {e}")
+        if self.audio_available:
+            self.audio.play("laser")
 
         # Reset display after flash - restore correct timer text and header
         def reset_display():
-            # If lane finished during timeout, preserve finished display; otherwise restore timer and header
-            frame.config(bg='black')
-            timer_label.config(bg='black', text=current_text)
-            header.config(bg='black', fg=orig_header_fg, text=orig_header_text)
+            # A later penalty's flash is still showing, or the lane has finished meanwhile
+            if lane_state.flashing() or lane_state.finished:
+                return
+            lane_state.paint('black', text=f"{self.race_clock.lane_time(lane):.2f} s")
+            lane_state.set("header", fg=orig_header_fg, text=orig_header_text)
+            self._request_render()
 
-        self.after(500, reset_display)
+        self.after(int(self._penalty_flash_time * 1000), reset_display)
 
     def handle_lane_finish(self, lane):
         """Handle a lane finish button press"""
-        if self.lane_finished[lane]:
+        lane_state = self.lanes[lane]
+        if lane_state.finished:
             return  # Already finished
             
-        # Record finish time
-        finish_time = self._lane1_timer if lane == 1 else self._lane2_timer
-        self.lane_finish_times[lane] = finish_time
-        self.lane_finished[lane] = True
+        # Record finish time (a no-op if the button edge already recorded it)
+        self.race_clock.finish(lane)
+        finish_time = self.race_clock.lane_time(lane)
+        self._log_event(racelog.FINISH, lane=lane, value=int(round(finish_time * 1000)),
+                        t_ns=self.race_clock.finish_ns[lane])
+        lane_state.finish_time = finish_time
+        lane_state.finished = True
         
         
-        #Turn off lasers for this lane
-        bus_groups = self.bus_groups_by_lane[lane]  #group modules by appropriate bus
-        for bus, modules in bus_groups.items():
-            self.set_i2c_route(bus) #Switch bus
-            time.sleep(0.05)
-            TURN_ALL_OFF(modules) # Send turn all off through the bus
-
-        # Update display for the finished lane
-        frame = self.left_frame if lane == 1 else self.right_frame
-        timer_label = self.lane1_timer if lane == 1 else self.lane2_timer
-        header = self.lane1_header if lane == 1 else self.lane2_header
-        
-        # Change to orange finish display
-        frame.config(bg='orange')
-        timer_label.config(bg='orange', text=f"{finish_time:.2f} s", font=('Arial', 200, 'bold'))
-        header.config(bg='orange', text=f"LANE {lane} FINISHED", fg='black', font=('Arial', 140, 'bold'))
-        
-        # Check if both lanes are finished to determine winner
-        if all(self.lane_finished.values()) and not self.winner_determined:
+        #Turn off lasers for this lane (on the I2C worker)
+        self.i2c_worker.submit(self._turn_lane_off, lane, priority=PRIORITY_SAFETY)
+
+        # Change the finished lane to the orange finish display
+        self._show_finished(lane_state)
+        
+        # Check if every racing lane is finished to determine winner
+        if all(l.finished for l in self.race_lanes) and not self.winner_determined:
             self.determine_winner()
 
+    def _show_finished(self, lane_state):
+        """Orange finish display with the lane's final time."""
+        lane_state.paint('orange', text=f"{lane_state.finish_time:.2f} s", font=self._lane_font(200))
+        lane_state.set("header", text=f"{lane_state.title} FINISHED", fg='black', font=self._lane_font(140))
+        self._request_render()
+
+    def _correct_finish(self, lane_state):
+        """Re-time a finished lane after a penalty for a break latched before its finish."""
+        lane = lane_state.number
+        lane_state.finish_time = self.race_clock.lane_time(lane)
+        # A second FINISH record: the last one for a lane is its result
+        self._log_event(racelog.FINISH, lane=lane, value=int(round(lane_state.finish_time * 1000)),
+                        t_ns=self.race_clock.finish_ns[lane])
+        if not self.winner_determined:
+            self._show_finished(lane_state)
+            return
+        # The standings may have changed: back to the finish displays, then pick the winner again
+        if self._margin_label is not None:
+            self._margin_label.destroy()
+            self._margin_label = None
+        for l in self.race_lanes:
+            self._show_finished(l)
+        self.determine_winner()
+
+    def _turn_lane_off(self, lane):
+        """Turn off every module in a lane. Runs on the I2C worker."""
+        bus_groups = self.bus_groups_by_lane[lane]  #group modules by appropriate bus
+        for bus in self.router.route_order(bus_groups):
+            self.set_i2c_route(bus) #Switch bus (skipped if already routed)
+            BROADCAST_ALL(bus_groups[bus], CMD_TURN_OFF) # One general call turns the whole bus off
+
     def determine_winner(self):
         """Determine the winner between lanes and update display"""
         self.winner_determined = True
+        if self.race_log:
+            self.race_log.flush()
         
-        # Determine which lane has the lower time
-        if self.lane_finish_times[1] < self.lane_finish_times[2]:
-            winner_lane = 1
-        else:
-            winner_lane = 2
-            
-        # Get the corresponding UI elements
-        winner_frame = self.left_frame if winner_lane == 1 else self.right_frame
-        winner_timer = self.lane1_timer if winner_lane == 1 else self.lane2_timer
-        winner_header = self.lane1_header if winner_lane == 1 else self.lane2_header
+        # Lowest time wins (ties go to the lower lane number)
+        standings = sorted(self.race_lanes, key=lambda l: (l.finish_time, l.number))
+        if not standings:
+            return
+        winner = standings[0]
         
-        # Calculate time difference for display
-        time_diff = abs(self.lane_finish_times[1] - self.lane_finish_times[2])
+        # Win margin over the runner-up
+        time_diff = standings[1].finish_time - winner.finish_time if len(standings) > 1 else 0.0
         
         # Change winner's display
-        winner_frame.config(bg='gold')
-        winner_timer.config(bg='gold')
-        winner_header.config(bg='gold', text=f"LANE {winner_lane} WINS!", fg='black', font=('Arial', 120, 'bold'))
+        winner_frame = winner.frame
+        winner.paint('gold')
+        winner.set("header", text=f"{winner.title} WINS!", fg='black', font=self._lane_font(120))
+        self._request_render()
         
         if self.audio_available:
-            try:
-                pygame.mixer.music.load("Winner.mp3")
-                print("Winner Audio")
-                pygame.mixer.music.play()
-            except Exception as e:
-                print("Could not play winner.mp3:", e)
+            self.audio.play("winner")
         
         # Add win margin display under the timer
         margin_label = tk.Label(winner_frame, 
                        text=f"Win margin: {time_diff:.2f}s",
-                       font=('Arial', 140, 'bold'), # Old size 24pt 
+                       font=self._lane_font(140), # Old size 24pt 
                        fg='black', bg='gold')
         margin_label.pack(pady=10)
         
         # Add the label to our list of dynamic UI elements
         self.dynamic_ui_elements.append(margin_label)
+        self._margin_label = margin_label
         
 
 
     def stop_game(self):
         # Reset finish status when stopping the game
-        self.lane_finished = {1: False, 2: False}
-        self.lane_finish_times = {1: 0.0, 2: 0.0}
-        self.winner_determined = False
-        
-        # Stop the game mode for all lanes
-        if TEST_MODE:
-            STOP_GAME_MODE()
-        else:
-            # Handle each lane
-            for lane in range(1, 5):  # Currently using lanes 1 and 2
-                self.set_i2c_route(lane)
-                time.sleep(0.001)
-                STOP_GAME_MODE()
-        
-        # Cancel any timer updates
-        if getattr(self, '_timer_updater', None):
-            self.timer_window.after_cancel(self._timer_updater)
+        self._reset_lane_results()
+        self._race_id += 1
+        self._log_stop(racelog.STOP_BUTTON)
+        self._disarm_beam_edges()
+        self._disarm_finish_edges()
+        
+        # Stop the game mode for all lanes (on the I2C worker)
+        self.i2c_worker.submit(self._stop_all_lanes, tag='stop_all', priority=PRIORITY_SAFETY)
+        self.print_bus_stats()
+        
+        # Cancel the display and hardware schedulers
+        self._cancel_race_loops()
         if getattr(self, '_penalty_flash_id', None):
             self.timer_window.after_cancel(self._penalty_flash_id)
             
         # Update UI if timer window exists
-        if hasattr(self, 'lane1_timer') and hasattr(self, 'lane2_timer'):
-            self.lane1_timer.config(text="Stopped", font=('Arial',180,'bold'),
-                                    fg='white', bg='black')
-            self.lane2_timer.config(text="Stopped", font=('Arial',180,'bold'),
-                                    fg='white', bg='black')
-        self.timer_window.config(bg='black')
+        self._show_stopped()
+
+    def _show_stopped(self):
+        """Show "Stopped" on every lane timer."""
+        for lane in self.race_lanes:
+            lane.set("timer", text="Stopped", font=self._lane_font(180), fg='white', bg='black')
+        self._request_render()
+        if self.timer_window and tk.Toplevel.winfo_exists(self.timer_window):
+            self.timer_window.config(bg='black')
 
     # ---------- Power Calibration Mode ----------
     def _build_power_calibration_mode(self):
@@ -1429,6 +2085,8 @@ class LaserMazeUI(tk.Tk):
                   command=self.scan_calib_modules).grid(row=0,column=0,padx=5,pady=(10,5))
         tk.Button(top, text="Turn All Off",   width=20,
                   command=self.turn_calib_all_off).grid(row=0,column=1,padx=5,pady=(10,5))
+        tk.Button(top, text="Quick Scan",     width=20,
+                  command=lambda: self.scan_calib_modules(fast=True)).grid(row=0,column=2,padx=5,pady=(10,5))
         top.pack()
 
         # Read All
@@ -1464,8 +2122,13 @@ class LaserMazeUI(tk.Tk):
         tk.Button(self.calib_frame, text="Back", width=20,
                   command=self.show_main_menu).pack(pady=(0,10))
 
-    def scan_calib_modules(self):
-        """Scan all RJ45, route per-bus, collect unique addresses and populate calibration grid grouped by bus."""
+    def scan_calib_modules(self, fast=False):
+        """Scan all RJ45 in the background, then populate the calibration grid grouped by bus."""
+        self._run_scan(fast, self._apply_calib_scan)
+
+    def _apply_calib_scan(self, found, announce=True):
+        """Collect unique addresses from a scan result and build the calibration grid."""
+        self._ensure_screen("calib")
         for w in self.calib_container.winfo_children():
             w.destroy()
         self.calib_frames.clear()
@@ -1477,11 +2140,8 @@ class LaserMazeUI(tk.Tk):
         all_addresses = []
         bus_modules = {}
 
-            # Real mode: scan lanes J1 and J2 only (route per-lane)
-        for bus in (1, 2, 3, 4):
-            self.set_i2c_route(bus)
-            time.sleep(0.01)
-            bus_addrs = SCAN_I2C_BUS() or []
+        for bus in sorted(found):
+            bus_addrs = found[bus] or []
             for addr in bus_addrs:
                     
                     if addr not in all_addresses:
@@ -1492,7 +2152,8 @@ class LaserMazeUI(tk.Tk):
         self.scanned_addresses = all_addresses
 
         if not self.scanned_addresses:
-            messagebox.showinfo("Scan Result", "No I²C devices found.")
+            if announce:
+                messagebox.showinfo("Scan Result", "No I²C devices found.")
             return
 
       
@@ -1550,7 +2211,8 @@ class LaserMazeUI(tk.Tk):
             row += (len(module_addrs) + 5) // 6 or 1
 
         bus_summary = ", ".join([f"Bus {bus}: {len(mods)} modules" for bus, mods in bus_modules.items()])
-        messagebox.showinfo("Scan Complete", f"Found {len(self.scanned_addresses)} modules\n{bus_summary}")
+        if announce:
+            messagebox.showinfo("Scan Complete", f"Found {len(self.scanned_addresses)} modules\n{bus_summary}")
 
     def select_calib_module(self, addr, bus=None):
         self.selected_calib_addr = addr
@@ -1580,13 +2242,10 @@ class LaserMazeUI(tk.Tk):
             return
         # Route I2C to the correct lane for this module
         if addr in self.lane_assignments:
-            self.set_i2c_route(self.lane_assignments[addr])
+            self.set_i2c_route(self._bus_of(addr))
         try:
-#             self.bus.write_byte(addr, CMD_GAME_THRESHOLD_READ)
-#             test= self.bus.read_byte(addr)
-            self.bus.write_i2c_block_data(addr, CMD_GAME_THRESHOLD_READ, [])
-            time.sleep(0.005)
-            threshold= self.bus.read_byte(addr)
+            # Answered from the module cache; only the first read touches the bus
+            threshold= READ_GAME_THRESHOLD(addr)
             
             voltage = (threshold /255.0)*2.5
             print(voltage)
@@ -1619,7 +2278,7 @@ class LaserMazeUI(tk.Tk):
         
         # Route I2C to the correct lane for this module
         if addr in self.lane_assignments:
-            self.set_i2c_route(self.lane_assignments[addr])
+            self.set_i2c_route(self._bus_of(addr))
         try:
             val_float= float(val)
             voltage= int((val_float/2.5)*255)
@@ -1640,13 +2299,10 @@ class LaserMazeUI(tk.Tk):
             return
         # Route I2C to the correct lane for this module
         if addr in self.lane_assignments:
-            self.set_i2c_route(self.lane_assignments[addr])
+            self.set_i2c_route(self._bus_of(addr))
         try:
-#             self.bus.write_byte(addr, CMD_GAME_THRESHOLD_READ)
-#             test= self.bus.read_byte(addr)
-            self.bus.write_i2c_block_data(addr, CMD_READ_CURRENT, [])
-            time.sleep(0.005)
-            current= self.bus.read_byte(addr)
+            # Answered from the module cache; only the first read touches the bus
+            current= READ_LASER_CURRENT(addr)
             
             
             _, top, bottom, lbl_addr,  lbl_threshold = self.calib_frames[addr]
@@ -1677,7 +2333,7 @@ class LaserMazeUI(tk.Tk):
         
         # Route I2C to the correct lane for this module
         if addr in self.lane_assignments:
-            self.set_i2c_route(self.lane_assignments[addr])
+            self.set_i2c_route(self._bus_of(addr))
             
         SET_LASER_CURRENT(addr, val)
         _, top, bottom, lbl_addr, lbl_current = self.calib_frames[addr]
@@ -1690,23 +2346,18 @@ class LaserMazeUI(tk.Tk):
         if not addrs:
             messagebox.showwarning("No Devices", "Scan first."); return
             
-        if TEST_MODE:
-            TURN_ALL_OFF(addrs)
-        else:
-            # Group modules by lane
-            lane_modules = {}
-            for addr in addrs:
-                lane = self.lane_assignments.get(addr, 1)  # Default to lane 1 if not assigned
-                if lane not in lane_modules:
-                    lane_modules[lane] = []
-                lane_modules[lane].append(addr)
-            
-            # Process each lane
-            for lane, modules in lane_modules.items():
-                self.set_i2c_route(lane)
-                TURN_ALL_OFF(modules)
+        # Group modules by bus
+        bus_modules = {}
+        for addr in addrs:
+            bus = self._bus_of(addr) or 1  # Default to bus 1 if not assigned
+            bus_modules.setdefault(bus, []).append(addr)
+        
+        # Process each bus, starting with the one already routed
+        for bus in self.router.route_order(bus_modules):
+            self.set_i2c_route(bus)
+            BROADCAST_ALL(bus_modules[bus], CMD_TURN_OFF)
                 
-        for addr, (outer, top, bottom, lbl_addr, lbl_color, lbl_current) in self.calib_frames.items():
+        for addr, (outer, top, bottom, lbl_addr, lbl_threshold) in self.calib_frames.items():
             top.config(bg='red')
             lbl_addr.config(bg='red')
             self.calib_on[addr] = False
@@ -1717,9 +2368,9 @@ class LaserMazeUI(tk.Tk):
         if addr is None:
             messagebox.showwarning("Select Module", "Click a module first."); return
             
-        # Route I2C to the correct lane for this module
-        if not TEST_MODE and addr in self.lane_assignments:
-            self.set_i2c_route(self.lane_assignments[addr])
+        # Route I2C to the correct bus for this module
+        if self._bus_of(addr) is not None:
+            self.set_i2c_route(self._bus_of(addr))
             
         TURN_ONLY_ONE_ON(addr)
         _, top, bottom, lbl_addr, lbl_current = self.calib_frames[addr]
@@ -1732,31 +2383,21 @@ class LaserMazeUI(tk.Tk):
         if addr is None:
             messagebox.showwarning("Select Module", "Click a module first."); return
             
-        # Route I2C to the correct lane for this module
-        if not TEST_MODE and addr in self.lane_assignments:
-            self.set_i2c_route(self.lane_assignments[addr])
+        # Route I2C to the correct bus for this module
+        if self._bus_of(addr) is not None:
+            self.set_i2c_route(self._bus_of(addr))
             
         TURN_ONLY_ONE_OFF(addr)
-        _, top, bottom, lbl_addr, lbl_color, lbl_current = self.calib_frames[addr]
+        _, top, bottom, lbl_addr, lbl_threshold = self.calib_frames[addr]
         top.config(bg='red'); lbl_addr.config(bg='red')
         self.calib_on[addr] = False
         messagebox.showinfo("Action", f"Laser at Module {self._format_module_address(addr)} turned off.")
 
     def _reset_for_new_game(self):
         """Fully reset timers, UI and scheduled tasks so a fresh game can start."""
+        self._log_stop(racelog.STOP_RESET)
         # Cancel scheduled callbacks safely
-        try:
-            if getattr(self, '_timer_updater', None):
-                try:
-                    self.after_cancel(self._timer_updater)
-                except Exception:
-                    try:
-                        self.timer_window.after_cancel(self._timer_updater)
-                    except Exception:
-                        pass
-                self._timer_updater = None
-        except Exception:
-            pass
+        self._cancel_race_loops()
 
         try:
             if getattr(self, '_penalty_flash_id', None):
@@ -1781,65 +2422,40 @@ class LaserMazeUI(tk.Tk):
         self.dynamic_ui_elements = []
 
         # Reset lane headers and timer labels if they exist
-        if hasattr(self, 'lane1_header') and getattr(self.lane1_header, 'winfo_exists', lambda: False)():
-            self.lane1_header.config(text="LANE 1", fg='white', bg='black')
-        if hasattr(self, 'lane2_header') and getattr(self.lane2_header, 'winfo_exists', lambda: False)():
-            self.lane2_header.config(text="LANE 2", fg='white', bg='black')
-
-        if hasattr(self, 'left_frame') and getattr(self.left_frame, 'winfo_exists', lambda: False)():
-            self.left_frame.config(bg='black')
-        if hasattr(self, 'right_frame') and getattr(self.right_frame, 'winfo_exists', lambda: False)():
-            self.right_frame.config(bg='black')
-
-        if hasattr(self, 'lane1_timer') and getattr(self.lane1_timer, 'winfo_exists', lambda: False)():
-            self.lane1_timer.config(text="0.00", bg='black', fg='white', font=('Arial', 200, 'bold'))
-        if hasattr(self, 'lane2_timer') and getattr(self.lane2_timer, 'winfo_exists', lambda: False)():
-            self.lane2_timer.config(text="0.00", bg='black', fg='white', font=('Arial', 200, 'bold'))
+        for lane in self.race_lanes:
+            lane.paint('black', text="0.00", fg='white', font=self._lane_font(200))
+            lane.set("header", text=lane.title, fg='white', font=self._lane_font(48))
+        self._request_render()
 
         # Reset internal timers and flags
-        self._last_elapsed = 0.0
-        self._lane1_timer = 0.0
-        self._lane2_timer = 0.0
-        self.lane_finished = {1: False, 2: False}
-        self.lane_finish_times = {1: 0.0, 2: 0.0}
-        self.winner_determined = False
-
-        # Ensure all lasers are off before starting (route per-lane then call TURN_ALL_OFF)
+        self._race_id += 1
+        self._reset_beam_queries()
+        self._disarm_beam_edges()
+        self._disarm_finish_edges()
+        self.race_clock.reset()
+        self._reset_lane_results()
+
+        # Ensure all lasers are off before starting (route per-bus then broadcast TURN_OFF)
+        # Hold the worker lock so this can't interleave with a job still in flight
         try:
-            if self.scanned_addresses:
-                # Group modules by lane
-                lane_modules = {}
-                for addr in self.scanned_addresses:
-                    lane = self.lane_assignments.get(addr, 1)
-                    lane_modules.setdefault(lane, []).append(addr)
-                for lane, modules in lane_modules.items():
-                    if not TEST_MODE:
-                        self.set_i2c_route(lane)
-                        time.sleep(0.02)
-                    try:
-                        TURN_ALL_OFF(modules)
-                    except Exception:
-                        # best-effort: ignore hardware errors while resetting
-                        pass
+            with self.i2c_worker.lock:
+                if self.scanned_addresses:
+                    # Group modules by bus, visiting the routed bus first
+                    modules_by_bus = self._modules_by_bus()
+                    for bus in self.router.route_order(modules_by_bus):
+                        self.set_i2c_route(bus)
+                        try:
+                            BROADCAST_ALL(modules_by_bus[bus], CMD_TURN_OFF)
+                        except Exception:
+                            # best-effort: ignore hardware errors while resetting
+                            pass
         except Exception:
             pass
 
     def _cleanup_game_ui(self):
         """Remove dynamic UI elements and restore timer/header frames to default state."""
         # Cancel scheduled callbacks safely
-        try:
-            if getattr(self, '_timer_updater', None):
-                try:
-                    self.after_cancel(self._timer_updater)
-                except Exception:
-                    try:
-                        if getattr(self, 'timer_window', None):
-                            self.timer_window.after_cancel(self._timer_updater)
-                    except Exception:
-                        pass
-                self._timer_updater = None
-        except Exception:
-            pass
+        self._cancel_race_loops()
 
         try:
             if getattr(self, '_penalty_flash_id', None):
@@ -1864,78 +2480,73 @@ class LaserMazeUI(tk.Tk):
                 pass
         self.dynamic_ui_elements = []
 
-        # Restore headers and frames if they exist
-        try:
-            if hasattr(self, 'lane1_header') and getattr(self.lane1_header, 'winfo_exists', lambda: False)():
-                self.lane1_header.config(text="LANE 1", fg='white', bg='black')
-            if hasattr(self, 'lane2_header') and getattr(self.lane2_header, 'winfo_exists', lambda: False)():
-                self.lane2_header.config(text="LANE 2", fg='white', bg='black')
-        except Exception:
-            pass
-
-        try:
-            if hasattr(self, 'left_frame') and getattr(self.left_frame, 'winfo_exists', lambda: False)():
-                self.left_frame.config(bg='black')
-            if hasattr(self, 'right_frame') and getattr(self.right_frame, 'winfo_exists', lambda: False)():
-                self.right_frame.config(bg='black')
-        except Exception:
-            pass
-
-        # Restore timer labels appearance but do not change the stored timer values here
-        try:
-            if hasattr(self, 'lane1_timer') and getattr(self.lane1_timer, 'winfo_exists', lambda: False)():
-                self.lane1_timer.config(bg='black', fg='white', font=('Arial', 120, 'bold'))
-            if hasattr(self, 'lane2_timer') and getattr(self.lane2_timer, 'winfo_exists', lambda: False)():
-                self.lane2_timer.config(bg='black', fg='white', font=('Arial', 120, 'bold'))
-        except Exception:
-            pass
+        # Restore headers, frames and timer label appearance if they exist,
+        # but do not change the stored timer values here
+        for lane in self.race_lanes:
+            lane.paint('black', fg='white', font=self._lane_font(120))
+            lane.set("header", text=lane.title, fg='white', font=self._lane_font(48))
+        self._request_render()
 
         # Ensure winner flag is cleared so new games can start cleanly
         self.winner_determined = False
 
     # ---------- Frame navigation ----------
     def show_main_menu(self):
-        for f in (self.setup_frame, self.game_frame, self.calib_frame):
-            f.pack_forget()
+        self._hide_screens(self.setup_frame, self.game_frame, self.calib_frame)
         self.main_menu.pack(expand=True)
 
     def show_setup_mode(self):
-        self.main_menu.pack_forget()
-        for f in (self.game_frame, self.calib_frame):
-            f.pack_forget()
+        self._ensure_screen("setup")
+        self._hide_screens(self.main_menu, self.game_frame, self.calib_frame)
         self.setup_frame.pack(expand=True, fill='both')
 
     def show_game_mode(self):
-        self.main_menu.pack_forget()
-        for f in (self.setup_frame, self.calib_frame):
-            f.pack_forget()
+        self._ensure_screen("game")
+        self._hide_screens(self.main_menu, self.setup_frame, self.calib_frame)
         self.game_frame.pack(expand=True, fill='both')
 
     def show_power_calibration_mode(self):
-        self.main_menu.pack_forget()
-        for f in (self.setup_frame, self.game_frame):
-            f.pack_forget()
+        self._ensure_screen("calib")
+        self._hide_screens(self.main_menu, self.setup_frame, self.game_frame)
         self.calib_frame.pack(expand=True, fill='both')
 
     def exit_app(self):
         """Clean up GPIO and close the app."""
-        try:
+        # Nothing may use the bus behind the final lasers-off: stop the telemetry
+        # sampler and drop late race results
+        if self.pd_telemetry:
+            self.pd_telemetry.stop()
+        self._race_id += 1
+        self._disarm_beam_edges()
+        self._disarm_finish_edges()
+
+        def all_lasers_off():
             if self.scanned_addresses:
-                bus_map = getattr(self, "bus_groups_by_lane", None)
-                for lane, bus_groups in self.bus_groups_by_lane.items():
-                    for bus, modules in bus_groups.items():
-                        self.set_i2c_route(bus)
-                        time.sleep(0.05)
-                        TURN_ALL_OFF(modules)
-                GPIO.cleanup()
-                self.destroy()
-                print("All lasers off. Goodbye!")# close the Tk window
+                self.router.for_each_route(self._modules_by_bus(),
+                                           lambda bus, modules: BROADCAST_ALL(modules, CMD_TURN_OFF))
+
+        try:
+            # Queued last (background priority), so every job already queued runs
+            # before it; the worker is only stopped once the lasers are off, so a
+            # failed exit leaves a working app to try again from
+            if self.i2c_worker.is_alive():
+                self.i2c_worker.call(all_lasers_off, priority=PRIORITY_BACKGROUND)
             else:
-                GPIO.cleanup()
-                self.destroy()
+                all_lasers_off()
         except Exception as e:
-            print(f"Exit error {addr:02X}:{e}")
+            print(f"Exit error: {e}")
             print("Try exit again. If fails again turn off all lasers from setup and close window")
+            return
+        self.i2c_worker.stop(wait=True)
+        self._log_stop(racelog.STOP_EXIT)
+        if self.race_log:
+            self.race_log.close()
+        if self.profiler:
+            profiling.dump(self.profiler)
+        GPIO.cleanup()
+        self.destroy()  # close the Tk window
+        if self.scanned_addresses:
+            print("All lasers off. Goodbye!")
         
             
             
@@ -0,0 +1,116 @@
+"""Pre-decoded audio cues on reserved mixer channels.
+
+Every cue (countdown, penalty buzz, winner) is decoded into a
+pygame.mixer.Sound once, on a background thread, so playing one from the
+Tk thread is only a channel start: nothing is read from the SD card or
+decoded at the countdown or the win screen. Each cue has its own reserved
+channel, so a penalty buzz never cuts the countdown off (and pygame's
+automatic channel picking never takes a cue's channel).
+
+    cues = AudioCues()
+    threading.Thread(target=cues.load, daemon=True).start()
+    ...
+    cues.play("countdown")   # False (silently) until loaded
+"""
+import os
+import threading
+import time
+
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', "hide")
+
+SOUND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Cue name -> sound file (in SOUND_DIR)
+CUES = {
+    "countdown": "countdown.mp3",
+    "laser": "laser.mp3",
+    "winner": "Winner.mp3",
+}
+
+# Mixer settings: a small buffer keeps the output latency around 12 ms at 44.1 kHz
+FREQUENCY = 44100
+BUFFER_SAMPLES = 512
+
+
+class AudioCues:
+    """Loads the cues once and plays them without blocking the caller."""
+
+    def __init__(self, cues=CUES, directory=SOUND_DIR):
+        self.cues = dict(cues)
+        self.directory = directory
+        self.ready = False
+        self.sounds = {}       # {name: pygame.mixer.Sound}
+        self.channels = {}     # {name: reserved pygame.mixer.Channel}
+        self.decode_times = {} # {name: seconds to decode}
+        self.load_time = 0.0
+        self.output_latency = 0.0  # mixer buffer length, seconds
+        # Time spent in play() by the calling (Tk) thread, per cue
+        self.stats = {name: {"plays": 0, "total": 0.0, "max": 0.0} for name in self.cues}
+        self._lock = threading.Lock()
+
+    def load(self):
+        """Import pygame, start the mixer and decode every cue. Returns True if audio works.
+
+        Blocks for the decode; run it on a background thread.
+        """
+        t0 = time.perf_counter()
+        try:
+            import pygame
+            pygame.mixer.init(frequency=FREQUENCY, buffer=BUFFER_SAMPLES)
+        except Exception as e:
+            print("Audio initialization failed:", e)
+            return False
+        frequency = (pygame.mixer.get_init() or (FREQUENCY,))[0]
+        self.output_latency = BUFFER_SAMPLES / frequency
+        pygame.mixer.set_reserved(len(self.cues))
+        for channel, (name, filename) in enumerate(self.cues.items()):
+            start = time.perf_counter()
+            try:
+                self.sounds[name] = pygame.mixer.Sound(os.path.join(self.directory, filename))
+            except Exception as e:
+                print(f"Could not load {filename}:", e)
+                continue
+            self.channels[name] = pygame.mixer.Channel(channel)
+            self.decode_times[name] = time.perf_counter() - start
+        self.load_time = time.perf_counter() - t0
+        self.ready = True
+        return True
+
+    def play(self, name):
+        """Start a cue on its channel (restarting it if it is still playing). Returns False if it can't play."""
+        sound = self.sounds.get(name) if self.ready else None
+        if sound is None:
+            return False
+        t0 = time.perf_counter()
+        try:
+            self.channels[name].play(sound)
+        except Exception as e:
+            print(f"Could not play {name} cue: {e}")
+            return False
+        elapsed = time.perf_counter() - t0
+        with self._lock:
+            st = self.stats[name]
+            st["plays"] += 1
+            st["total"] += elapsed
+            st["max"] = max(st["max"], elapsed)
+        return True
+
+    def stop(self, name=None):
+        """Stop one cue, or all of them."""
+        for cue, channel in self.channels.items():
+            if name is None or cue == name:
+                channel.stop()
+
+    def summary(self):
+        """One line: decode time per cue and how long play() took on the caller's thread."""
+        if not self.ready:
+            return "Audio cues: not loaded"
+        with self._lock:
+            parts = []
+            for name, st in self.stats.items():
+                if name not in self.sounds:
+                    continue
+                mean = st["total"] / st["plays"] * 1000 if st["plays"] else 0.0
+                parts.append(f"{name} decoded in {self.decode_times[name] * 1000:.0f} ms, "
+                             f"{st['plays']} plays (mean {mean:.2f} ms, max {st['max'] * 1000:.2f} ms)")
+        return (f"Audio cues (+{self.output_latency * 1000:.0f} ms mixer buffer): " + "; ".join(parts))
@@ -0,0 +1,276 @@
+"""Game-loop benchmark for the Laser Maze controller.
+
+Runs LaserMazeUI against the simulated hardware (simhardware.py) through
+scripted races and reports, per scenario:
+  - _poll_hardware tick time (p50 / p99 / max) and _update_timer frame time (p99)
+  - beam break -> _show_penalty latency (p50 / p99, and breaks never penalised)
+  - I2C transactions and route switches per tick
+  - Tk config calls per display frame made by the lane render layer
+
+Results are written as JSON so runs can be compared between commits:
+
+    python benchmark.py --out bench_results.json
+    python benchmark.py --quick --compare bench_results.json
+
+Tk needs a display; on a headless box run it under xvfb-run.
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+
+# The controller picks its backend at import time; the topology comes from
+# the simulated maze, not the module cache
+for flag in ("--test", "--rescan"):
+    if flag not in sys.argv:
+        sys.argv.append(flag)
+
+import simhardware
+import LaserMazeController as controller
+
+SCENARIOS = [
+    # (lanes, total modules); 2 lanes use two buses each, 4 lanes one bus each
+    (2, 4),
+    (2, 8),
+    (2, 20),
+    (2, 40),
+    (4, 8),
+    (4, 40),
+]
+
+# A penalty more than this long after a break is not that break's penalty
+MATCH_WINDOW = 1.0
+
+
+def percentile(values, q):
+    if not values:
+        return None
+    values = sorted(values)
+    idx = min(len(values) - 1, max(0, int(round(q / 100.0 * (len(values) - 1)))))
+    return values[idx]
+
+
+def load_topology(app, maze):
+    """Give the UI the simulated modules as if a scan had just found them."""
+    app.bus_modules = {}
+    app.bus_groups_by_lane = {}
+    app.lane_assignments = {}
+    addresses = []
+    for bus, modules in maze.ports.items():
+        lane = app.bus_to_lane[bus]
+        addrs = sorted(modules)
+        if not addrs:
+            continue
+        app.bus_modules[bus] = list(addrs)
+        app.bus_groups_by_lane.setdefault(lane, {})[bus] = list(addrs)
+        for addr in addrs:
+            app.lane_assignments[addr] = {"lane": lane, "bus": bus}
+            addresses.append(addr)
+    app.scanned_addresses = addresses
+
+
+def race_script(maze, finish_pins, duration, break_interval, seed):
+    """Random beam breaks during the race, then every lane's finish button.
+
+    Breaks are "block_armed" events: each goes to a module that is still
+    armed when it is played (see run_scenario), because a module whose beam
+    was read while blocked has its laser off and can't report another break.
+    """
+    rng = random.Random(seed)
+    events = []
+    t = break_interval
+    while t < duration - 0.5:
+        events.append((t, "block_armed", rng.random(), 0.08))
+        t += break_interval * rng.uniform(0.5, 1.5)
+    for n, pin in enumerate(finish_pins):
+        events.append((duration + 0.4 * n, "press", pin, 0.3))
+    return events
+
+
+def run_scenario(lanes, modules, duration, break_interval, seed, mode):
+    buses = sorted(controller.LANE_LAYOUTS[lanes])
+    per_bus = max(1, modules // len(buses))
+    maze = simhardware.build_maze(simhardware.GPIO, modules_per_bus=per_bus, buses=buses)
+    simhardware.set_maze(maze)
+
+    app = controller.LaserMazeUI(lane_count=lanes)
+    app.withdraw()
+    app.race_log = False  # simulated races don't belong in race_logs/
+    app.beam_detect_mode = mode
+    load_topology(app, maze)
+
+    ticks = []
+    blocks = []     # (time, lane) of every scripted break
+    penalties = []  # (time, lane) of every penalty shown
+
+    frames = []
+    orig_tick = app._poll_hardware
+    orig_frame = app._update_timer
+    orig_penalty = app._show_penalty
+
+    def timed_tick():
+        t0 = time.perf_counter()
+        orig_tick()
+        ticks.append(time.perf_counter() - t0)
+
+    def timed_frame():
+        t0 = time.perf_counter()
+        orig_frame()
+        frames.append(time.perf_counter() - t0)
+
+    def logged_penalty(sec, lane, *args):
+        t = time.monotonic()
+        before = app.race_clock.penalty_ns.get(lane, 0)
+        orig_penalty(sec, lane, *args)
+        if app.race_clock.penalty_ns.get(lane, 0) != before:  # breaks after the lane's finish don't count
+            penalties.append((t, lane))
+
+    app._poll_hardware = timed_tick
+    app._update_timer = timed_frame
+    app._show_penalty = logged_penalty
+
+    orig_block = maze.block
+
+    def logged_block(address, duration=None):
+        port, _ = maze.find(address)
+        blocks.append((time.monotonic(), app.bus_to_lane[port]))
+        orig_block(address, duration)
+
+    maze.block = logged_block
+
+    def block_armed(pick, duration):
+        armed = sorted(m.address for _, m in maze.modules() if m.game_on)
+        if armed:
+            maze.block(armed[int(pick * len(armed))], duration)
+
+    maze.block_armed = block_armed
+
+    app.start_game()
+    stats0 = dict(app.router.stats)
+    renders0 = dict(app.render_stats)
+    queries0 = dict(app.beam_query_stats)
+    # Countdown (3 s) + "Go!" hold (2 s) before the first tick
+    race_start = 5.0
+    script = race_script(maze, [app.lanes[l].finish_pin for l in sorted(app.bus_groups_by_lane)],
+                         duration, break_interval, seed)
+    app.after(int(race_start * 1000), lambda: maze.run_script(script))
+    app.after(int((race_start + duration + 1.5) * 1000), app.quit)
+    app.mainloop()
+    app.stop_game()
+    # Let the queued lasers-off finish before the next scenario drives the shared route pins
+    app.i2c_worker.stop(wait=True)
+    stats1 = dict(app.router.stats)
+    renders1 = dict(app.render_stats)
+    queries1 = dict(app.beam_query_stats)
+
+    # Match each break to the first penalty on its lane after it (within MATCH_WINDOW)
+    latencies = []
+    missed = 0
+    pending = sorted(penalties)
+    for t_block, lane in sorted(blocks):
+        match = next((p for p in pending if p[1] == lane and t_block <= p[0] <= t_block + MATCH_WINDOW), None)
+        if match is None:
+            missed += 1
+            continue
+        pending.remove(match)
+        latencies.append(match[0] - t_block)
+
+    n_ticks = max(1, len(ticks))
+    tx = stats1["transactions"] - stats0["transactions"]
+    switches = stats1["route_switches"] - stats0["route_switches"]
+    result = {
+        "lanes": lanes,
+        "modules": per_bus * len(buses),
+        "detect_mode": mode,
+        "ticks": len(ticks),
+        "tick_ms_p50": _ms(percentile(ticks, 50)),
+        "tick_ms_p99": _ms(percentile(ticks, 99)),
+        "tick_ms_max": _ms(max(ticks) if ticks else None),
+        "frames": len(frames),
+        "frame_ms_p99": _ms(percentile(frames, 99)),
+        "beam_breaks": len(blocks),
+        "penalties": len(penalties),
+        "missed_breaks": missed,
+        "penalty_latency_ms_p50": _ms(percentile(latencies, 50)),
+        "penalty_latency_ms_p99": _ms(percentile(latencies, 99)),
+        "i2c_transactions": tx,
+        "module_queries": queries1["queries"] - queries0["queries"],
+        "early_stops": queries1["stopped_early"] - queries0["stopped_early"],
+        "i2c_transactions_per_tick": round(tx / n_ticks, 2),
+        "route_switches_per_tick": round(switches / n_ticks, 3),
+        "tk_configs_per_frame": round((renders1["configs"] - renders0["configs"]) / max(1, len(frames)), 2),
+    }
+
+    app.destroy()
+    return result
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 3)
+
+
+def git_revision():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       cwd=os.path.dirname(os.path.abspath(__file__)),
+                                       stderr=subprocess.DEVNULL).decode().strip()
+    except Exception:
+        return None
+
+
+def compare(previous, current):
+    """Print tick and latency deltas against an earlier results file."""
+    old = {(r["lanes"], r["modules"], r["detect_mode"]): r for r in previous["results"]}
+    print(f"\nvs {previous.get('revision')}:")
+    for r in current["results"]:
+        o = old.get((r["lanes"], r["modules"], r["detect_mode"]))
+        if o is None:
+            continue
+        for key in ("tick_ms_p99", "penalty_latency_ms_p99", "i2c_transactions_per_tick", "tk_configs_per_frame"):
+            if o.get(key) is not None and r.get(key) is not None:
+                print(f"  {r['lanes']}L/{r['modules']}m {key}: {o[key]} -> {r[key]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--out", default="bench_results.json", help="JSON results file")
+    parser.add_argument("--duration", type=float, default=10.0, help="race length per scenario (s)")
+    parser.add_argument("--break-interval", type=float, default=1.0, help="mean time between beam breaks (s)")
+    parser.add_argument("--mode", choices=("edge", "poll"), default="edge", help="beam detection mode")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--quick", action="store_true", help="smallest and largest scenario, 5 s races")
+    parser.add_argument("--compare", help="earlier results file to compare against")
+    parser.add_argument("--test", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--rescan", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    scenarios = [SCENARIOS[0], SCENARIOS[-1]] if args.quick else SCENARIOS
+    duration = 5.0 if args.quick else args.duration
+
+    results = []
+    for lanes, modules in scenarios:
+        print(f"--- {lanes} lanes, {modules} modules ({args.mode}) ---")
+        r = run_scenario(lanes, modules, duration, args.break_interval, args.seed, args.mode)
+        results.append(r)
+        print(json.dumps(r, indent=2))
+
+    report = {
+        "revision": git_revision(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "duration_s": duration,
+        "results": results,
+    }
+    with open(args.out, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {args.out}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == "__main__":
+    main()
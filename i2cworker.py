@@ -0,0 +1,162 @@
+import queue
+import threading
+import time
+
+# Job priorities, most urgent first. Within a priority, jobs for the route the
+# bus is already on run before jobs that would switch the mux, then oldest first.
+PRIORITY_SAFETY = 0      # lasers off: lane finish, stop, shutdown
+PRIORITY_PENALTY = 1     # beam queries and sweeps during a race
+PRIORITY_NORMAL = 2      # setup work and synchronous call()s
+PRIORITY_BACKGROUND = 3  # PD voltage / settings reads, rechecks, saving
+
+
+# ------------------- I2C Worker Thread -------------------
+# All race-time bus traffic (route switching, beam queries, lane off) runs on
+# this thread so the Tk main loop never waits on smbus or set_i2c_route sleeps.
+# The UI thread submits jobs with submit() and drains finished jobs with
+# poll_results() from an after() loop; callbacks then run on the Tk thread.
+# Pending jobs are kept per priority (see PRIORITY_*), so a lane-off or a beam
+# query never waits behind a queue of background reads; the job already
+# running is not interrupted. current_route() (the routed bus' active route)
+# lets jobs that name a route be grouped to save mux switches.
+class I2CWorker(threading.Thread):
+    def __init__(self, current_route=None):
+        super().__init__(name="i2c-worker", daemon=True)
+        self.results = queue.Queue()
+        # Held while a job runs, so direct bus use from the UI thread can't interleave
+        self.lock = threading.RLock()
+        self.current_route = current_route or (lambda: None)
+        self._pending = {}  # {priority: [job, ...]} in submission order
+        self._pending_cv = threading.Condition()
+        self._pending_tags = set()
+        self._tag_lock = threading.Lock()
+        self._running = True
+        self.stats = {"jobs": 0, "route_grouped": 0, "max_wait": {}}
+
+    def submit(self, fn, *args, tag=None, on_done=None, priority=PRIORITY_NORMAL, route=None):
+        """Queue fn(*args) on the worker. Returns False if a job with the same tag is still pending.
+
+        route is the bus the job works on, if it is just one (used for grouping).
+        """
+        if tag is not None:
+            with self._tag_lock:
+                if tag in self._pending_tags:
+                    return False  # previous job still running, don't pile up behind a slow bus
+                self._pending_tags.add(tag)
+        try:
+            self._put(priority, route, (fn, args, tag, on_done, time.monotonic()))
+        except RuntimeError:
+            if tag is not None:
+                with self._tag_lock:
+                    self._pending_tags.discard(tag)
+            raise
+        return True
+
+    def _put(self, priority, route, item):
+        """Queue a job. Raises RuntimeError once the worker is stopped (nothing would run it)."""
+        with self._pending_cv:
+            if not self._running or (self.ident is not None and not self.is_alive()):
+                raise RuntimeError("I2C worker is stopped")
+            self._pending.setdefault(priority, []).append((route, item))
+            self._pending_cv.notify()
+
+    def _next(self):
+        """Wait for the next job: most urgent priority, same route first, then oldest."""
+        with self._pending_cv:
+            while self._running and not any(self._pending.values()):
+                self._pending_cv.wait()
+            if not any(self._pending.values()):
+                return None, None
+            priority = min(p for p, jobs in self._pending.items() if jobs)
+            jobs = self._pending[priority]
+            active = self.current_route()
+            index = 0
+            if active is not None and jobs[0][0] not in (None, active):
+                index = next((i for i, (route, _) in enumerate(jobs) if route == active), 0)
+                if index:
+                    self.stats["route_grouped"] += 1
+            return priority, jobs.pop(index)[1]
+
+    def pending_count(self):
+        with self._pending_cv:
+            return sum(len(jobs) for jobs in self._pending.values())
+
+    def call(self, fn, *args, priority=PRIORITY_NORMAL, timeout=30.0):
+        """Run fn(*args) on the worker and block until it finishes (setup / start-up paths only).
+
+        Jobs of the same or a more urgent priority that were queued earlier run first.
+        Raises RuntimeError if the worker is stopped or dies first, TimeoutError
+        after timeout seconds (the job may still run later).
+        """
+        if threading.current_thread() is self:
+            return fn(*args)
+        done = threading.Event()
+        box = {}
+
+        def job():
+            try:
+                box['value'] = fn(*args)
+            except Exception as e:
+                box['error'] = e
+            finally:
+                done.set()
+
+        self._put(priority, None, (job, (), None, None, time.monotonic()))
+        give_up_at = time.monotonic() + timeout
+        while not done.wait(0.1):
+            if not self.is_alive() and not done.is_set():
+                raise RuntimeError("I2C worker stopped before the job ran")
+            if time.monotonic() >= give_up_at:
+                raise TimeoutError(f"I2C worker job took more than {timeout:.0f} s")
+        if 'error' in box:
+            raise box['error']
+        return box.get('value')
+
+    def is_pending(self, tag):
+        with self._tag_lock:
+            return tag in self._pending_tags
+
+    def run(self):
+        while True:
+            priority, item = self._next()
+            if item is None:
+                break
+            fn, args, tag, on_done, submitted = item
+            wait = time.monotonic() - submitted
+            self.stats["jobs"] += 1
+            if wait > self.stats["max_wait"].get(priority, 0.0):
+                self.stats["max_wait"][priority] = wait
+            value, error = None, None
+            with self.lock:
+                try:
+                    value = fn(*args)
+                except Exception as e:
+                    error = e
+            if tag is not None:
+                with self._tag_lock:
+                    self._pending_tags.discard(tag)
+            if on_done is not None or error is not None:
+                self.results.put((tag, on_done, value, error, submitted, time.monotonic()))
+
+    def poll_results(self, limit=50):
+        """Run callbacks of finished jobs. Call from the Tk thread only."""
+        for _ in range(limit):
+            try:
+                tag, on_done, value, error, submitted, finished = self.results.get_nowait()
+            except queue.Empty:
+                break
+            if error is not None:
+                print(f"I2C worker job {tag or ''} failed: {error}")
+                continue
+            try:
+                on_done(value)
+            except Exception as e:
+                print(f"I2C result handler {tag or ''} failed: {e}")
+
+    def stop(self, wait=False, timeout=5.0):
+        """Finish the jobs already queued, then end the thread (wait=True: until it has ended)."""
+        with self._pending_cv:
+            self._running = False
+            self._pending_cv.notify()
+        if wait and self.is_alive() and threading.current_thread() is not self:
+            self.join(timeout)
@@ -0,0 +1,101 @@
+import time
+
+# ------------------- Lanes -------------------
+# Bus (RJ45 port J1-J4) -> lane. The usual maze is two lanes of two buses;
+# tournaments run four single-bus lanes (LaserMazeController.py --lanes 4).
+LANE_LAYOUTS = {
+    2: {1: 1, 2: 1, 3: 2, 4: 2},
+    4: {1: 1, 2: 2, 3: 3, 4: 4},
+}
+
+# Finish button GPIO per lane (lanes 3 and 4 use the spare header pins 12 and 13)
+FINISH_PINS = {1: 7, 2: 8, 3: 12, 4: 13}
+
+# Timer window widgets of a lane, in render order
+WIDGETS = ("frame", "header", "timer")
+
+
+class Lane:
+    """One lane: its buses, finish button, race result and timer window widgets.
+
+    The look of the widgets is kept as render state: set()/paint() record the
+    wanted Tk options and render() pushes only the ones that differ from what
+    was last pushed, one config() call per changed widget. Large timer fonts
+    are slow to redraw on the Pi, so an unchanged option is never re-sent.
+    """
+
+    def __init__(self, number, buses, finish_pin):
+        self.number = number
+        self.buses = tuple(buses)
+        self.finish_pin = finish_pin
+        # Timer window widgets, built when a race starts on this lane
+        self.frame = None
+        self.header = None
+        self.timer = None
+        self._wanted = {name: {} for name in WIDGETS}
+        self._shown = {name: {} for name in WIDGETS}
+        self.reset()
+
+    def reset(self):
+        self.finished = False
+        self.finish_time = 0.0
+        self.flash_until = 0.0  # monotonic time a penalty flash ends; the timer text waits for it
+
+    def flashing(self, now=None):
+        return (time.monotonic() if now is None else now) < self.flash_until
+
+    @property
+    def title(self):
+        return f"LANE {self.number}"
+
+    def has_display(self):
+        """True while the lane's timer window widgets exist."""
+        try:
+            return self.timer is not None and bool(self.timer.winfo_exists())
+        except Exception:
+            return False
+
+    def attach(self, frame=None, header=None, timer=None, looks=None):
+        """Use new widgets, created with looks ({widget: options}); no widgets detaches the lane."""
+        self.frame, self.header, self.timer = frame, header, timer
+        looks = looks or {}
+        for name in WIDGETS:
+            self._wanted[name] = dict(looks.get(name, {}))
+            self._shown[name] = dict(looks.get(name, {}))
+
+    def set(self, widget, **options):
+        """Record options for one widget ("frame", "header" or "timer"); render() applies them."""
+        self._wanted[widget].update(options)
+
+    def get(self, widget, option, default=None):
+        """Option value a widget will have after the next render."""
+        return self._wanted[widget].get(option, default)
+
+    def paint(self, bg, **timer_options):
+        """Set the background of the lane's frame, header and timer (plus any timer label options)."""
+        self.set("frame", bg=bg)
+        self.set("header", bg=bg)
+        self.set("timer", bg=bg, **timer_options)
+
+    def render(self):
+        """Push changed options to Tk. Returns the number of config() calls made."""
+        calls = 0
+        for name in WIDGETS:
+            widget = getattr(self, name)
+            if widget is None:
+                continue
+            shown = self._shown[name]
+            changed = {k: v for k, v in self._wanted[name].items() if shown.get(k) != v}
+            if changed:
+                widget.config(**changed)
+                shown.update(changed)
+                calls += 1
+        return calls
+
+
+def build_lanes(bus_to_lane, finish_pins=FINISH_PINS):
+    """{lane: Lane} for a bus -> lane layout."""
+    buses = {}
+    for bus, lane in sorted(bus_to_lane.items()):
+        buses.setdefault(lane, []).append(bus)
+    return {lane: Lane(lane, buses[lane], finish_pins[lane]) for lane in sorted(buses)}
@@ -13,6 +13,8 @@ const unsigned long interval = 1000;
 #define CMD_TURN_OFF     0x04
 #define CMD_SET_COLOR    0x05
 
+#define CMD_READ_EVENTS  0xF8
+#define CMD_STATUS       0xF9
 #define CMD_LD_OFF       0xFA
 #define CMD_READ_COLOR   0xFB
 #define CMD_READ_CURRENT 0xFC
@@ -58,6 +60,50 @@ float PD_VOLT = 0;
 int raw_LD_VOLTAGE = 0;
 float LD_VOLTAGE = 0;
 int currentValue = 0;
+bool laserOn = false;
+bool gameModeOn = false;
+
+// === Firmware version ===
+// Reported in the CMD_STATUS reply so the Pi knows which commands this module
+// has: 2 = CMD_READ_EVENTS beam-break buffer. Firmware before the version byte
+// leaves it as the 0xFF an idle slave sends.
+#define FIRMWARE_VERSION 2
+
+// === Status snapshot (CMD_STATUS) ===
+// One Wire.write answers everything the Pi polls for, little-endian, packed:
+//   byte 0    flags (bit 0 laser on, bit 1 game mode, bit 2 beam blocked)
+//   bytes 1-4 PD voltage (float)
+//   byte 5    laser current setting (EEPROM, mA)
+//   byte 6    laser color (EEPROM, one-hot)
+//   byte 7    game threshold (EEPROM byte)
+//   byte 8    I2C address
+//   byte 9    FIRMWARE_VERSION
+// Reading the status has no side effects (unlike CMD_BEAM_BLOCKED).
+#define STATUS_LASER_ON     0x01
+#define STATUS_GAME_MODE    0x02
+#define STATUS_BEAM_BLOCKED 0x04
+const int STATUS_LENGTH = 10;
+
+// === Beam-break event buffer (CMD_READ_EVENTS) ===
+// In game mode the BEAM_BLOCKED_PIN rising edge (INT0) latches a millis()
+// timestamp into a small ring buffer, so a break that clears before the Pi
+// polls is still reported. CMD_READ_EVENTS drains it in one read (fits the
+// 32-byte Wire buffer), little-endian, packed:
+//   byte 0     I2C address
+//   byte 1     number of events n (0-EVENT_SLOTS)
+//   byte 2     events overwritten since the last drain (saturates at 255)
+//   byte 3     beam blocked right now
+//   bytes 4-7  millis() at the time of the reply
+//   bytes 8-   EVENT_SLOTS timestamps (unsigned long), oldest first; the first n are valid
+// Like CMD_BEAM_BLOCKED, a reply while the beam is blocked turns the laser off.
+const byte EVENT_SLOTS = 6;
+const unsigned long EVENT_DEBOUNCE_MS = 5;
+const int EVENTS_LENGTH = 8 + 4 * EVENT_SLOTS;
+volatile unsigned long eventTimes[EVENT_SLOTS];
+volatile byte eventHead = 0;     // next slot to write
+volatile byte eventCount = 0;
+volatile byte eventsDropped = 0;
+volatile unsigned long lastEventMs = 0;
 // === I2C ===
 byte i2cCommand = 0x00;
 uint8_t argument = 0;
@@ -108,6 +154,7 @@ void set_laser_color(byte color) {
 
 void game_mode() {
   Beam_Blocked = 0;
+  clearBeamEvents();
   TURN_ON();  // Turn on laser normally
 
   // Read game-mode threshold from EEPROM
@@ -118,6 +165,7 @@ void game_mode() {
 
   // Apply threshold only in game mode
   set_PD_Threshold(dacRaw);
+  gameModeOn = true;
 
   Serial.print("Game-mode PD Threshold applied (EEPROM byte = ");
   Serial.print(eepromValue);
@@ -132,14 +180,43 @@ void TURN_ON() {
   digitalWrite(Pin_LD_OFF,LOW);
   Set_current(currentValue);
   set_PD_Threshold(0);
+  laserOn = true;
+  gameModeOn = false;
 }
 
 void TURN_OFF() {
   digitalWrite(Pin_LD_OFF,HIGH);
   currentValue = 0;
   Set_current(currentValue);
+  // Drop the game threshold too: with the laser off the PD is dark, and a
+  // threshold left on the DAC would hold BEAM_BLOCKED_PIN (and the bus line) high
+  set_PD_Threshold(0);
+  laserOn = false;
+  gameModeOn = false;
+
+}
 
+// === Beam break interrupt (INT0) ===
+void onBeamBreak() {
+  if (!gameModeOn) return;
+  unsigned long now = millis();
+  if (eventCount > 0 && now - lastEventMs < EVENT_DEBOUNCE_MS) return;
+  lastEventMs = now;
+  eventTimes[eventHead] = now;
+  eventHead = (eventHead + 1) % EVENT_SLOTS;
+  if (eventCount < EVENT_SLOTS) {
+    eventCount++;
+  } else if (eventsDropped < 255) {
+    eventsDropped++;  // oldest event overwritten
+  }
+}
 
+void clearBeamEvents() {
+  noInterrupts();
+  eventHead = 0;
+  eventCount = 0;
+  eventsDropped = 0;
+  interrupts();
 }
 
 // === I2C: Handle Master Request ===
@@ -162,7 +239,6 @@ void onRequest() {
       Wire.write((byte)Beam_Blocked);
       if (Beam_Blocked){
         TURN_OFF();
-        set_PD_Threshold(0);
       }
       Serial.println("→ Beam Blocked read & Laser turn on");
       break;
@@ -173,12 +249,58 @@ void onRequest() {
       Wire.write((byte*)&PD_VOLT, 4);
       break;
 
-    case CMD_GAME_THRESHOLD_READ:
+    case CMD_GAME_THRESHOLD_READ: {
         byte eepromValue = EEPROM.read(EEPROM_GAME_THRESHOLD);
         Wire.write(eepromValue);
         Serial.print("→ Game threshold read (EEPROM byte): ");
         Serial.println(eepromValue);
       break;
+    }
+
+    case CMD_STATUS: {
+      // No Serial output here: this answers every poll and must stay short
+      byte status[STATUS_LENGTH];
+      rawPD_VOLT = analogRead(Pin_PD_VOLT);
+      PD_VOLT = (rawPD_VOLT / 1023.0) * referenceVoltage;
+      byte flags = 0;
+      if (laserOn) flags |= STATUS_LASER_ON;
+      if (gameModeOn) flags |= STATUS_GAME_MODE;
+      if (digitalRead(BEAM_BLOCKED_PIN)) flags |= STATUS_BEAM_BLOCKED;
+      status[0] = flags;
+      memcpy(&status[1], &PD_VOLT, 4);
+      status[5] = EEPROM.read(EEPROM_current);
+      status[6] = EEPROM.read(EEPROM_color);
+      status[7] = EEPROM.read(EEPROM_GAME_THRESHOLD);
+      status[8] = I2C_ADDRESS;
+      status[9] = FIRMWARE_VERSION;
+      Wire.write(status, STATUS_LENGTH);
+      break;
+    }
+
+    case CMD_READ_EVENTS: {
+      // onRequest runs inside the TWI interrupt, so onBeamBreak can't interleave here
+      byte reply[EVENTS_LENGTH];
+      memset(reply, 0, EVENTS_LENGTH);
+      Beam_Blocked = digitalRead(BEAM_BLOCKED_PIN);
+      unsigned long now = millis();
+      reply[0] = I2C_ADDRESS;
+      reply[1] = eventCount;
+      reply[2] = eventsDropped;
+      reply[3] = (byte)Beam_Blocked;
+      memcpy(&reply[4], &now, 4);
+      byte oldest = (eventHead + EVENT_SLOTS - eventCount) % EVENT_SLOTS;
+      for (byte i = 0; i < eventCount; i++) {
+        unsigned long t = eventTimes[(oldest + i) % EVENT_SLOTS];
+        memcpy(&reply[8 + 4 * i], &t, 4);
+      }
+      eventCount = 0;
+      eventsDropped = 0;
+      Wire.write(reply, EVENTS_LENGTH);
+      if (Beam_Blocked) {
+        TURN_OFF();
+      }
+      break;
+    }
 
     default:
       Wire.write(I2C_ADDRESS);
@@ -209,6 +331,12 @@ void receiveCommand(int numBytes) {
       case CMD_LD_OFF:
         requestCode = received;
         break;
+      case CMD_STATUS:
+        requestCode = received;
+        break;
+      case CMD_READ_EVENTS:
+        requestCode = received;
+        break;
       case CMD_SAVE:
         if (numBytes >= 2) change_current(Wire.read());
         break;
@@ -247,6 +375,7 @@ void setup() {
   
   Serial.begin(9600);
   pinMode(BEAM_BLOCKED_PIN, INPUT);
+  attachInterrupt(digitalPinToInterrupt(BEAM_BLOCKED_PIN), onBeamBreak, RISING);
   
   pinMode(CS_PIN, OUTPUT);
   pinMode(LDAC_PIN, OUTPUT);
@@ -288,6 +417,11 @@ void setup() {
   writeDAC(1, 0);
   
   Wire.begin(I2C_ADDRESS);
+  // Also answer the general call (0x00) so the Pi can switch every module
+  // on a bus (TURN_ON / TURN_OFF / GAME) with a single write
+#if defined(TWAR)
+  TWAR |= 1;
+#endif
   Wire.onRequest(onRequest);
   Wire.onReceive(receiveCommand);
 }
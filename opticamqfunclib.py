@@ -1,5 +1,11 @@
-import smbus # pyright: ignore[reportMissingImports]
-import RPi.GPIO as gpio # pyright: ignore[reportMissingModuleSource]
+try:
+    import smbus # pyright: ignore[reportMissingImports]
+    import RPi.GPIO as gpio # pyright: ignore[reportMissingModuleSource]
+except ImportError:
+    # Off the Pi (test mode / simulator): the bus is handed in through set_bus()
+    smbus = None
+    gpio = None
+import errno
 import time
 import struct
 
@@ -10,6 +16,14 @@ bus = None
 start = 0
 penalty = 0
 
+# Photodiode read timing. The Arduino samples the photodiode inside onRequest,
+# so the only wait needed is for the request command to land (settle time).
+# pd_read_guard is an optional extra pause after each read (it used to be a
+# fixed 0.3 s); set it with set_pd_read_guard() if a bus needs breathing room.
+command_settle_time = 0.001
+pd_read_guard = 0.0
+pd_read_stats = {"reads": 0, "total_time": 0.0, "last_batch_size": 0, "last_batch_time": 0.0}
+
 # Arduino command codes
 CMD_SET_CURRENT = 0x01      # Set laser current
 CMD_GAME = 0x02             # Activate game mode
@@ -24,6 +38,63 @@ CMD_ADDRESS = 0xFD          # Request device address
 CMD_BEAM_BLOCKED = 0xFE     # Check if beam is blocked
 CMD_PD_VOLT = 0xFF          # Read photodiode voltage
 CMD_GAME_THRESHOLD_READ = 0x12 # Read the game mode threshold
+CMD_STATUS = 0xF9           # Read the packed status snapshot
+CMD_READ_EVENTS = 0xF8      # Drain latched beam-break events
+
+# CMD_STATUS reply (see main_V8.ino): flags, PD volts, current, color, threshold,
+# address, firmware version
+STATUS_FORMAT = '<BfBBBBB'
+STATUS_SIZE = struct.calcsize(STATUS_FORMAT)
+STATUS_LASER_ON = 0x01
+STATUS_GAME_MODE = 0x02
+STATUS_BEAM_BLOCKED = 0x04
+LASER_COLORS = {0x01: "blue", 0x02: "green", 0x04: "red"}
+
+# Firmware versions (READ_FIRMWARE_VERSION). Firmware ignores command codes it
+# doesn't know, so what a module supports is read from the version byte of its
+# status reply, never guessed from how it answers a newer command.
+FIRMWARE_NO_STATUS = 0  # no CMD_STATUS
+FIRMWARE_STATUS = 1     # CMD_STATUS without the version byte (reads 0xFF)
+FIRMWARE_EVENTS = 2     # CMD_READ_EVENTS beam-break buffer (main_V8.ino FIRMWARE_VERSION)
+
+# CMD_READ_EVENTS reply (see main_V8.ino): address, event count, dropped count,
+# blocked now, Arduino millis() at the reply, then EVENT_SLOTS millis() timestamps
+EVENTS_HEADER = '<BBBBI'
+EVENT_SLOTS = 6
+EVENTS_SIZE = struct.calcsize(EVENTS_HEADER) + 4 * EVENT_SLOTS
+
+# Module settings cache. Colour, current and game threshold are stored in the
+# Arduino's EEPROM and only change through SET_LASER_COLOR / SET_LASER_CURRENT /
+# SET_GAME_THRESHOLD, so those write through to module_cache and the READ_*
+# helpers answer from it without touching the bus. Call INVALIDATE_MODULE_CACHE()
+# when a module is swapped, and RECHECK_MODULE_CACHE() to compare it with the
+# hardware.
+module_cache = {}  # {address: {"color": str, "current": int, "threshold": int, "firmware": int}}
+module_cache_stats = {"hits": 0, "misses": 0}
+
+# General call. main_V8.ino also listens on I2C address 0x00, so one write
+# reaches every module on the routed bus. Only the write-only commands
+# (on / off / game) are broadcast; the result is read back per module.
+GENERAL_CALL_ADDRESS = 0x00
+broadcast_settle_time = 0.005  # let the modules act on a broadcast before reading back
+
+# Retry policy. A bus error (OSError: NACK / EIO from a noisy cable) is retried
+# with exponentially growing pauses until the attempts or the deadline run out.
+# Every module also has a circuit breaker: after breaker_threshold failed calls
+# in a row the module is parked, calls to it fail at once with ModuleUnavailable
+# instead of touching the bus, and RECHECK_PARKED_MODULES() probes it every
+# breaker_recheck seconds (from a background job) until it answers again.
+retry_attempts = 4
+retry_base_delay = 0.005
+retry_max_delay = 0.05
+retry_deadline = 0.25
+breaker_threshold = 3
+breaker_recheck = 2.0
+module_breakers = {}  # {address: {"failures": n, "parked": bool, "next_check": monotonic time}}
+retry_stats = {"retries": 0, "gave_up": 0, "parked": 0, "skipped": 0, "recovered": 0}
+
+class ModuleUnavailable(Exception):
+    """A call to a parked module (its circuit breaker is open); the bus was not touched."""
 
 # Set the global I2C bus, typically called from main.
 def set_bus(b):
@@ -41,80 +112,396 @@ def send_command(address, command, value=None):
 # Read a response from Arduino depending on command type
 def read_response(address, command):
     bus.write_byte(address, command)
-    time.sleep(0.001)
+    time.sleep(command_settle_time)
     value = 404  # Default error code
     if command == CMD_PD_VOLT:
+        t0 = time.monotonic()
         data = bus.read_i2c_block_data(address, 0, 4)
-        value = struct.unpack('f', bytes(data))[0]
-        time.sleep(0.3)# Read float
+        value = struct.unpack('f', bytes(data))[0]  # Read float
+        if pd_read_guard:
+            time.sleep(pd_read_guard)
+        pd_read_stats["reads"] += 1
+        pd_read_stats["total_time"] += time.monotonic() - t0 + command_settle_time
     else:
         value = bus.read_byte(address)  # Read byte
     return value
 
-# Scan I2C bus for connected devices and return their addresses
-def SCAN_I2C_BUS():
+# True unless the module is parked by its circuit breaker
+def module_available(address):
+    breaker = module_breakers.get(address)
+    return breaker is None or not breaker["parked"]
+
+# Parked addresses (due=True: only those whose next background probe is due)
+def parked_modules(due=False):
+    now = time.monotonic()
+    return sorted(a for a, b in module_breakers.items() if b["parked"] and (not due or now >= b["next_check"]))
+
+def _breaker_success(address):
+    breaker = module_breakers.pop(address, None)
+    if breaker is not None and breaker["parked"]:
+        retry_stats["recovered"] += 1
+        print(f"Module 0x{address:02X} answers again")
+
+def _breaker_failure(address):
+    breaker = module_breakers.setdefault(address, {"failures": 0, "parked": False, "next_check": 0.0})
+    breaker["failures"] += 1
+    if not breaker["parked"] and breaker["failures"] >= breaker_threshold:
+        breaker["parked"] = True
+        retry_stats["parked"] += 1
+        print(f"Module 0x{address:02X} failed {breaker['failures']} times in a row, parked until it answers again")
+    if breaker["parked"]:
+        breaker["next_check"] = time.monotonic() + breaker_recheck
+
+# Forget all breaker state (e.g. after a rescan or a module swap)
+def RESET_BREAKERS(address=None):
+    if address is None:
+        module_breakers.clear()
+    else:
+        module_breakers.pop(address, None)
+
+# Call operation(*args) for one module under the retry policy and its circuit
+# breaker. attempts=1 means no retries (the race loop: a latched break is picked
+# up by the next query anyway). Raises ModuleUnavailable for a parked module and
+# the last OSError when the retries run out; other exceptions (e.g. ValueError
+# for old firmware) mean the module answered and are passed straight on.
+def retry_call(address, operation, *args, attempts=None, deadline=None):
+    if not module_available(address):
+        retry_stats["skipped"] += 1
+        raise ModuleUnavailable(f"Module 0x{address:02X} is parked")
+    attempts = retry_attempts if attempts is None else attempts
+    give_up_at = time.monotonic() + (retry_deadline if deadline is None else deadline)
+    delay = retry_base_delay
+    for attempt in range(1, attempts + 1):
+        try:
+            result = operation(*args)
+        except OSError:
+            if attempt >= attempts or time.monotonic() + delay > give_up_at:
+                retry_stats["gave_up"] += 1
+                _breaker_failure(address)
+                raise
+            retry_stats["retries"] += 1
+            time.sleep(delay)
+            delay = min(retry_max_delay, delay * 2)
+        else:
+            _breaker_success(address)
+            return result
+
+# Ask a module for its own address. Unlike a bare read (which onRequest answers
+# according to the last request code, e.g. draining CMD_READ_EVENTS or turning a
+# blocked laser off) this has no side effects. True if the module answered correctly.
+def PROBE_MODULE(ADDRESS):
+    bus.write_byte(ADDRESS, CMD_ADDRESS)
+    time.sleep(command_settle_time)
+    return bus.read_byte(ADDRESS) == ADDRESS
+
+# Probe the parked modules among ADDRESSES (on the current route) whose recheck
+# is due with PROBE_MODULE. Returns the addresses that answered. Breaks they
+# latched while parked are still in their event buffers for the next beam query.
+def RECHECK_PARKED_MODULES(ADDRESSES):
+    due = set(parked_modules(due=True))
+    recovered = []
+    for address in ADDRESSES:
+        if address not in due:
+            continue
+        try:
+            answered = PROBE_MODULE(address)
+        except Exception:
+            answered = False
+        if not answered:
+            module_breakers[address]["next_check"] = time.monotonic() + breaker_recheck
+            continue
+        _breaker_success(address)
+        recovered.append(address)
+    return recovered
+
+# Set the optional pause after each photodiode read (seconds, 0 = none)
+def set_pd_read_guard(seconds):
+    global pd_read_guard
+    pd_read_guard = max(0.0, float(seconds))
+
+# Return module_cache[address][key], reading it with read() on a miss
+def _cached(address, key, read, refresh=False):
+    entry = module_cache.get(address, {})
+    if not refresh and entry.get(key) is not None:
+        module_cache_stats["hits"] += 1
+        return entry[key]
+    module_cache_stats["misses"] += 1
+    value = read()
+    if value is not None:
+        module_cache.setdefault(address, {})[key] = value
+    return value
+
+def _cache_store(address, key, value):
+    module_cache.setdefault(address, {})[key] = value
+
+# Drop cached settings: all modules, one module, or one key of one module
+def INVALIDATE_MODULE_CACHE(address=None, key=None):
+    if address is None:
+        module_cache.clear()
+    elif key is None:
+        module_cache.pop(address, None)
+    else:
+        module_cache.get(address, {}).pop(key, None)
+
+# Fill the cache from saved settings ({address: {"color": .., "current": .., "threshold": ..}})
+def SEED_MODULE_CACHE(details):
+    for address, entry in details.items():
+        for key, value in entry.items():
+            if value is not None:
+                _cache_store(address, key, value)
+
+# Re-read the settings of modules on the current route and refresh the cache.
+# Returns [(address, key, cached, actual)] for every value that had drifted.
+def RECHECK_MODULE_CACHE(ADDRESSES):
+    readers = {"color": READ_LASER_COLOR, "current": READ_LASER_CURRENT, "threshold": READ_GAME_THRESHOLD}
+    before = {address: dict(module_cache.get(address, {})) for address in ADDRESSES}
+    statuses = READ_STATUSES(ADDRESSES)  # one round trip per module, refreshes the cache
+    changed = []
+    for address in ADDRESSES:
+        for key, read in readers.items():
+            cached = before[address].get(key)
+            if statuses.get(address) is not None:
+                actual = statuses[address][key]
+            else:
+                try:
+                    actual = read(address, refresh=True)
+                except Exception as e:
+                    print(f"Cache recheck of 0x{address:02X} {key} failed: {e}")
+                    continue
+            if cached is not None and actual != cached:
+                changed.append((address, key, cached, actual))
+    return changed
+
+# Read photodiode voltages from many Arduinos on the current route in one pass.
+# All requests are sent first, then one settle delay, then all reads, so the
+# delay is paid once per batch instead of once per module.
+# Returns {address: volts}, with None for modules that did not answer.
+def READ_PD_VOLTS(ADDRESSES):
+    t0 = time.monotonic()
+    voltages = {}
+    requested = []
+    for address in ADDRESSES:
+        try:
+            bus.write_byte(address, CMD_PD_VOLT)
+            requested.append(address)
+        except Exception as e:
+            print(f"PD request failed for 0x{address:02X}: {e}")
+            voltages[address] = None
+    if requested:
+        time.sleep(command_settle_time)
+    for address in requested:
+        try:
+            data = bus.read_i2c_block_data(address, 0, 4)
+            voltages[address] = struct.unpack('f', bytes(data))[0]
+        except Exception as e:
+            print(f"PD read failed for 0x{address:02X}: {e}")
+            voltages[address] = None
+        if pd_read_guard:
+            time.sleep(pd_read_guard)
+    elapsed = time.monotonic() - t0
+    pd_read_stats["reads"] += len(requested)
+    pd_read_stats["total_time"] += elapsed
+    pd_read_stats["last_batch_size"] = len(requested)
+    pd_read_stats["last_batch_time"] = elapsed
+    return voltages
+
+# Decode a CMD_STATUS reply into a dict and refresh the module cache with it
+def _decode_status(address, data):
+    flags, pd_volt, current, color, threshold, reported, firmware = struct.unpack(STATUS_FORMAT, bytes(data))
+    if reported != address:
+        raise ValueError(f"0x{address:02X} sent something other than its status")
+    status = {
+        "address": reported,
+        "laser_on": bool(flags & STATUS_LASER_ON),
+        "game_mode": bool(flags & STATUS_GAME_MODE),
+        "beam_blocked": bool(flags & STATUS_BEAM_BLOCKED),
+        "pd_volt": pd_volt,
+        "current": current,
+        "color": LASER_COLORS.get(color),
+        "threshold": threshold,
+        "firmware": FIRMWARE_STATUS if firmware == 0xFF else firmware,
+    }
+    for key in ("current", "color", "threshold", "firmware"):
+        if status[key] is not None:
+            _cache_store(address, key, status[key])
+    return status
+
+# Firmware version of an Arduino (FIRMWARE_*), cached. Firmware ignores codes it
+# doesn't know and answers a read according to the last code it did know, which
+# may be CMD_BEAM_BLOCKED or CMD_READ_EVENTS (and turn a blocked laser off). So
+# CMD_ADDRESS, known to every version and free of side effects, goes first:
+# firmware without CMD_STATUS then answers with its address byte and 0xFF fill.
+def READ_FIRMWARE_VERSION(ADDRESS, refresh=False):
+    def read():
+        bus.write_byte(ADDRESS, CMD_ADDRESS)
+        bus.write_byte(ADDRESS, CMD_STATUS)
+        time.sleep(command_settle_time)
+        try:
+            return _decode_status(ADDRESS, bus.read_i2c_block_data(ADDRESS, 0, STATUS_SIZE))["firmware"]
+        except ValueError:
+            return FIRMWARE_NO_STATUS
+    return _cached(ADDRESS, "firmware", read, refresh)
+
+# Read beam state, PD voltage, current, color and threshold of one Arduino in a
+# single write/read round trip. Unlike CMD_BEAM_BLOCKED it has no side effects.
+# Raises ValueError for firmware without CMD_STATUS.
+def READ_STATUS(ADDRESS):
+    if READ_FIRMWARE_VERSION(ADDRESS) < FIRMWARE_STATUS:
+        raise ValueError(f"0x{ADDRESS:02X} has no CMD_STATUS (firmware {FIRMWARE_NO_STATUS})")
+    bus.write_byte(ADDRESS, CMD_STATUS)
+    time.sleep(command_settle_time)
+    return _decode_status(ADDRESS, bus.read_i2c_block_data(ADDRESS, 0, STATUS_SIZE))
+
+# Status of many Arduinos on the current route, batched like READ_PD_VOLTS.
+# Returns {address: status dict}, with None for modules that did not answer
+# (or have no CMD_STATUS).
+def READ_STATUSES(ADDRESSES):
+    statuses = {}
+    requested = []
+    for address in ADDRESSES:
+        try:
+            if READ_FIRMWARE_VERSION(address) < FIRMWARE_STATUS:
+                statuses[address] = None
+                continue
+            bus.write_byte(address, CMD_STATUS)
+            requested.append(address)
+        except Exception as e:
+            print(f"Status request to 0x{address:02X} failed: {e}")
+            statuses[address] = None
+    if requested:
+        time.sleep(command_settle_time)
+    for address in requested:
+        try:
+            statuses[address] = _decode_status(address, bus.read_i2c_block_data(address, 0, STATUS_SIZE))
+        except Exception as e:
+            print(f"Status read from 0x{address:02X} failed: {e}")
+            statuses[address] = None
+    return statuses
+
+# Drain the beam-break events an Arduino latched since the last drain.
+# Arduino millis() timestamps are mapped onto time.monotonic() using the
+# millis() value sent with the reply. Returns
+# {"events": [monotonic times, oldest first], "dropped": n, "blocked": bool}.
+# Like CMD_BEAM_BLOCKED, draining a module whose beam is blocked turns its laser off.
+# Raises ValueError for firmware without the event buffer (see READ_FIRMWARE_VERSION).
+def READ_BEAM_EVENTS(ADDRESS):
+    firmware = READ_FIRMWARE_VERSION(ADDRESS)
+    if firmware < FIRMWARE_EVENTS:
+        raise ValueError(f"0x{ADDRESS:02X} has no CMD_READ_EVENTS (firmware {firmware})")
+    bus.write_byte(ADDRESS, CMD_READ_EVENTS)
+    time.sleep(command_settle_time)
+    data = bytes(bus.read_i2c_block_data(ADDRESS, 0, EVENTS_SIZE))
+    received = time.monotonic()
+    reported, count, dropped, blocked, now_ms = struct.unpack_from(EVENTS_HEADER, data)
+    if reported != ADDRESS or count > EVENT_SLOTS:
+        raise OSError(errno.EIO, f"0x{ADDRESS:02X} sent a garbled event reply")
+    stamps = struct.unpack_from(f'<{EVENT_SLOTS}I', data, struct.calcsize(EVENTS_HEADER))[:count]
+    events = [received - ((now_ms - t) & 0xFFFFFFFF) / 1000.0 for t in stamps]  # millis() wraps at 2^32
+    return {"events": events, "dropped": dropped, "blocked": bool(blocked)}
+
+# Module addresses come from the address pins read in main_V8.ino setup():
+# D3-D7 (DIP switches) give bits 0-4 and A7/A6 give bits 5-6. 0x00 is the
+# general call address and 0x78-0x7F are reserved, so a module can only
+# ever answer in 0x01-0x77, and only in 0x01-0x1F if A6/A7 are unused.
+ADDRESS_DIP_BITS = 5
+ADDRESS_ANALOG_BITS = 2
+
+# Addresses the address pins can produce (analog_bits=0: DIP switches only)
+def MODULE_ADDRESS_RANGE(analog_bits=ADDRESS_ANALOG_BITS):
+    return range(0x01, min(1 << (ADDRESS_DIP_BITS + analog_bits), 0x78))
+
+# Addresses to probe for a scan. A fast scan skips the A6/A7 address bits
+# unless a module from the last scan (known) actually used them.
+def SCAN_ADDRESSES(known=None, fast=False):
+    known = list(known or [])
+    if fast and all(a < (1 << ADDRESS_DIP_BITS) for a in known):
+        return list(MODULE_ADDRESS_RANGE(analog_bits=0))
+    return list(MODULE_ADDRESS_RANGE())
+
+# Scan I2C bus for connected devices and return their addresses (ascending).
+# known addresses are probed first; progress(done, total) is called after each probe.
+def SCAN_I2C_BUS(ADDRESSES=None, known=None, progress=None):
     print("Scanning I2C bus for devices...")
+    addresses = list(ADDRESSES) if ADDRESSES is not None else list(MODULE_ADDRESS_RANGE())
+    known = [a for a in (known or []) if a in addresses]
+    order = known + [a for a in addresses if a not in known]
     found_devices = []
-    for address in range(0x01, 0x78):
+    for i, address in enumerate(order):
         try:
             # Use a simple probe; some devices may NACK - swallow exceptions
             bus.read_byte(address)
             found_devices.append(address)
         except Exception:
             pass
-    found_devices = list(dict.fromkeys(found_devices))  # ensure unique/order
+        if progress is not None:
+            progress(i + 1, len(order))
+    found_devices = sorted(set(found_devices))  # ensure unique/order
+    for address in found_devices:
+        _breaker_success(address)  # it answered the probe
     if not found_devices:
         print("No I2C devices found")
     else:
         print(f"Total devices found: {len(found_devices)} -> {found_devices}")
     return found_devices
 
-# Turn off all lasers with improved reliability
+# Send one command to every module on the current route (general call).
+# Returns False if nothing acknowledged it (e.g. no module with general call firmware).
+def BROADCAST_COMMAND(command):
+    try:
+        bus.write_byte(GENERAL_CALL_ADDRESS, command)
+        return True
+    except Exception as e:
+        print(f"General call 0x{command:02X} not acknowledged: {e}")
+        return False
+
+# What a module's status should show after each broadcastable command
+_BROADCAST_CHECKS = {
+    CMD_TURN_ON: lambda status: status["laser_on"],
+    CMD_TURN_OFF: lambda status: not status["laser_on"],
+    CMD_GAME: lambda status: status["game_mode"],
+}
+
+# Switch all modules on the current route with one general call, then verify
+# with one status read per module. Modules that did not take it (or can't
+# report status) get the addressed command. Returns the addresses that needed it.
+def BROADCAST_ALL(ADDRESSES, command):
+    ADDRESSES = list(ADDRESSES)
+    check = _BROADCAST_CHECKS[command]
+    missed = ADDRESSES
+    if ADDRESSES and BROADCAST_COMMAND(command):
+        time.sleep(broadcast_settle_time)
+        statuses = READ_STATUSES(ADDRESSES)
+        missed = [a for a in ADDRESSES if statuses.get(a) is None or not check(statuses[a])]
+        if missed:
+            print(f"Broadcast 0x{command:02X}: {len(missed)} modules need an addressed command")
+    for address in missed:
+        try:
+            retry_call(address, send_command, address, command)
+        except Exception as e:
+            print(f"Command 0x{command:02X} to 0x{address:02X} failed: {e}")
+    return missed
+
+# Turn off all lasers (each command under the retry policy).
+# Returns the addresses that could not be reached.
 def TURN_ALL_OFF(ADDRESSES):
+    failed = []
     for address in ADDRESSES:
-        send_command(address, CMD_TURN_OFF)
-        time.sleep(0.01)  # Small delay between commands to prevent bus overload
-        
-    # Try to verify all modules are actually off
-    verify_attempts = 0
-    while verify_attempts < 3:
-        all_off = True
-        for address in ADDRESSES:
-            try:
-                time.sleep(0.01)
-                # Simple read to check if device is responsive
-                bus.read_byte(address)
-            except Exception as e:
-                print(f"Warning: Module 0x{address:02X} may not have received OFF command: {e}")
-                all_off = False
-                # Try again for this specific module
-                try:
-                    time.sleep(0.02)
-                    send_command(address, CMD_TURN_OFF)
-                except:
-                    pass
-        
-        if all_off:
-            break
-        verify_attempts += 1
-
-# Turn off a single laser
-def TURN_ONLY_ONE_OFF(ADDRESS):
-    # Try up to 3 times
-    for attempt in range(3):
         try:
-            send_command(ADDRESS, CMD_TURN_OFF)
-            return  # Success
-        except OSError as e:
-            if e.errno == 5:  # I/O error
-                print(f"I/O error turning off module 0x{ADDRESS:02X}, retrying...")
-                time.sleep(0.02 * (attempt + 1))  # Progressively longer delays
-            else:
-                print(f"Error {e.errno} turning off module 0x{ADDRESS:02X}")
-                break
+            retry_call(address, send_command, address, CMD_TURN_OFF)
         except Exception as e:
-            print(f"Error turning off module 0x{ADDRESS:02X}: {e}")
-            break
+            print(f"Warning: Module 0x{address:02X} did not take the OFF command: {e}")
+            failed.append(address)
+        time.sleep(0.01)  # Small delay between commands to prevent bus overload
+    return failed
+
+# Turn off a single laser. Returns True if the module took the command.
+def TURN_ONLY_ONE_OFF(ADDRESS):
+    try:
+        retry_call(ADDRESS, send_command, ADDRESS, CMD_TURN_OFF)
+        return True
+    except Exception as e:
+        print(f"Error turning off module 0x{ADDRESS:02X}: {e}")
+        return False
 
 # Turn on all lasers with improved reliability
 def TURN_ALL_ON(ADDRESSES):
@@ -135,6 +522,7 @@ def TURN_ONLY_ONE_ON(ADDRESS):
 def SET_LASER_CURRENT(ADDRESS, Value):
     if isinstance(Value, int) and Value > 0 and Value < 120:
         send_command(ADDRESS, CMD_SET_CURRENT, Value)
+        _cache_store(ADDRESS, "current", Value)
         print(f"Current change to {Value} mA")
     else:
         print("The value does not respect the condition: must be an int, positive, and < 120")
@@ -149,6 +537,7 @@ def SET_LASER_COLOR(ADDRESS, color):
     elif color == "red":
         Value = 0x04
     send_command(ADDRESS, CMD_SET_COLOR, Value)
+    _cache_store(ADDRESS, "color", color)
     print(f"Color change to {color} ")
 
 # Scan if beam is blocked across all Arduinos
@@ -165,36 +554,43 @@ def READ_PD_VOLT(ADDRESS):
     value = read_response(ADDRESS, CMD_PD_VOLT)
     # print(f"PD VOLT :{value} V")
     return value  # Return the value instead of just printing it 
-# Read photodiode voltage from one Arduino
-def READ_GAME_THRESHOLD(ADDRESS):
-    value = read_response(ADDRESS, CMD_GAME_THRESHOLD_READ)
-    print(f"threshold :{value} V")
-    return value  # Return the value instead of just printing it 
+# Read the game threshold (EEPROM byte, 0-255 = 0-2.5 V) of one Arduino
+def READ_GAME_THRESHOLD(ADDRESS, refresh=False):
+    def read():
+        value = read_response(ADDRESS, CMD_GAME_THRESHOLD_READ)
+        print(f"threshold :{value} V")
+        return value
+    return _cached(ADDRESS, "threshold", read, refresh)
 
 def SET_GAME_THRESHOLD(ADDRESS, value):
     send_command(ADDRESS, CMD_GAME_THRESHOLD_SET, value)
+    _cache_store(ADDRESS, "threshold", value)
     print(f"Game threshold set to :{value} V")
     return value  # Return the value instead of just printing it 
 # Read laser current from one Arduino
-def READ_LASER_CURRENT(ADDRESS):
-    current = read_response(ADDRESS, CMD_READ_CURRENT)
-    print(f"Current for {ADDRESS} Arduino is {current}mA")
-    return current
+def READ_LASER_CURRENT(ADDRESS, refresh=False):
+    def read():
+        current = read_response(ADDRESS, CMD_READ_CURRENT)
+        print(f"Current for {ADDRESS} Arduino is {current}mA")
+        return current
+    return _cached(ADDRESS, "current", read, refresh)
 
 # Read and decode laser color from one Arduino
-def READ_LASER_COLOR(ADDRESS):
+def READ_LASER_COLOR(ADDRESS, refresh=False):
     """Read and decode laser color from one Arduino. Return 'blue'|'green'|'red' or None."""
-    Value = read_response(ADDRESS, CMD_READ_COLOR)
-    color = None
-    if Value == 0x01:
-        color = "blue"
-    elif Value == 0x02:
-        color = "green"
-    elif Value == 0x04:
-        color = "red"
-    # Always safe to print even if unknown
-    print(f"Color for 0x{ADDRESS:02X}: {color}")
-    return color
+    def read():
+        Value = read_response(ADDRESS, CMD_READ_COLOR)
+        color = None
+        if Value == 0x01:
+            color = "blue"
+        elif Value == 0x02:
+            color = "green"
+        elif Value == 0x04:
+            color = "red"
+        # Always safe to print even if unknown
+        print(f"Color for 0x{ADDRESS:02X}: {color}")
+        return color
+    return _cached(ADDRESS, "color", read, refresh)
 
 # Game mode execution for all devices
 # Starts countdown, sets thresholds, monitors beam interruptions
@@ -232,7 +628,7 @@ def ASK_ARDUINO_BLOCKED_BEAM(ADDRESSES):
 # Increase penalty counter based on laser color
 # blue = +20s, green = +5s, red = +10s
 def ADD_TIME_COUNTER(ADDRESS):
-    """Increase penalty counter based on laser color."""
+    """Increase penalty counter based on laser color (from the module cache, no bus read once known)."""
     global penalty
     color = READ_LASER_COLOR(ADDRESS)
     if color == "blue":
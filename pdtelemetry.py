@@ -0,0 +1,235 @@
+"""Continuous photodiode voltage telemetry.
+
+PDTelemetry sweeps the PD voltage of every module (one batched
+READ_PD_VOLTS per bus, on the I2C worker at background priority) a few
+times a second and keeps the readings in fixed-size ring buffers, one row
+per module. show_view() opens a window with one row per module that is
+updated in place: last reading plus min / mean / max / stddev over a
+sliding window, so a drifting or wobbling alignment shows up while the
+mirrors are adjusted.
+
+The buffers are NumPy arrays when numpy is installed; without it the same
+ring buffers are plain lists (slower statistics, same results).
+"""
+import collections
+import math
+import statistics
+import threading
+import time
+import warnings
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from i2cworker import PRIORITY_BACKGROUND
+from opticamqfunclib import READ_PD_VOLTS, module_available
+
+CAPACITY = 600      # sweeps kept per module (2 minutes at 5 Hz)
+WINDOW = 50         # sweeps in the sliding statistics window (10 s at 5 Hz)
+INTERVAL = 0.2      # seconds between sweeps
+DRIFT_WARN = 0.05   # V; a standard deviation above this is highlighted in the view
+LOW_VOLTS = 1.2     # V; below this the beam is probably not on the detector
+
+ModuleStats = collections.namedtuple("ModuleStats", "last min mean max std samples")
+
+
+class PDHistory:
+    """Ring buffers of PD voltages, one row per module and one column per sweep.
+
+    Sweep k is stored in column k % capacity for every module; a module that
+    did not answer gets NaN, so the rows stay aligned in time.
+    """
+
+    def __init__(self, addresses, capacity=CAPACITY):
+        self.addresses = list(addresses)
+        self.rows = {addr: i for i, addr in enumerate(self.addresses)}
+        self.capacity = capacity
+        self.count = 0  # sweeps recorded so far
+        # Written by the I2C worker, read by the Tk thread
+        self.lock = threading.Lock()
+        if np is not None:
+            self.volts = np.full((len(self.addresses), capacity), np.nan, dtype=np.float32)
+            self.times = np.zeros(capacity)
+        else:
+            self.volts = [[math.nan] * capacity for _ in self.addresses]
+            self.times = [0.0] * capacity
+
+    def add(self, t, readings):
+        """Record one sweep: readings is {addr: volts or None}."""
+        with self.lock:
+            col = self.count % self.capacity
+            self.times[col] = t
+            for addr, row in self.rows.items():
+                volts = readings.get(addr)
+                volts = math.nan if volts is None else volts
+                if np is not None:
+                    self.volts[row, col] = volts
+                else:
+                    self.volts[row][col] = volts
+            self.count += 1
+
+    def _columns(self, n):
+        """Columns of the last n sweeps, oldest first."""
+        n = min(n, self.count, self.capacity)
+        return [(self.count - n + k) % self.capacity for k in range(n)]
+
+    def stats(self, window=WINDOW):
+        """{addr: ModuleStats} over the last window sweeps (fields are None without readings)."""
+        with self.lock:
+            cols = self._columns(window)
+            if not cols:
+                return {addr: ModuleStats(None, None, None, None, None, 0) for addr in self.addresses}
+            if np is not None:
+                data = self.volts[:, cols]  # a copy, so the maths runs outside the lock
+            else:
+                data = [[row[c] for c in cols] for row in self.volts]
+        if np is not None:
+            return self._stats_numpy(data)
+        return self._stats_python(data)
+
+    def _stats_numpy(self, data):
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", RuntimeWarning)  # all-NaN rows (module not answering)
+            columns = (data[:, -1], np.nanmin(data, axis=1), np.nanmean(data, axis=1),
+                       np.nanmax(data, axis=1), np.nanstd(data, axis=1))
+        samples = np.count_nonzero(~np.isnan(data), axis=1)
+        out = {}
+        for addr, row in self.rows.items():
+            values = [None if math.isnan(c[row]) else float(c[row]) for c in columns]
+            out[addr] = ModuleStats(*values, int(samples[row]))
+        return out
+
+    def _stats_python(self, data):
+        out = {}
+        for addr, row in self.rows.items():
+            values = [v for v in data[row] if not math.isnan(v)]
+            last = data[row][-1]
+            if not values:
+                out[addr] = ModuleStats(None if math.isnan(last) else last, None, None, None, None, 0)
+                continue
+            out[addr] = ModuleStats(None if math.isnan(last) else last, min(values), statistics.fmean(values),
+                                    max(values), statistics.pstdev(values), len(values))
+        return out
+
+
+class PDTelemetry:
+    """Samples the PD voltages of modules_by_bus ({bus: [addr, ...]}) into a PDHistory.
+
+    The schedule runs on app.after(); each sweep is one I2C worker job, and a
+    sweep still waiting for the bus is not queued again (the tick is skipped).
+    """
+
+    def __init__(self, app, modules_by_bus, interval=INTERVAL, capacity=CAPACITY):
+        self.app = app
+        self.modules_by_bus = {bus: list(addrs) for bus, addrs in modules_by_bus.items() if addrs}
+        self.history = PDHistory([a for bus in sorted(self.modules_by_bus) for a in self.modules_by_bus[bus]],
+                                 capacity)
+        self.bus_of = {a: bus for bus, addrs in self.modules_by_bus.items() for a in addrs}
+        self.interval = interval
+        self.running = False
+        self.views = 0  # open show_view() windows; the last one to close stops sampling
+        self.sweep_stats = {"sweeps": 0, "skipped": 0, "last_time": 0.0}
+        self._after_id = None
+
+    def start(self):
+        if not self.running:
+            self.running = True
+            self._tick()
+
+    def stop(self):
+        self.running = False
+        if self._after_id:
+            try:
+                self.app.after_cancel(self._after_id)
+            except Exception:
+                pass
+            self._after_id = None
+
+    def _tick(self):
+        if not self.running:
+            return
+        if not self.app.i2c_worker.submit(self._sweep, tag='pd_telemetry', priority=PRIORITY_BACKGROUND):
+            self.sweep_stats["skipped"] += 1  # the previous sweep is still waiting for the bus
+        self._after_id = self.app.after(int(self.interval * 1000), self._tick)
+
+    def _sweep(self):
+        """Read every module once, bus by bus. Runs on the I2C worker."""
+        t0 = time.monotonic()
+        readings = {}
+        for bus in self.app.router.route_order(self.modules_by_bus):
+            addrs = [a for a in self.modules_by_bus[bus] if module_available(a)]
+            if addrs:
+                self.app.set_i2c_route(bus)
+                readings.update(READ_PD_VOLTS(addrs))
+        self.history.add(t0, readings)
+        self.sweep_stats["sweeps"] += 1
+        self.sweep_stats["last_time"] = time.monotonic() - t0
+
+
+def show_view(app, telemetry, addresses=None, title="PD Telemetry", window=WINDOW, refresh=0.5):
+    """Open a window with live per-module statistics (addresses: a subset of the modules)."""
+    import tkinter as tk
+    addresses = [a for a in (addresses or telemetry.history.addresses) if a in telemetry.history.rows]
+    win = tk.Toplevel(app)
+    win.title(title)
+    telemetry.views += 1
+    telemetry.start()
+
+    seconds = window * telemetry.interval
+    tk.Label(win, text=f"{title} - last {seconds:.0f} s", font=("Arial", 14, "bold")).pack(pady=(10, 5))
+    grid = tk.Frame(win)
+    grid.pack(padx=10, pady=5)
+    columns = ("Module", "Bus", "Last", "Min", "Mean", "Max", "Std dev")
+    for col, heading in enumerate(columns):
+        tk.Label(grid, text=heading, font=("Arial", 11, "bold"), width=9).grid(row=0, column=col)
+
+    # Labels are built once; a refresh only changes the text/colour that differ
+    cells = {}
+    shown = {}
+    for row, addr in enumerate(addresses, 1):
+        tk.Label(grid, text=f"Mod {addr}", width=9, anchor='w').grid(row=row, column=0)
+        tk.Label(grid, text=str(telemetry.bus_of[addr]), width=9).grid(row=row, column=1)
+        cells[addr] = [tk.Label(grid, text="-", width=9, relief='ridge', bd=1) for _ in columns[2:]]
+        for col, lbl in enumerate(cells[addr], 2):
+            lbl.grid(row=row, column=col, padx=1, pady=1)
+    status = tk.Label(win, text="", font=("Arial", 9), fg='#555')
+    status.pack(pady=(0, 10))
+
+    def fmt(volts):
+        return "-" if volts is None else f"{volts:.3f}"
+
+    def update():
+        if not win.winfo_exists():
+            return
+        stats = telemetry.history.stats(window)
+        for addr in addresses:
+            st = stats[addr]
+            if st.last is None:
+                last = ("ERR", '#FFA07A')
+            else:
+                last = (fmt(st.last), '#90EE90' if st.last > LOW_VOLTS else '#FFB6C6')
+            drift_bg = '#FFD27F' if st.std is not None and st.std > DRIFT_WARN else '#EEE'
+            looks = [last, (fmt(st.min), '#EEE'), (fmt(st.mean), '#EEE'), (fmt(st.max), '#EEE'),
+                     (fmt(st.std), drift_bg)]
+            for lbl, look in zip(cells[addr], looks):
+                if shown.get(lbl) != look:
+                    lbl.config(text=look[0], bg=look[1])
+                    shown[lbl] = look
+        sw = telemetry.sweep_stats
+        state = "" if telemetry.running else " (paused)"
+        buffers = "numpy" if np is not None else "python"
+        status.config(text=f"{sw['sweeps']} sweeps, last {sw['last_time'] * 1000:.0f} ms, "
+                           f"{sw['skipped']} skipped, {buffers} buffers{state}")
+        win.after(int(refresh * 1000), update)
+
+    def on_close():
+        telemetry.views -= 1
+        if telemetry.views <= 0:
+            telemetry.stop()
+        win.destroy()
+
+    win.protocol("WM_DELETE_WINDOW", on_close)
+    update()
+    return win
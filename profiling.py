@@ -0,0 +1,245 @@
+"""Optional timing instrumentation for the controller (--profile).
+
+install() replaces the hot-path functions with timing wrappers; without it
+nothing is wrapped, so a normal run pays nothing. Per function (and per
+address or route where the first argument is one) it records the call
+count, total time and a latency histogram. The router's bus transactions
+are wrapped too, so per-address I2C time and route switches show up
+whichever code path issued them. The numbers can be watched in a
+debug overlay window (F12) and are written to a JSON file periodically:
+
+    python LaserMazeController.py --profile
+"""
+import bisect
+import functools
+import json
+import os
+import sys
+import threading
+import time
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "profile.json")
+
+# Histogram bucket upper bounds in ms; the last bucket holds everything slower
+BUCKETS_MS = (0.05, 0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Library functions wrapped in opticamqfunclib and in the modules that import them
+# by name (the controller star-imports them, pdtelemetry imports READ_PD_VOLTS);
+# "address" means the first argument is the module address
+LIB_FUNCTIONS = {"send_command": "address", "read_response": "address", "SCAN_I2C_BUS": None,
+                 "READ_BEAM_EVENTS": "address", "READ_STATUS": "address", "PROBE_MODULE": "address",
+                 "READ_STATUSES": None, "READ_PD_VOLTS": None, "BROADCAST_ALL": None}
+LIB_IMPORTERS = ("pdtelemetry",)
+# RoutedBus methods wrapped on the app's router: every route request and every
+# smbus transaction, whoever makes it (for_each_route, the worker jobs, the bulk reads)
+ROUTER_METHODS = {"set_route": "route", "write_byte": "address", "read_byte": "address",
+                  "write_i2c_block_data": "address", "read_i2c_block_data": "address"}
+# LaserMazeUI methods wrapped on the instance (query_bus_blocked and _poll_hardware
+# are the edge-mode and hardware-scheduler counterparts of the beam check)
+APP_METHODS = {"set_i2c_route": "route", "check_and_get_blocked_beam": None, "query_bus_blocked": "bus",
+               "_update_timer": None, "_poll_hardware": None}
+
+
+class Stat:
+    """Count, total time and latency histogram of one function (or one address of it)."""
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.hist = [0] * (len(BUCKETS_MS) + 1)
+
+    def add(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+        self.hist[bisect.bisect_left(BUCKETS_MS, seconds * 1000)] += 1
+
+    def percentile(self, q):
+        """Upper bucket bound (ms) below which q percent of the calls fall."""
+        if not self.count:
+            return None
+        target = q / 100.0 * self.count
+        seen = 0
+        for bound, n in zip(BUCKETS_MS + (None,), self.hist):
+            seen += n
+            if seen >= target:
+                return bound if bound is not None else round(self.max * 1000, 3)
+        return None
+
+    def as_dict(self):
+        return {
+            "count": self.count,
+            "total_ms": round(self.total * 1000, 3),
+            "mean_ms": round(self.total / self.count * 1000, 4) if self.count else None,
+            "max_ms": round(self.max * 1000, 3),
+            "p50_ms": self.percentile(50),
+            "p99_ms": self.percentile(99),
+            "histogram": dict(zip([f"<={b}ms" for b in BUCKETS_MS] + ["slower"], self.hist)),
+        }
+
+
+class Profiler:
+    """Collects Stats from the wrappers (they run on the Tk, I2C worker and GPIO threads)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.monotonic()
+        self.stats = {}     # {name: Stat}
+        self.by_key = {}    # {name: {(key name, address/route/bus): Stat}}
+        self.counters = {}  # {name: callable returning a dict}, e.g. the router's switch counts
+        self._originals = []
+
+    def record(self, name, seconds, key=None):
+        with self.lock:
+            stat = self.stats.get(name)
+            if stat is None:
+                stat = self.stats[name] = Stat()
+            stat.add(seconds)
+            if key is not None:
+                keyed = self.by_key.setdefault(name, {})
+                stat = keyed.get(key)
+                if stat is None:
+                    stat = keyed[key] = Stat()
+                stat.add(seconds)
+
+    def wrap(self, name, fn, key_name=None):
+        """Timing wrapper around fn; key_name set means args[0] is an address/route/bus to break down by."""
+        perf_counter = time.perf_counter
+
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            t0 = perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self.record(name, perf_counter() - t0, (key_name, args[0]) if key_name and args else None)
+
+        timed.__wrapped_by_profiler__ = True
+        return timed
+
+    def patch(self, owner, attr, key_name=None, name=None):
+        """Replace owner.attr with a timing wrapper (once) and remember the original."""
+        fn = getattr(owner, attr, None)
+        if fn is None or getattr(fn, "__wrapped_by_profiler__", False):
+            return
+        setattr(owner, attr, self.wrap(name or attr, fn, key_name))
+        self._originals.append((owner, attr, fn))
+
+    def uninstall(self):
+        """Put the original functions back."""
+        for owner, attr, fn in reversed(self._originals):
+            if isinstance(owner, type(sys)):
+                setattr(owner, attr, fn)
+            else:
+                owner.__dict__.pop(attr, None)  # instance attribute shadowing the method
+        self._originals = []
+
+    def reset(self):
+        with self.lock:
+            self.stats = {}
+            self.by_key = {}
+            self.started = time.monotonic()
+
+    def snapshot(self):
+        """Everything recorded so far as plain data (for the JSON dump)."""
+        with self.lock:
+            return {
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "seconds": round(time.monotonic() - self.started, 1),
+                "functions": {name: stat.as_dict() for name, stat in sorted(self.stats.items())},
+                "by_key": {name: {_key_label(k): stat.as_dict() for k, stat in sorted(keyed.items())}
+                           for name, keyed in sorted(self.by_key.items())},
+                "counters": {name: read() for name, read in self.counters.items()},
+            }
+
+    def summary_lines(self, top_keys=5):
+        """Short text table for the overlay: per function, then its busiest addresses/routes."""
+        with self.lock:
+            lines = [f"{'function':<28}{'calls':>8}{'total ms':>11}{'mean ms':>10}{'p99 ms':>9}"]
+            for name, stat in sorted(self.stats.items(), key=lambda kv: -kv[1].total):
+                mean = stat.total / stat.count * 1000 if stat.count else 0.0
+                lines.append(f"{name:<28}{stat.count:>8}{stat.total * 1000:>11.1f}{mean:>10.3f}"
+                             f"{stat.percentile(99) or 0:>9}")
+                keyed = self.by_key.get(name, {})
+                for key, kstat in sorted(keyed.items(), key=lambda kv: -kv[1].total)[:top_keys]:
+                    kmean = kstat.total / kstat.count * 1000 if kstat.count else 0.0
+                    lines.append(f"  {_key_label(key):<26}{kstat.count:>8}{kstat.total * 1000:>11.1f}{kmean:>10.3f}")
+            for name, read in self.counters.items():
+                lines.append(f"{name}: " + ", ".join(f"{k} {round(v, 3) if isinstance(v, float) else v}"
+                                                     for k, v in read().items()))
+            return lines
+
+
+def _key_label(key):
+    key_name, value = key
+    if key_name == "address" and isinstance(value, int):
+        return f"0x{value:02X}"
+    return f"{key_name} {value}"
+
+
+def install(app, lib_modules=None):
+    """Wrap the controller's hot paths. Returns the Profiler."""
+    import opticamqfunclib
+    profiler = Profiler()
+    if lib_modules is None:
+        lib_modules = [opticamqfunclib, sys.modules[type(app).__module__]]
+        lib_modules += [sys.modules[name] for name in LIB_IMPORTERS if name in sys.modules]
+    for module in lib_modules:
+        for name, key_name in LIB_FUNCTIONS.items():
+            profiler.patch(module, name, key_name)
+    for name, key_name in APP_METHODS.items():
+        profiler.patch(app, name, key_name)
+    router = getattr(app, "router", None)
+    if router is not None:
+        for name, key_name in ROUTER_METHODS.items():
+            profiler.patch(router, name, key_name, name=f"bus.{name}")
+        # Actual mux switches (set_route counts requests; transactions may switch too)
+        profiler.counters["routing"] = lambda: dict(router.stats)
+    return profiler
+
+
+def dump(profiler, path=DEFAULT_PATH):
+    """Write the current numbers to path (atomically)."""
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "w") as f:
+            json.dump(profiler.snapshot(), f, indent=2)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"Could not write profile: {e}")
+
+
+def start_dumps(app, profiler, path=DEFAULT_PATH, interval=10.0):
+    """Dump to path every interval seconds from the Tk loop."""
+    def tick():
+        dump(profiler, path)
+        app.after(int(interval * 1000), tick)
+    app.after(int(interval * 1000), tick)
+
+
+def show_overlay(app, profiler, refresh=1.0):
+    """Open (or raise) a small always-on-top window with the live numbers."""
+    import tkinter as tk
+    win = getattr(app, "_profile_overlay", None)
+    if win is not None and win.winfo_exists():
+        win.lift()
+        return win
+    win = tk.Toplevel(app)
+    win.title("Profile")
+    win.attributes("-topmost", True)
+    text = tk.Label(win, font=("Courier", 10), justify="left", anchor="nw", bg="black", fg="#0F0")
+    text.pack(fill="both", expand=True)
+    tk.Button(win, text="Reset", command=profiler.reset).pack(side="left", padx=5, pady=5)
+    tk.Button(win, text="Dump", command=lambda: dump(profiler)).pack(side="left", padx=5, pady=5)
+    app._profile_overlay = win
+
+    def refresh_text():
+        if not win.winfo_exists():
+            return
+        text.config(text="\n".join(profiler.summary_lines()))
+        win.after(int(refresh * 1000), refresh_text)
+
+    refresh_text()
+    return win
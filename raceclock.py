@@ -0,0 +1,94 @@
+import threading
+import time
+
+
+# ------------------- Race clock -------------------
+# Lane times are derived from instants on time.monotonic_ns() (start, each
+# lane's finish) plus a per-lane penalty total, instead of being accumulated
+# tick by tick. Wall-clock jumps (NTP) and late Tk ticks therefore can't leak
+# into results, and a finish recorded from the button edge callback is exact
+# to the edge rather than to the display tick.
+class RaceClock:
+    def __init__(self, lanes=(1, 2), clock=time.monotonic_ns):
+        self.lanes = tuple(lanes)
+        self.clock = clock
+        # finish() is called from the GPIO event thread as well as the Tk thread
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self, lanes=None):
+        """Clear the race; lanes (optional) replaces the set of lanes being timed."""
+        with self.lock:
+            if lanes is not None:
+                self.lanes = tuple(lanes)
+            self.start_ns = None
+            self.finish_ns = {lane: None for lane in self.lanes}
+            self.penalty_ns = {lane: 0 for lane in self.lanes}
+
+    def start(self, at_ns=None):
+        """Start the race now (or at at_ns); clears finishes and penalties."""
+        self.reset()
+        with self.lock:
+            self.start_ns = self.clock() if at_ns is None else at_ns
+
+    @property
+    def running(self):
+        return self.start_ns is not None
+
+    def finished(self, lane):
+        return self.finish_ns.get(lane) is not None
+
+    def finish(self, lane, at_ns=None):
+        """Record a lane's finish instant. Returns False if not running or already finished."""
+        with self.lock:
+            if self.start_ns is None or self.finish_ns.get(lane) is not None:
+                return False
+            self.finish_ns[lane] = self.clock() if at_ns is None else at_ns
+            return True
+
+    def clear_finish(self, lane=None):
+        """Forget the finish of one lane (or all lanes) so its time runs on."""
+        with self.lock:
+            for l in ([lane] if lane is not None else self.lanes):
+                self.finish_ns[l] = None
+
+    def instant_ns(self, monotonic_s):
+        """The race clock instant of a time.monotonic() time, placed by its age.
+
+        The same instant in a race; replays run the race clock on a virtual clock.
+        """
+        return self.clock() - int((time.monotonic() - monotonic_s) * 1_000_000_000)
+
+    def add_penalty(self, lane, seconds, at_ns=None):
+        """Add penalty seconds to a lane for a break at at_ns (default: now). Returns True if it was added.
+
+        A break counts if it happened while the lane was racing: one latched
+        before the finish but read after it still counts, one latched during
+        the countdown (the modules are armed before "Go!") never does.
+        """
+        with self.lock:
+            if self.start_ns is None or (at_ns is not None and at_ns < self.start_ns):
+                return False
+            finish = self.finish_ns.get(lane)
+            if finish is not None and (at_ns is None or at_ns > finish):
+                return False
+            self.penalty_ns[lane] += int(seconds * 1_000_000_000)
+            return True
+
+    def elapsed_ns(self, lane, now_ns=None):
+        """Running time of a lane without penalties (frozen once it finishes)."""
+        if self.start_ns is None:
+            return 0
+        end = self.finish_ns.get(lane)
+        if end is None:
+            end = self.clock() if now_ns is None else now_ns
+        return max(0, end - self.start_ns)
+
+    def lane_time(self, lane, now_ns=None):
+        """Displayed lane time in seconds: running time plus penalties."""
+        return (self.elapsed_ns(lane, now_ns) + self.penalty_ns.get(lane, 0)) / 1e9
+
+    def lane_times(self):
+        """{lane: seconds} for every lane, all read at the same instant."""
+        now = self.clock()
+        return {lane: self.lane_time(lane, now) for lane in self.lanes}
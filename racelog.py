@@ -0,0 +1,193 @@
+"""Append-only race event log.
+
+Every race event (countdown, start, beam break, penalty, finish, stop) is
+written as one fixed-size little-endian record, buffered in memory and
+flushed at the end of a race, so logging costs a struct.pack per event.
+
+File layout (one file per controller session, race_logs/YYYYmmdd-HHMMSS.lmrl):
+
+    header  '<4sHHdq'   magic b'LMRL', version, record size,
+                        wall-clock time and time.monotonic_ns() at creation
+    records '<BBBBqi'   event, lane, bus, address, time.monotonic_ns(), value
+
+The meaning of value depends on the event (see EVENT_VALUES). The header
+lets a reader turn record times into wall-clock times.
+
+    python racelog.py race_logs/20250101-120000.lmrl --csv race.csv
+    python racelog.py race_logs/20250101-120000.lmrl --replay
+"""
+import argparse
+import collections
+import csv
+import os
+import struct
+import threading
+import time
+
+MAGIC = b"LMRL"
+VERSION = 1
+HEADER = struct.Struct('<4sHHdq')
+RECORD = struct.Struct('<BBBBqi')
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "race_logs")
+
+# Event types
+START = 1        # value: race number
+COUNTDOWN = 2    # value: seconds left on the countdown
+BEAM_BREAK = 3   # lane/bus/address of the module; time of the latched break (value 1: the
+                 # module's buffer overflowed and the time is when the events were read)
+PENALTY = 4      # value: penalty in ms
+FINISH = 5       # value: lane time (incl. penalties) in ms; time of the button edge
+STOP = 6         # value: one of the STOP_* reasons
+
+STOP_BUTTON = 0    # "Stop Game"
+STOP_SHUTDOWN = 1  # shutdown button (GPIO 11)
+STOP_RESET = 2     # a new game was started without stopping
+STOP_EXIT = 3      # the controller was closed
+
+EVENT_NAMES = {START: "start", COUNTDOWN: "countdown", BEAM_BREAK: "beam_break",
+               PENALTY: "penalty", FINISH: "finish", STOP: "stop"}
+EVENT_VALUES = {START: "race", COUNTDOWN: "seconds", BEAM_BREAK: "dropped",
+                PENALTY: "penalty_ms", FINISH: "lane_time_ms", STOP: "reason"}
+
+Record = collections.namedtuple("Record", "event lane bus addr t_ns value")
+
+
+class RaceLog:
+    """Buffered writer for one session's race log file."""
+
+    def __init__(self, path, buffer_records=256):
+        self.path = path
+        self.buffer_records = buffer_records
+        self._buffer = bytearray()
+        self._count = 0
+        # Events arrive from the Tk thread, the I2C worker and GPIO callbacks
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, time.time(), time.monotonic_ns()))
+            self._file.flush()
+
+    @classmethod
+    def new_session(cls, directory=DEFAULT_DIR, **kwargs):
+        """Open a new log file named after the current time."""
+        return cls(os.path.join(directory, time.strftime("%Y%m%d-%H%M%S") + ".lmrl"), **kwargs)
+
+    def log(self, event, lane=0, bus=0, addr=0, value=0, t_ns=None):
+        """Append one event to the buffer (t_ns defaults to now)."""
+        if t_ns is None:
+            t_ns = time.monotonic_ns()
+        with self._lock:
+            self._buffer += RECORD.pack(event, lane, bus, addr, t_ns, int(value))
+            self._count += 1
+            if self._count >= self.buffer_records:
+                self._flush_locked()
+
+    def flush(self):
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        if self._buffer and not self._file.closed:
+            self._file.write(self._buffer)
+            self._file.flush()
+        self._buffer.clear()
+        self._count = 0
+
+    def close(self):
+        with self._lock:
+            self._flush_locked()
+            self._file.close()
+
+
+# ------------------- Reader -------------------
+def read_log(path):
+    """Return (header dict, [Record, ...]) for a log file. A torn last record is ignored."""
+    with open(path, "rb") as f:
+        data = f.read()
+    magic, version, record_size, wall, mono_ns = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION or record_size != RECORD.size:
+        raise ValueError(f"{path} is not a version {VERSION} race log")
+    body = data[HEADER.size:]
+    body = body[:len(body) - len(body) % RECORD.size]
+    records = [Record(*fields) for fields in RECORD.iter_unpack(body)]
+    return {"created": wall, "created_ns": mono_ns}, records
+
+
+def races(records):
+    """Split records into races: [[COUNTDOWN..., START, ..., STOP], ...].
+
+    A race begins at the first countdown/start after a stop (or after a race
+    that already started); events before the first race are dropped.
+    """
+    out = []
+    for r in records:
+        if r.event in (COUNTDOWN, START):
+            current = out[-1] if out else None
+            if current is None or current[-1].event == STOP or any(x.event == START for x in current):
+                out.append([])
+        if out:
+            out[-1].append(r)
+    return out
+
+
+def wall_time(header, t_ns):
+    """Wall-clock time of a record time."""
+    return header["created"] + (t_ns - header["created_ns"]) / 1e9
+
+
+def replay(path, handler=None, speed=1.0):
+    """Call handler(record) for every record with the original spacing (speed 2 = twice as fast, 0 = no waits)."""
+    header, records = read_log(path)
+    handler = handler or print_record(header)
+    prev = None
+    for r in records:
+        if prev is not None and speed:
+            delay = (r.t_ns - prev) / 1e9 / speed
+            if delay > 0:
+                time.sleep(min(delay, 5.0))  # don't sit through the gap between races
+        prev = r.t_ns
+        handler(r)
+
+
+def print_record(header):
+    def show(r):
+        stamp = time.strftime("%H:%M:%S", time.localtime(wall_time(header, r.t_ns)))
+        print(f"{stamp} {EVENT_NAMES.get(r.event, r.event):<10} lane {r.lane} bus {r.bus} "
+              f"addr 0x{r.addr:02X} {EVENT_VALUES.get(r.event, 'value')} {r.value}")
+    return show
+
+
+def export_csv(path, out_path):
+    """Write one CSV row per event, with times relative to the race start."""
+    header, records = read_log(path)
+    with open(out_path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["race", "event", "t_s", "wall_time", "lane", "bus", "address", "value", "value_meaning"])
+        for n, race in enumerate(races(records), 1):
+            start = next((r.t_ns for r in race if r.event == START), race[0].t_ns)
+            for r in race:
+                writer.writerow([n, EVENT_NAMES.get(r.event, r.event), f"{(r.t_ns - start) / 1e9:.6f}",
+                                 time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(wall_time(header, r.t_ns))),
+                                 r.lane, r.bus, f"0x{r.addr:02X}", r.value, EVENT_VALUES.get(r.event, "")])
+    return out_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("log", help="race log file (.lmrl)")
+    parser.add_argument("--csv", help="export to this CSV file")
+    parser.add_argument("--replay", action="store_true", help="print events with their original timing")
+    parser.add_argument("--speed", type=float, default=1.0, help="replay speed factor (0 = no waits)")
+    args = parser.parse_args()
+
+    if args.csv:
+        export_csv(args.log, args.csv)
+        print(f"Exported to {args.csv}")
+    if args.replay or not args.csv:
+        replay(args.log, speed=args.speed if args.replay else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""Re-run a recorded race against the controller.
+
+Reads a race from a race log (racelog.py), builds a simulated maze with the
+modules that tripped, and plays the recorded beam breaks and finish-button
+presses into LaserMazeUI through the simulated GPIO and SMBus. The final
+lane times and penalty totals are then checked against the recording.
+
+    python replay.py race_logs/20250101-120000.lmrl            # as fast as possible
+    python replay.py race_logs/20250101-120000.lmrl --realtime # original timing, edge mode
+    python replay.py race_logs/20250101-120000.lmrl --race 2 --repeat 20
+
+The fast mode drives the game loop on a virtual race clock: every 200 ms
+tick is run back to back, so it is deterministic and doubles as a game-loop
+throughput benchmark (ticks per second). Tk needs a display; on a headless
+box run it under xvfb-run.
+"""
+import argparse
+import sys
+import time
+
+# The controller picks its backend at import time; don't reuse or rescan a
+# cached topology, the maze is built from the recording
+for flag in ("--test", "--rescan"):
+    if flag not in sys.argv:
+        sys.argv.append(flag)
+
+import racelog
+import simhardware
+import LaserMazeController as controller
+import topologycache
+
+TICK_NS = 200_000_000           # one hardware poll and one display frame per tick (default --poll-hz 5)
+REALTIME_TOLERANCE_MS = 100     # finish times in real time depend on the Tk tick
+
+
+class VirtualClock:
+    """monotonic_ns stand-in for the race clock in fast mode."""
+    def __init__(self, now_ns=0):
+        self.now_ns = now_ns
+
+    def __call__(self):
+        return self.now_ns
+
+
+def load_race(path, number=None):
+    """Return the records of race number (1-based, default: last race that started)."""
+    header, records = racelog.read_log(path)
+    started = [r for r in racelog.races(records) if any(x.event == racelog.START for x in r)]
+    if not started:
+        raise SystemExit(f"No started race in {path}")
+    if number is None:
+        return started[-1]
+    if not 1 <= number <= len(started):
+        raise SystemExit(f"{path} has {len(started)} races")
+    return started[number - 1]
+
+
+def expected_results(race):
+    """Recorded {lane: finish ms} and {lane: penalty ms total}."""
+    finishes = {r.lane: r.value for r in race if r.event == racelog.FINISH}
+    penalties = {}
+    for r in race:
+        if r.event == racelog.PENALTY:
+            penalties[r.lane] = penalties.get(r.lane, 0) + r.value
+    return finishes, penalties
+
+
+def race_lane_count(race):
+    """Smallest lane layout that fits the lanes and buses in the recording."""
+    for count, layout in sorted(controller.LANE_LAYOUTS.items()):
+        if all(r.lane in (0, layout.get(r.bus, r.lane)) and r.lane <= count for r in race):
+            return count
+    return max(controller.LANE_LAYOUTS)
+
+
+def build_maze(race, app, time_scale):
+    """Simulated maze with every module the race (or the topology cache) knows about."""
+    maze = simhardware.SimMaze(simhardware.GPIO, time_scale=time_scale)
+    modules = {}
+    cache = topologycache.load()
+    if cache is not None:
+        for bus, addrs in topologycache.buses(cache).items():
+            for addr in addrs:
+                modules[addr] = bus
+    for r in race:
+        if r.event in (racelog.BEAM_BREAK, racelog.PENALTY) and r.addr and r.bus:
+            modules[r.addr] = r.bus
+    if not modules:
+        raise SystemExit("The recording names no modules to simulate")
+    for addr, bus in sorted(modules.items()):
+        maze.add_module(bus, addr)
+    maze.update_lines()
+    simhardware.set_maze(maze)
+    app.router.attach(simhardware.SimSMBus(maze))
+    app.router.invalidate_route()
+
+    found = {}
+    for addr, bus in modules.items():
+        found.setdefault(bus, []).append(addr)
+    app._apply_module_scan({bus: sorted(addrs) for bus, addrs in found.items()}, announce=False)
+    return maze
+
+
+def make_app(lane_count=None):
+    app = controller.LaserMazeUI(lane_count)
+    app.withdraw()
+    app.race_log = False  # don't write a new log while replaying one
+    return app
+
+
+def replay_fast(race, app):
+    """Run the race on a virtual clock, one tick after another. Returns (ticks, seconds)."""
+    start = next(r for r in race if r.event == racelog.START)
+    maze = build_maze(race, app, time_scale=0)
+    clock = VirtualClock(start.t_ns)
+    app.race_clock.clock = clock
+    # Edge detection as on race day, without the real-time debounce (breaks arrive back to back)
+    app.beam_detect_mode = 'edge'
+    app._beam_bouncetime_ms = 0
+
+    def settle():
+        # Edge callbacks queue worker jobs; jobs run in order, so an empty call waits for them
+        simhardware.GPIO.wait_callbacks()
+        app.i2c_worker.call(lambda: None)
+        app.i2c_worker.poll_results()
+
+    def tick():
+        app._poll_hardware()
+        app._update_timer()
+        app._cancel_race_loops()  # the ticks are driven from here, not from after()
+        settle()
+
+    app.start_game()
+    if app.timer_window is None:
+        raise SystemExit("The controller refused to start the race")
+    app.countdown(0)  # "Go!": starts the race clock at the virtual START instant
+
+    events = [r for r in race if r.event in (racelog.BEAM_BREAK, racelog.FINISH) and r.t_ns >= start.t_ns]
+    end_ns = max(r.t_ns for r in race) + TICK_NS
+    next_tick = start.t_ns + TICK_NS
+    ticks = 0
+    t0 = time.perf_counter()
+    for r in events + [None]:
+        until = r.t_ns if r is not None else end_ns
+        while next_tick <= until:
+            clock.now_ns = next_tick
+            tick()
+            ticks += 1
+            next_tick += TICK_NS
+        if r is None:
+            break
+        clock.now_ns = r.t_ns
+        if r.event == racelog.BEAM_BREAK:
+            # The module latches the break; the line edge makes the controller drain it
+            maze.block(r.addr)
+            maze.unblock(r.addr)
+            settle()
+        elif r.event == racelog.FINISH:
+            app.race_clock.finish(r.lane, r.t_ns)
+    return ticks, time.perf_counter() - t0
+
+
+def replay_realtime(race, app):
+    """Play the race with its original timing through the simulated GPIO (edge mode)."""
+    start = next(r for r in race if r.event == racelog.START)
+    maze = build_maze(race, app, time_scale=1.0)
+    script = []
+    for r in race:
+        t = (r.t_ns - start.t_ns) / 1e9
+        if t < 0:
+            continue
+        if r.event == racelog.BEAM_BREAK:
+            script.append((t, "block", r.addr, 0.05))
+        elif r.event == racelog.FINISH:
+            script.append((t, "press", app.lane_finish_pins[r.lane], 0.1))
+    end = max([t for t, *_ in script] + [0.0])
+
+    ticks = []
+    orig_tick = app._update_timer
+
+    def counted_tick():
+        ticks.append(1)
+        orig_tick()
+
+    app._update_timer = counted_tick
+    orig_start = app.race_clock.start
+
+    def start_and_play(*args):
+        # Recorded times are relative to "Go!", so the script starts with the race clock
+        orig_start(*args)
+        maze.run_script(script)
+        app.after(int((end + 1.0) * 1000), app.quit)
+
+    app.race_clock.start = start_and_play
+    app.start_game()
+    if app.timer_window is None:
+        raise SystemExit("The controller refused to start the race")
+    t0 = time.perf_counter()
+    app.mainloop()
+    return len(ticks), time.perf_counter() - t0
+
+
+def check(race, app, tolerance_ms):
+    """Compare the replayed finish times and penalties with the recording. Returns True if they match."""
+    finishes, penalties = expected_results(race)
+    ok = True
+    for lane in sorted(set(finishes) | set(penalties)):
+        got_pen = app.race_clock.penalty_ns.get(lane, 0) // 1_000_000
+        want_pen = penalties.get(lane, 0)
+        line = f"  lane {lane}: penalties {got_pen} ms (recorded {want_pen} ms)"
+        ok &= got_pen == want_pen
+        if lane in finishes:
+            got = int(round(app.lanes[lane].finish_time * 1000)) if lane in app.lanes else 0
+            line += f", finish {got} ms (recorded {finishes[lane]} ms)"
+            ok &= abs(got - finishes[lane]) <= tolerance_ms
+        print(line)
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("log", help="race log file (.lmrl)")
+    parser.add_argument("--race", type=int, help="race number in the log (default: last)")
+    parser.add_argument("--realtime", action="store_true", help="replay with the recorded timing")
+    parser.add_argument("--repeat", type=int, default=1, help="fast mode: run the race this many times")
+    parser.add_argument("--lanes", type=int, help="lane layout the race was run with (default: from the recording)")
+    parser.add_argument("--test", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--rescan", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    race = load_race(args.log, args.race)
+    lane_count = args.lanes or race_lane_count(race)
+    all_ok = True
+    runs = 1 if args.realtime else max(1, args.repeat)
+    total_ticks, total_time = 0, 0.0
+    for n in range(runs):
+        app = make_app(lane_count)
+        if args.realtime:
+            ticks, elapsed = replay_realtime(race, app)
+        else:
+            ticks, elapsed = replay_fast(race, app)
+        total_ticks += ticks
+        total_time += elapsed
+        print(f"Run {n + 1}: {ticks} ticks in {elapsed:.3f} s")
+        all_ok &= check(race, app, REALTIME_TOLERANCE_MS if args.realtime else 1)
+        app.stop_game()
+        app.i2c_worker.stop(wait=True)
+        app.destroy()
+
+    if not args.realtime and total_time:
+        print(f"Game loop throughput: {total_ticks / total_time:.0f} ticks/s")
+    print("Replay matches the recording" if all_ok else "Replay DIFFERS from the recording")
+    sys.exit(0 if all_ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import threading
+import time
+
+
+# ------------------- Route-aware I2C bus -------------------
+# The Pi has one I2C bus that GPIO 5/6 steer to one of the four RJ45 ports
+# (J1-J4). RoutedBus wraps the smbus object, remembers which port is active
+# and only toggles the routing pins (and waits for them to settle) when the
+# route actually changes. It also counts switches, settle time and bus
+# transactions so the saving can be watched.
+#
+# The bus is used from the I2C worker and (setup screens) the Tk thread, each
+# as "set_route(), then transactions". The route a thread asked for is kept
+# per thread, and every transaction takes the lock and puts the mux back on
+# the calling thread's route first, so one thread's route switch can never
+# send another thread's transactions down the wrong port.
+class RoutedBus:
+    # Routing pin levels (pin 5, pin 6) for each RJ45 port
+    ROUTES = {
+        1: (0, 0),  # J1: Pin 5 Low,  Pin 6 Low
+        2: (1, 0),  # J2: Pin 5 High, Pin 6 Low
+        3: (0, 1),  # J3: Pin 5 Low,  Pin 6 High
+        4: (1, 1),  # J4: Pin 5 High, Pin 6 High
+    }
+
+    def __init__(self, gpio, routing_pins=(5, 6), bus=None, settle_time=0.005):
+        self.gpio = gpio
+        self.routing_pins = routing_pins
+        self.bus = bus
+        self.settle_time = settle_time
+        self.active_route = None
+        self.lock = threading.RLock()
+        self._local = threading.local()  # .route: the route the calling thread selected
+        self.reset_stats()
+
+    def attach(self, bus):
+        """Attach the underlying smbus.SMBus once it has been opened."""
+        self.bus = bus
+
+    def reset_stats(self):
+        self.stats = {
+            "route_requests": 0,    # set_route calls
+            "route_switches": 0,    # calls that actually moved the mux
+            "settle_time": 0.0,     # seconds spent waiting for the mux
+            "transactions": 0,      # smbus reads/writes
+        }
+
+    # ---------- Routing ----------
+    def set_route(self, route):
+        """Route the bus to an RJ45 port for the calling thread. Returns True if the mux had to switch."""
+        with self.lock:
+            self.stats["route_requests"] += 1
+            self._local.route = route
+            return self._switch(route)
+
+    def _switch(self, route):
+        """Move the mux to route (lock held)."""
+        if route == self.active_route:
+            return False
+        levels = self.ROUTES[route]
+        for pin, level in zip(self.routing_pins, levels):
+            self.gpio.output(pin, self.gpio.HIGH if level else self.gpio.LOW)
+        # Small delay to ensure routing is established
+        if self.settle_time:
+            time.sleep(self.settle_time)
+        self.active_route = route
+        self.stats["route_switches"] += 1
+        self.stats["settle_time"] += self.settle_time
+        return True
+
+    def invalidate_route(self):
+        """Forget the active route (e.g. after GPIO cleanup) so the next set_route drives the pins."""
+        with self.lock:
+            self.active_route = None
+
+    def _begin(self):
+        """Count a transaction and restore the calling thread's route (lock held)."""
+        self.stats["transactions"] += 1
+        route = getattr(self._local, "route", None)
+        if route is not None:
+            self._switch(route)
+
+    def route_order(self, routes):
+        """Order routes so the active one comes first; each route is then visited once."""
+        routes = sorted(set(routes))
+        if self.active_route in routes:
+            routes.remove(self.active_route)
+            routes.insert(0, self.active_route)
+        return routes
+
+    def for_each_route(self, work_by_route, fn):
+        """Call fn(route, work) for each route in work_by_route with the fewest switches.
+
+        work_by_route maps route -> work item (e.g. a list of module addresses).
+        Returns {route: fn result}.
+        """
+        results = {}
+        for route in self.route_order(work_by_route):
+            self.set_route(route)
+            results[route] = fn(route, work_by_route[route])
+        return results
+
+    # ---------- smbus pass-through ----------
+    def write_byte(self, address, value):
+        with self.lock:
+            self._begin()
+            return self.bus.write_byte(address, value)
+
+    def read_byte(self, address):
+        with self.lock:
+            self._begin()
+            return self.bus.read_byte(address)
+
+    def write_byte_data(self, address, register, value):
+        with self.lock:
+            self._begin()
+            return self.bus.write_byte_data(address, register, value)
+
+    def read_byte_data(self, address, register):
+        with self.lock:
+            self._begin()
+            return self.bus.read_byte_data(address, register)
+
+    def write_i2c_block_data(self, address, register, data):
+        with self.lock:
+            self._begin()
+            return self.bus.write_i2c_block_data(address, register, data)
+
+    def read_i2c_block_data(self, address, register, length):
+        with self.lock:
+            self._begin()
+            return self.bus.read_i2c_block_data(address, register, length)
+
+    def __getattr__(self, name):
+        # Anything else (close, write_quick, ...) goes straight to smbus
+        bus = self.__dict__.get("bus")
+        if bus is None:
+            raise AttributeError(name)
+        return getattr(bus, name)
@@ -0,0 +1,516 @@
+import queue
+import struct
+import threading
+import time
+
+
+# ------------------- Fake RPi.GPIO -------------------
+# Drop-in stand-in for the parts of RPi.GPIO the controller uses, so the
+# edge-triggered beam detection can be driven (and its latency measured)
+# without a Pi attached. Edge callbacks run on their own thread, like the
+# real library's event thread.
+class FakeGPIO:
+    BCM = 11
+    BOARD = 10
+    IN = 1
+    OUT = 0
+    LOW = 0
+    HIGH = 1
+    PUD_OFF = 20
+    PUD_DOWN = 21
+    PUD_UP = 22
+    RISING = 31
+    FALLING = 32
+    BOTH = 33
+
+    def __init__(self):
+        self.mode = None
+        self.levels = {}       # pin -> current level (inputs and outputs)
+        self.directions = {}   # pin -> IN / OUT
+        self.detectors = {}    # pin -> (edge, [callbacks], bouncetime s)
+        self.detected = set()  # pins with an edge since the last event_detected()
+        self.edge_log = []     # (pin, level, monotonic time) of every input change
+        self._last_fired = {}
+        self._lock = threading.Lock()
+        self._events = queue.Queue()
+        self._thread = threading.Thread(target=self._dispatch, name="fake-gpio-events", daemon=True)
+        self._thread.start()
+
+    # ---------- RPi.GPIO API ----------
+    def setmode(self, mode):
+        self.mode = mode
+
+    def setwarnings(self, flag):
+        pass
+
+    def setup(self, pin, direction, pull_up_down=None, initial=None):
+        with self._lock:
+            self.directions[pin] = direction
+            if direction == self.OUT:
+                self.levels[pin] = self.LOW if initial is None else initial
+            else:
+                # Beam lines and buttons idle high (pulled up / not blocked)
+                self.levels.setdefault(pin, self.LOW if pull_up_down == self.PUD_DOWN else self.HIGH)
+
+    def input(self, pin):
+        return self.levels.get(pin, self.HIGH)
+
+    def output(self, pin, level):
+        self.levels[pin] = self.HIGH if level else self.LOW
+
+    def add_event_detect(self, pin, edge, callback=None, bouncetime=None):
+        with self._lock:
+            if pin in self.detectors:
+                raise RuntimeError(f"Conflicting edge detection already enabled for GPIO {pin}")
+            callbacks = [callback] if callback else []
+            self.detectors[pin] = (edge, callbacks, (bouncetime or 0) / 1000.0)
+
+    def add_event_callback(self, pin, callback):
+        with self._lock:
+            if pin not in self.detectors:
+                raise RuntimeError(f"Add event detection using add_event_detect first for GPIO {pin}")
+            self.detectors[pin][1].append(callback)
+
+    def remove_event_detect(self, pin):
+        with self._lock:
+            self.detectors.pop(pin, None)
+            self.detected.discard(pin)
+
+    def event_detected(self, pin):
+        with self._lock:
+            if pin in self.detected:
+                self.detected.discard(pin)
+                return True
+        return False
+
+    def cleanup(self, pins=None):
+        with self._lock:
+            for pin in (list(self.levels) if pins is None else pins):
+                self.levels.pop(pin, None)
+                self.directions.pop(pin, None)
+                self.detectors.pop(pin, None)
+
+    # ---------- Test driver ----------
+    def set_input(self, pin, level):
+        """Drive an input pin as the hardware would; fires matching edge callbacks."""
+        level = self.HIGH if level else self.LOW
+        now = time.monotonic()
+        with self._lock:
+            old = self.levels.get(pin, self.HIGH)
+            self.levels[pin] = level
+            if old == level:
+                return
+            self.edge_log.append((pin, level, now))
+            det = self.detectors.get(pin)
+            if det is None:
+                return
+            edge, callbacks, bounce = det
+            if edge == self.FALLING and level != self.LOW:
+                return
+            if edge == self.RISING and level != self.HIGH:
+                return
+            if bounce and now - self._last_fired.get(pin, -bounce) < bounce:
+                return
+            self._last_fired[pin] = now
+            self.detected.add(pin)
+            callbacks = list(callbacks)
+        for cb in callbacks:
+            self._events.put((cb, pin))
+
+    def pulse(self, pin, width=0.05, level=0):
+        """Drive pin to level for width seconds, then release it (e.g. a hand through a beam)."""
+        self.set_input(pin, level)
+        threading.Timer(width, self.set_input, (pin, 1 - level)).start()
+
+    def wait_callbacks(self):
+        """Block until every edge callback queued so far has run (deterministic replays)."""
+        self._events.join()
+
+    def _dispatch(self):
+        while True:
+            cb, pin = self._events.get()
+            try:
+                cb(pin)
+            except Exception as e:
+                print(f"Fake GPIO callback for pin {pin} failed: {e}")
+            finally:
+                self._events.task_done()
+
+
+# ------------------- Simulated Arduino modules -------------------
+# Virtual detector/laser modules that answer the main_V8.ino I2C command set,
+# a simulated SMBus with a per-transaction timing model, and a maze that
+# ties them to the GPIO 5/6 route mux and the beam block lines.
+CMD_SET_CURRENT = 0x01
+CMD_GAME = 0x02
+CMD_TURN_ON = 0x03
+CMD_TURN_OFF = 0x04
+CMD_SET_COLOR = 0x05
+CMD_GAME_THRESHOLD_SET = 0x10
+CMD_GAME_THRESHOLD_READ = 0x12
+CMD_LD_OFF = 0xFA
+CMD_READ_COLOR = 0xFB
+CMD_READ_CURRENT = 0xFC
+CMD_ADDRESS = 0xFD
+CMD_BEAM_BLOCKED = 0xFE
+CMD_PD_VOLT = 0xFF
+CMD_STATUS = 0xF9
+CMD_READ_EVENTS = 0xF8
+EVENT_SLOTS = 6
+EVENT_DEBOUNCE_MS = 5
+FIRMWARE_VERSION = 2  # main_V8.ino; 0 = no CMD_STATUS, 1 = CMD_STATUS without the version byte
+
+REQUEST_CODES = (CMD_ADDRESS, CMD_READ_CURRENT, CMD_READ_COLOR, CMD_BEAM_BLOCKED,
+                 CMD_PD_VOLT, CMD_LD_OFF, CMD_GAME_THRESHOLD_READ, CMD_STATUS,
+                 CMD_READ_EVENTS)
+
+GENERAL_CALL_ADDRESS = 0x00
+NACK_ERRNO = 121  # what smbus raises when nothing answers (Remote I/O error)
+
+
+class VirtualArduino:
+    """One detector module running main_V8.ino."""
+    LIT_VOLTS = 1.8    # photodiode voltage with the laser on and the beam clear
+    DARK_VOLTS = 0.05  # photodiode voltage with the beam blocked or laser off
+
+    def __init__(self, address, color=0x04, current=60, threshold=61, general_call=True,
+                 firmware=FIRMWARE_VERSION):
+        self.address = address
+        self.firmware = firmware
+        # Older firmware ignores the request codes it doesn't know
+        self.request_codes = set(REQUEST_CODES)
+        if firmware < 2:
+            self.request_codes.discard(CMD_READ_EVENTS)
+        if firmware < 1:
+            self.request_codes.discard(CMD_STATUS)
+        self.general_call = general_call  # firmware sets TWAR bit 0 (answers address 0x00)
+        # EEPROM: current (mA), color (one-hot), game threshold (0-255 -> 0-2.5 V)
+        self.eeprom = {"current": current, "color": color, "threshold": threshold}
+        self.current_value = 0
+        self.laser_on = False
+        self.game_on = False
+        self.pd_threshold = 0.0  # comparator threshold (V); 0 = never blocked
+        self.request_code = 0x00
+        self.obstructed = False  # something physically in the beam
+        # INT0 beam-break ring buffer (millis() timestamps)
+        self.boot = time.monotonic()
+        self.events = []
+        self.events_dropped = 0
+        self._last_pin = 0
+        self._last_event_ms = None
+
+    # ---------- analog model ----------
+    @property
+    def pd_volts(self):
+        lit = self.laser_on and not self.obstructed
+        return self.LIT_VOLTS if lit else self.DARK_VOLTS
+
+    @property
+    def beam_pin(self):
+        """BEAM_BLOCKED_PIN: comparator output, high when the PD is below the threshold."""
+        return 1 if self.pd_volts < self.pd_threshold else 0
+
+    def millis(self):
+        return int((time.monotonic() - self.boot) * 1000) & 0xFFFFFFFF
+
+    def sample_pin(self):
+        """Run the RISING-edge interrupt if BEAM_BLOCKED_PIN went high since the last sample."""
+        pin = self.beam_pin
+        if pin and not self._last_pin and self.game_on and self.firmware >= 2:
+            now = self.millis()
+            if self._last_event_ms is None or not self.events or now - self._last_event_ms >= EVENT_DEBOUNCE_MS:
+                self._last_event_ms = now
+                self.events.append(now)
+                if len(self.events) > EVENT_SLOTS:
+                    self.events.pop(0)
+                    self.events_dropped = min(255, self.events_dropped + 1)
+        self._last_pin = pin
+
+    # ---------- firmware behaviour ----------
+    def turn_on(self):
+        self.current_value = self.eeprom["current"]
+        self.laser_on = True
+        self.game_on = False
+        self.pd_threshold = 0.0
+
+    def turn_off(self):
+        self.laser_on = False
+        self.game_on = False
+        self.current_value = 0
+        self.pd_threshold = 0.0  # TURN_OFF drops the game threshold (main_V8.ino)
+
+    def game_mode(self):
+        self.turn_on()
+        self.pd_threshold = self.eeprom["threshold"] / 255.0 * 2.5
+        # The firmware sets the threshold before game mode, so a beam already
+        # blocked at arming raises the pin without latching a break
+        self._last_pin = self.beam_pin
+        self.game_on = True
+        self.events = []
+        self.events_dropped = 0
+
+    def receive(self, data):
+        """Wire.onReceive: data is the list of bytes the master wrote."""
+        if not data:
+            return
+        cmd = data[0]
+        if cmd in self.request_codes:
+            self.request_code = cmd
+        elif cmd == CMD_SET_CURRENT:
+            if len(data) >= 2:
+                self.eeprom["current"] = data[1]
+                self.turn_on()
+        elif cmd == CMD_SET_COLOR:
+            if len(data) >= 2:
+                self.eeprom["color"] = data[1]
+        elif cmd == CMD_TURN_ON:
+            self.turn_on()
+        elif cmd == CMD_GAME:
+            self.game_mode()
+        elif cmd == CMD_TURN_OFF:
+            self.turn_off()
+        elif cmd == CMD_GAME_THRESHOLD_SET:
+            if len(data) >= 2:
+                self.eeprom["threshold"] = data[1]
+        # anything else (e.g. the register byte of a block read) is ignored
+
+    def request(self, length):
+        """Wire.onRequest: returns the bytes sent back to the master."""
+        code = self.request_code
+        if code == CMD_READ_CURRENT:
+            out = [self.current_value & 0xFF]
+        elif code == CMD_READ_COLOR:
+            out = [self.eeprom["color"]]
+        elif code == CMD_BEAM_BLOCKED:
+            blocked = self.beam_pin
+            out = [blocked]
+            if blocked:
+                self.turn_off()
+                self.pd_threshold = 0.0
+        elif code == CMD_PD_VOLT:
+            out = list(struct.pack('<f', self.pd_volts))
+        elif code == CMD_GAME_THRESHOLD_READ:
+            out = [self.eeprom["threshold"]]
+        elif code == CMD_STATUS:
+            flags = (0x01 if self.laser_on else 0) | (0x02 if self.game_on else 0) | (0x04 if self.beam_pin else 0)
+            out = list(struct.pack('<BfBBBB', flags, self.pd_volts, self.eeprom["current"],
+                                   self.eeprom["color"], self.eeprom["threshold"], self.address))
+            if self.firmware >= 2:
+                out.append(self.firmware)
+        elif code == CMD_READ_EVENTS:
+            blocked = self.beam_pin
+            stamps = self.events + [0] * (EVENT_SLOTS - len(self.events))
+            out = list(struct.pack('<BBBBI', self.address, len(self.events), self.events_dropped,
+                                   blocked, self.millis()) + struct.pack(f'<{EVENT_SLOTS}I', *stamps))
+            self.events = []
+            self.events_dropped = 0
+            if blocked:
+                self.turn_off()
+                self.pd_threshold = 0.0
+        else:
+            out = [self.address]
+        # The master clocks out as many bytes as it asked for; pad like an idle slave
+        return (out + [0xFF] * length)[:length]
+
+
+class SimMaze:
+    """Virtual Arduinos on four RJ45 ports behind the GPIO 5/6 route mux."""
+    ROUTES = {(0, 0): 1, (1, 0): 2, (0, 1): 3, (1, 1): 4}
+
+    def __init__(self, gpio, routing_pins=(5, 6), beam_pins=None,
+                 latency=0.0001, per_byte=0.00009, time_scale=1.0):
+        self.gpio = gpio
+        self.routing_pins = routing_pins
+        self.beam_pins = beam_pins or {1: 16, 2: 19, 3: 20, 4: 21}
+        self.ports = {port: {} for port in self.beam_pins}
+        # Timing model: each transaction costs latency + per_byte * bytes on the wire
+        # (about 100 kHz I2C plus syscall overhead); time_scale 0 skips the sleeps.
+        self.latency = latency
+        self.per_byte = per_byte
+        self.time_scale = time_scale
+        self.stats = {"transactions": 0, "nacks": 0, "bus_time": 0.0}
+        self.lock = threading.RLock()
+        self.update_lines()
+
+    def add_module(self, port, address, **kwargs):
+        module = VirtualArduino(address, **kwargs)
+        self.ports[port][address] = module
+        return module
+
+    def modules(self):
+        for port, mods in self.ports.items():
+            for module in mods.values():
+                yield port, module
+
+    def find(self, address):
+        for port, module in self.modules():
+            if module.address == address:
+                return port, module
+        return None, None
+
+    # ---------- bus side ----------
+    def route(self):
+        levels = tuple(1 if self.gpio.input(pin) else 0 for pin in self.routing_pins)
+        return self.ROUTES[levels]
+
+    def transaction(self, address, nbytes):
+        """Account for one bus transaction; returns the addressed module or raises a NACK."""
+        cost = self.latency + self.per_byte * (nbytes + 1)
+        self.stats["transactions"] += 1
+        self.stats["bus_time"] += cost
+        if self.time_scale:
+            time.sleep(cost * self.time_scale)
+        module = self.ports[self.route()].get(address)
+        if module is None:
+            self.stats["nacks"] += 1
+            raise OSError(NACK_ERRNO, "Remote I/O error")
+        return module
+
+    def general_call(self, nbytes):
+        """Account for one general-call write; returns the modules on the route that listen to it."""
+        cost = self.latency + self.per_byte * (nbytes + 1)
+        self.stats["transactions"] += 1
+        self.stats["bus_time"] += cost
+        if self.time_scale:
+            time.sleep(cost * self.time_scale)
+        modules = [m for m in self.ports[self.route()].values() if m.general_call]
+        if not modules:
+            self.stats["nacks"] += 1
+            raise OSError(NACK_ERRNO, "Remote I/O error")
+        return modules
+
+    def update_lines(self):
+        """Drive each port's beam block line low while any module on it reports blocked."""
+        if not hasattr(self.gpio, "set_input"):
+            return
+        for port, pin in self.beam_pins.items():
+            for m in self.ports[port].values():
+                m.sample_pin()
+            blocked = any(m.beam_pin for m in self.ports[port].values())
+            self.gpio.set_input(pin, self.gpio.LOW if blocked else self.gpio.HIGH)
+
+    # ---------- scripted events ----------
+    def block(self, address, duration=None):
+        """Put something in a module's beam, optionally clearing it after duration seconds."""
+        with self.lock:
+            port, module = self.find(address)
+            if module is None:
+                raise KeyError(f"No simulated module 0x{address:02X}")
+            module.obstructed = True
+            self.update_lines()
+        if duration is not None:
+            threading.Timer(duration, self.unblock, (address,)).start()
+
+    def unblock(self, address):
+        with self.lock:
+            port, module = self.find(address)
+            if module is not None:
+                module.obstructed = False
+                self.update_lines()
+
+    def press(self, pin, width=0.1):
+        """Press a button wired to pin (finish / shutdown) for width seconds."""
+        self.gpio.pulse(pin, width)
+
+    def run_script(self, events):
+        """Play (time_s, action, *args) events on a background thread.
+
+        action is 'block' (address, duration), 'unblock' (address) or 'press' (pin, width).
+        Returns the thread.
+        """
+        def play():
+            t0 = time.monotonic()
+            for at, action, *args in sorted(events, key=lambda e: e[0]):
+                delay = t0 + at - time.monotonic()
+                if delay > 0:
+                    time.sleep(delay)
+                getattr(self, action)(*args)
+
+        thread = threading.Thread(target=play, name="sim-script", daemon=True)
+        thread.start()
+        return thread
+
+
+class SimSMBus:
+    """smbus.SMBus stand-in that talks to the modules of a SimMaze."""
+    def __init__(self, maze):
+        self.maze = maze
+
+    def _write(self, address, data):
+        with self.maze.lock:
+            if address == GENERAL_CALL_ADDRESS:
+                for module in self.maze.general_call(len(data)):
+                    module.receive(list(data))
+            else:
+                self.maze.transaction(address, len(data)).receive(list(data))
+            self.maze.update_lines()
+
+    def _read(self, address, length, register=None):
+        with self.maze.lock:
+            if register is not None:
+                # SMBus read with a command byte: write the register, repeated start, read
+                module = self.maze.transaction(address, 1 + length)
+                module.receive([register])
+            else:
+                module = self.maze.transaction(address, length)
+            data = module.request(length)
+            self.maze.update_lines()
+            return data
+
+    def write_byte(self, address, value):
+        self._write(address, [value])
+
+    def read_byte(self, address):
+        return self._read(address, 1)[0]
+
+    def write_byte_data(self, address, register, value):
+        self._write(address, [register, value])
+
+    def read_byte_data(self, address, register):
+        return self._read(address, 1, register)[0]
+
+    def write_i2c_block_data(self, address, register, data):
+        self._write(address, [register] + list(data))
+
+    def read_i2c_block_data(self, address, register, length):
+        return self._read(address, length, register)
+
+    def close(self):
+        pass
+
+
+# ------------------- Default simulated backend -------------------
+# `import simhardware as smbus` / `GPIO = simhardware.GPIO` gives the
+# controller a complete simulated Pi for --test mode.
+GPIO = FakeGPIO()
+_maze = None
+
+
+def build_maze(gpio=None, modules_per_bus=3, buses=(1, 2, 3, 4), **timing):
+    """Build a maze with modules_per_bus modules on each bus, addresses 1, 2, 3, ..."""
+    maze = SimMaze(gpio or GPIO, **timing)
+    colors = (0x04, 0x02, 0x01)  # red, green, blue
+    address = 1
+    for bus in buses:
+        for i in range(modules_per_bus):
+            maze.add_module(bus, address, color=colors[address % len(colors)])
+            address += 1
+    maze.update_lines()
+    return maze
+
+
+def set_maze(maze):
+    """Use maze for SMBus() instances created from now on."""
+    global _maze
+    _maze = maze
+
+
+def default_maze():
+    global _maze
+    if _maze is None:
+        _maze = build_maze(GPIO)
+    return _maze
+
+
+def SMBus(bus_number=1):
+    return SimSMBus(default_maze())
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pytest
+
+# The modules live flat in the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import opticamqfunclib  # noqa: E402
+import simhardware  # noqa: E402
+from routedbus import RoutedBus  # noqa: E402
+
+
+@pytest.fixture
+def sim_bus(monkeypatch):
+    """(maze, router): two simulated modules on each of buses 1 and 2, without bus delays.
+
+    The router is installed as opticamqfunclib's bus, with fresh breaker and cache state.
+    """
+    maze = simhardware.build_maze(simhardware.GPIO, modules_per_bus=2, buses=(1, 2), time_scale=0)
+    router = RoutedBus(simhardware.GPIO, settle_time=0)
+    router.attach(simhardware.SimSMBus(maze))
+    monkeypatch.setattr(opticamqfunclib, "bus", router)
+    monkeypatch.setattr(opticamqfunclib, "command_settle_time", 0)
+    monkeypatch.setattr(opticamqfunclib, "module_breakers", {})
+    monkeypatch.setattr(opticamqfunclib, "module_cache", {})
+    monkeypatch.setattr(opticamqfunclib, "retry_stats", dict.fromkeys(opticamqfunclib.retry_stats, 0))
+    return maze, router
@@ -0,0 +1,57 @@
+"""Firmware detection: what a module supports comes from its version byte, read without side effects."""
+import pytest
+
+import opticamqfunclib as lib
+import simhardware
+
+
+def fit(maze, address, firmware):
+    """Replace a module with one running older firmware; returns it."""
+    port, old = maze.find(address)
+    module = simhardware.VirtualArduino(address, firmware=firmware)
+    maze.ports[port][address] = module
+    return module
+
+
+@pytest.mark.parametrize("firmware", [0, 1, 2])
+def test_version_is_read_from_the_status_reply(sim_bus, firmware):
+    maze, router = sim_bus
+    router.set_route(1)
+    fit(maze, 0x01, firmware)
+    assert lib.READ_FIRMWARE_VERSION(0x01) == firmware
+
+
+def test_detection_does_not_turn_a_blocked_laser_off(sim_bus):
+    maze, router = sim_bus
+    router.set_route(1)
+    module = fit(maze, 0x01, 0)
+    module.game_mode()
+    maze.block(0x01)
+    module.request_code = simhardware.CMD_BEAM_BLOCKED  # the last thing it was asked
+    assert lib.READ_FIRMWARE_VERSION(0x01) == lib.FIRMWARE_NO_STATUS
+    assert module.laser_on
+
+
+def test_old_firmware_gets_no_new_commands(sim_bus):
+    maze, router = sim_bus
+    router.set_route(1)
+    fit(maze, 0x01, 0)
+    fit(maze, 0x02, 1)
+    with pytest.raises(ValueError):
+        lib.READ_BEAM_EVENTS(0x01)
+    with pytest.raises(ValueError):
+        lib.READ_BEAM_EVENTS(0x02)
+    with pytest.raises(ValueError):
+        lib.READ_STATUS(0x01)
+    statuses = lib.READ_STATUSES([0x01, 0x02])
+    assert statuses[0x01] is None
+    assert statuses[0x02]["firmware"] == lib.FIRMWARE_STATUS
+
+
+def test_version_is_cached(sim_bus):
+    maze, router = sim_bus
+    router.set_route(1)
+    lib.READ_FIRMWARE_VERSION(0x01)
+    before = maze.stats["transactions"]
+    assert lib.READ_FIRMWARE_VERSION(0x01) == simhardware.FIRMWARE_VERSION
+    assert maze.stats["transactions"] == before
@@ -0,0 +1,107 @@
+import threading
+
+import pytest
+
+from i2cworker import (I2CWorker, PRIORITY_BACKGROUND, PRIORITY_NORMAL, PRIORITY_PENALTY,
+                       PRIORITY_SAFETY)
+
+
+@pytest.fixture
+def worker():
+    route = {"active": None}
+    w = I2CWorker(current_route=lambda: route["active"])
+    w.route = route
+    w.start()
+    yield w
+    w.stop(wait=True)
+
+
+def hold(worker):
+    """Occupy the worker until the returned event is set, so later jobs queue up."""
+    busy, release = threading.Event(), threading.Event()
+
+    def job():
+        busy.set()
+        release.wait(5)
+
+    worker.submit(job)
+    assert busy.wait(5)
+    return release
+
+
+def test_more_urgent_priorities_run_first(worker):
+    order = []
+    release = hold(worker)
+    worker.submit(order.append, "background", priority=PRIORITY_BACKGROUND)
+    worker.submit(order.append, "normal", priority=PRIORITY_NORMAL)
+    worker.submit(order.append, "penalty 1", priority=PRIORITY_PENALTY)
+    worker.submit(order.append, "safety", priority=PRIORITY_SAFETY)
+    worker.submit(order.append, "penalty 2", priority=PRIORITY_PENALTY)
+    release.set()
+    worker.call(lambda: None, priority=PRIORITY_BACKGROUND)
+    assert order == ["safety", "penalty 1", "penalty 2", "normal", "background"]
+
+
+def test_jobs_for_the_routed_bus_are_grouped(worker):
+    order = []
+    release = hold(worker)
+    worker.route["active"] = 2
+    worker.submit(order.append, "bus 1", route=1)
+    worker.submit(order.append, "bus 2", route=2)
+    release.set()
+    worker.call(lambda: None, priority=PRIORITY_BACKGROUND)
+    assert order == ["bus 2", "bus 1"]
+    assert worker.stats["route_grouped"] == 1
+
+
+def test_tagged_job_is_not_queued_twice(worker):
+    runs = []
+    release = hold(worker)
+    assert worker.submit(runs.append, 1, tag="sweep")
+    assert not worker.submit(runs.append, 2, tag="sweep")
+    assert worker.is_pending("sweep")
+    release.set()
+    worker.call(lambda: None)
+    assert runs == [1]
+    assert not worker.is_pending("sweep")
+    assert worker.submit(runs.append, 3, tag="sweep")  # free again once it ran
+    worker.call(lambda: None)
+    assert runs == [1, 3]
+
+
+def test_results_and_errors_come_back_through_poll_results(worker, capsys):
+    results = []
+    worker.submit(lambda: 42, on_done=results.append)
+
+    def fail():
+        raise OSError("bus error")
+
+    worker.submit(fail, tag="failing")
+    worker.call(lambda: None)
+    worker.poll_results()
+    assert results == [42]
+    assert "failing failed: bus error" in capsys.readouterr().out
+
+
+def test_call_returns_value_and_raises_errors(worker):
+    assert worker.call(lambda a, b: a + b, 2, 3) == 5
+    with pytest.raises(ValueError):
+        worker.call(int, "not a number")
+
+
+def test_a_stopped_worker_refuses_jobs():
+    w = I2CWorker()
+    w.start()
+    w.stop(wait=True)
+    with pytest.raises(RuntimeError):
+        w.call(lambda: None)
+    with pytest.raises(RuntimeError):
+        w.submit(lambda: None, tag="sweep")
+    assert not w.is_pending("sweep")
+
+
+def test_call_gives_up_after_its_timeout(worker):
+    release = hold(worker)
+    with pytest.raises(TimeoutError):
+        worker.call(lambda: None, timeout=0.2)
+    release.set()
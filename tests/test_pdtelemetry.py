@@ -0,0 +1,62 @@
+import math
+
+import pytest
+
+import pdtelemetry
+from pdtelemetry import PDHistory
+
+
+@pytest.fixture(params=["python", "numpy"])
+def backend(request, monkeypatch):
+    """Run each test with the list buffers and with the NumPy buffers (if numpy is installed)."""
+    np = pytest.importorskip("numpy") if request.param == "numpy" else None
+    monkeypatch.setattr(pdtelemetry, "np", np)
+    return request.param
+
+
+def test_stats_before_any_sweep(backend):
+    history = PDHistory([1, 2], capacity=4)
+    assert history.stats() == {a: pdtelemetry.ModuleStats(None, None, None, None, None, 0) for a in (1, 2)}
+
+
+def test_stats_over_the_window(backend):
+    history = PDHistory([1, 2], capacity=10)
+    for t, volts in enumerate([1.0, 2.0, 3.0, 4.0]):
+        history.add(float(t), {1: volts, 2: 0.5})
+    st = history.stats(window=3)
+    assert st[1].last == pytest.approx(4.0)
+    assert st[1].min == pytest.approx(2.0)
+    assert st[1].mean == pytest.approx(3.0)
+    assert st[1].max == pytest.approx(4.0)
+    assert st[1].std == pytest.approx(math.sqrt(2 / 3))
+    assert st[1].samples == 3
+    assert st[2].std == pytest.approx(0.0)
+
+
+def test_ring_buffer_wraps_around(backend):
+    history = PDHistory([1], capacity=4)
+    for t in range(10):
+        history.add(float(t), {1: float(t)})
+    assert history.count == 10
+    assert history._columns(10) == [2, 3, 0, 1]  # oldest first, capacity at most
+    st = history.stats(window=100)
+    assert st[1].samples == 4
+    assert st[1].min == pytest.approx(6.0)
+    assert st[1].last == pytest.approx(9.0)
+    assert st[1].mean == pytest.approx(7.5)
+
+
+def test_missing_readings_are_skipped(backend):
+    history = PDHistory([1, 2], capacity=8)
+    history.add(0.0, {1: 1.5, 2: None})
+    history.add(1.0, {1: 1.7})
+    st = history.stats()
+    assert st[1].samples == 2
+    assert st[1].mean == pytest.approx(1.6)
+    assert st[2] == pdtelemetry.ModuleStats(None, None, None, None, None, 0)
+
+    history.add(2.0, {2: 1.0})
+    st = history.stats()
+    assert st[1].last is None  # no answer in the last sweep
+    assert st[1].samples == 2
+    assert st[2].last == pytest.approx(1.0)
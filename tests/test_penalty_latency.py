@@ -0,0 +1,208 @@
+"""Beam break -> penalty through the controller's race path, on the simulated maze.
+
+LaserMazeUI is a Tk window; these tests don't create it (no display needed)
+and give the instance only the state the beam query and penalty path use.
+"""
+import collections
+import time
+
+import pytest
+
+import LaserMazeController as controller
+import opticamqfunclib as lib
+import simhardware
+from i2cworker import I2CWorker
+from lanes import LANE_LAYOUTS, build_lanes
+from raceclock import RaceClock
+
+if controller.GPIO is not simhardware.GPIO:
+    pytest.skip("the controller is not on the simulated backend", allow_module_level=True)
+
+
+class FakeWidget:
+    def winfo_exists(self):
+        return True
+
+    def config(self, **options):
+        pass
+
+
+@pytest.fixture
+def app(sim_bus):
+    maze, router = sim_bus
+    app = object.__new__(controller.LaserMazeUI)
+    lanes = build_lanes(LANE_LAYOUTS[4])
+    for lane in lanes.values():
+        lane.attach(FakeWidget(), FakeWidget(), FakeWidget())
+    app.__dict__.update(
+        router=router,
+        bus_to_gpio={1: 16, 2: 19},
+        bus_to_lane={1: 1, 2: 2},
+        bus_modules={bus: sorted(maze.ports[bus]) for bus in (1, 2)},
+        lanes=lanes,
+        race_lanes=[lanes[1], lanes[2]],
+        race_clock=RaceClock(lanes=(1, 2)),
+        i2c_worker=I2CWorker(current_route=lambda: router.active_route),
+        race_log=False,
+        _race_id=0,
+        _race_open=True,
+        penalty_latencies=collections.deque(maxlen=500),
+        beam_events=collections.deque(maxlen=1000),
+        _legacy_beam_modules=set(),
+        _break_history={},
+        _break_half_life=20.0,
+        _beam_backoff={},
+        _beam_backoff_max=30.0,
+        _sweep_due={},
+        _sweep_delay=0.5,
+        _drain_interval=0.5,
+        _next_drain=0.0,
+        beam_detect_mode="edge",
+        _finish_edges_armed=True,
+        _poll_interval=0.2,
+        _poll_interval_max=1.0,
+        beam_query_stats={"queries": 0, "stopped_early": 0, "backed_off": 0},
+        _hw_interval=0.2,
+        _poll_interval_min=0.05,
+        _penalty_flash_time=0.5,
+        audio_available=False,
+        winner_determined=False,
+        _margin_label=None,
+    )
+    # Tk methods the penalty path calls
+    app.after = lambda ms, fn: None
+    app._request_render = lambda: None
+    for pin in app.bus_to_gpio.values():
+        simhardware.GPIO.setup(pin, simhardware.GPIO.IN)
+    for _, module in maze.modules():
+        module.game_mode()
+    app.i2c_worker.start()
+    app.race_clock.start()
+    time.sleep(0.01)  # break times come from millis(): keep them clear of "Go!"
+    yield app
+    for pin in app.bus_to_gpio.values():
+        simhardware.GPIO.remove_event_detect(pin)
+    app.i2c_worker.stop(wait=True)
+
+
+def settle(app):
+    """Run the queued edge callbacks, the worker jobs they queued and the Tk-side results."""
+    simhardware.GPIO.wait_callbacks()
+    app.i2c_worker.call(lambda: None)
+    app.i2c_worker.poll_results()
+
+
+def test_beam_edge_to_penalty(app, sim_bus):
+    maze, _ = sim_bus
+    for pin in app.bus_to_gpio.values():
+        simhardware.GPIO.add_event_detect(pin, simhardware.GPIO.FALLING, callback=app._on_beam_edge)
+
+    maze.block(0x03)
+    maze.unblock(0x03)
+    settle(app)
+
+    assert app.race_clock.penalty_ns == {1: 0, 2: 3_000_000_000}
+    assert len(app.penalty_latencies) == 1
+    assert app.penalty_latencies[0] < 0.05  # no bus delays in the simulation: queueing only
+    assert app.lanes[2].flashing()
+
+
+def test_stale_result_is_dropped(app, sim_bus):
+    maze, _ = sim_bus
+    for pin in app.bus_to_gpio.values():
+        simhardware.GPIO.add_event_detect(pin, simhardware.GPIO.FALLING, callback=app._on_beam_edge)
+
+    maze.block(0x01)
+    maze.unblock(0x01)
+    simhardware.GPIO.wait_callbacks()
+    app._race_id += 1  # the race was stopped before the query came back
+    settle(app)
+    assert app.race_clock.penalty_ns == {1: 0, 2: 0}
+
+
+def test_break_latched_before_the_finish_counts(app, sim_bus):
+    maze, _ = sim_bus
+    maze.block(0x03)
+    maze.unblock(0x03)
+    time.sleep(0.01)
+    app.race_clock.finish(2)
+    blocked = app.query_bus_blocked(2, adaptive=True)  # drained after the finish
+    app._apply_blocked_modules(blocked, app._race_id)
+    assert app.race_clock.penalty_ns[2] == 3_000_000_000
+
+
+def test_break_after_the_finish_does_not_count(app, sim_bus):
+    maze, _ = sim_bus
+    app.race_clock.finish(2)
+    time.sleep(0.01)
+    maze.block(0x03)
+    maze.unblock(0x03)
+    blocked = app.query_bus_blocked(2, adaptive=True)
+    assert len(blocked) == 1
+    app._apply_blocked_modules(blocked, app._race_id)
+    assert app.race_clock.penalty_ns[2] == 0
+
+
+def test_break_during_the_countdown_does_not_count(app, sim_bus):
+    maze, _ = sim_bus
+    app.race_clock.reset()
+    maze.block(0x03)  # armed, latched before "Go!"
+    maze.unblock(0x03)
+    time.sleep(0.01)
+    app.race_clock.start()
+    blocked = app.query_bus_blocked(2, adaptive=True)
+    assert len(blocked) == 1
+    app._apply_blocked_modules(blocked, app._race_id)
+    assert app.race_clock.penalty_ns[2] == 0
+
+
+def test_blocked_with_nothing_latched_counts_only_at_arming(app, sim_bus):
+    maze, _ = sim_bus
+    for addr in (0x01, 0x03):
+        maze.block(addr)
+        maze.find(addr)[1].game_mode()  # armed while blocked: nothing latched
+    assert [b[0] for b in app.query_bus_blocked(1)] == [0x01]  # the arming check
+    assert app.query_bus_blocked(2, adaptive=True) == []  # during a race
+
+
+def test_finished_lane_turning_off_is_not_a_break(app, sim_bus):
+    maze, router = sim_bus
+    for pin in app.bus_to_gpio.values():
+        simhardware.GPIO.add_event_detect(pin, simhardware.GPIO.FALLING, callback=app._on_beam_edge)
+
+    def lane_off():
+        router.set_route(2)
+        lib.BROADCAST_ALL(sorted(maze.ports[2]), lib.CMD_TURN_OFF)
+
+    app.i2c_worker.call(lane_off)
+    settle(app)
+    assert simhardware.GPIO.input(app.bus_to_gpio[2]) == simhardware.GPIO.HIGH
+    assert list(app.beam_events) == []
+    assert app.race_clock.penalty_ns == {1: 0, 2: 0}
+
+
+def test_poll_mode_collects_a_break_that_cleared_between_polls(app, sim_bus):
+    maze, _ = sim_bus
+    app.beam_detect_mode = "poll"
+    maze.block(0x03)
+    maze.unblock(0x03)  # the line is high again before the next poll
+    app._poll_hardware()
+    settle(app)
+    assert app.race_clock.penalty_ns == {1: 0, 2: 3_000_000_000}
+
+    app._poll_hardware()  # the next drain is _drain_interval away
+    settle(app)
+    assert app.race_clock.penalty_ns[2] == 3_000_000_000
+
+
+def test_old_firmware_is_polled_for_its_beam_state(app, sim_bus):
+    maze, _ = sim_bus
+    port, _ = maze.find(0x03)
+    module = simhardware.VirtualArduino(0x03, firmware=0)
+    maze.ports[port][0x03] = module
+    module.game_mode()
+    maze.block(0x03)
+    blocked = app.query_bus_blocked(2, adaptive=True)
+    assert [b[0] for b in blocked] == [0x03]
+    assert 0x03 in app._legacy_beam_modules
+    assert not module.laser_on  # CMD_BEAM_BLOCKED turned it off, as on race day
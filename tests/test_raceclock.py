@@ -0,0 +1,93 @@
+from raceclock import RaceClock
+
+S = 1_000_000_000
+
+
+class FakeClock:
+    def __init__(self, now_ns=0):
+        self.now_ns = now_ns
+
+    def __call__(self):
+        return self.now_ns
+
+
+def make_clock():
+    clock = FakeClock(100 * S)
+    race = RaceClock(lanes=(1, 2), clock=clock)
+    race.start()
+    return race, clock
+
+
+def test_lane_time_runs_until_finish():
+    race, clock = make_clock()
+    clock.now_ns += 5 * S
+    assert race.lane_time(1) == 5.0
+    assert race.finish(1)
+    assert not race.finish(1)  # only the first finish counts
+    clock.now_ns += 3 * S
+    assert race.lane_time(1) == 5.0
+    assert race.lane_time(2) == 8.0
+    assert race.lane_times() == {1: 5.0, 2: 8.0}
+
+
+def test_finish_at_edge_instant():
+    race, clock = make_clock()
+    clock.now_ns += 10 * S
+    race.finish(2, at_ns=clock.now_ns - S // 2)
+    assert race.lane_time(2) == 9.5
+
+
+def test_penalties_add_to_lane_time():
+    race, clock = make_clock()
+    assert race.add_penalty(1, 3)
+    assert race.add_penalty(1, 3)
+    clock.now_ns += 2 * S
+    assert race.lane_time(1) == 8.0
+    assert race.lane_time(2) == 2.0
+
+
+def test_penalty_after_finish_is_refused():
+    race, clock = make_clock()
+    clock.now_ns += 4 * S
+    race.finish(1)
+    assert not race.add_penalty(1, 3)
+    assert not race.add_penalty(1, 3, at_ns=clock.now_ns + 1)
+    assert race.lane_time(1) == 4.0
+
+
+def test_break_latched_before_finish_counts_when_read_after():
+    race, clock = make_clock()
+    clock.now_ns += 4 * S
+    latched = clock.now_ns - 1
+    race.finish(1)
+    clock.now_ns += S // 10  # the break is drained after the finish
+    assert race.add_penalty(1, 3, at_ns=latched)
+    assert race.add_penalty(1, 3, at_ns=race.finish_ns[1])
+    assert race.lane_time(1) == 10.0
+
+
+def test_start_clears_finishes_and_penalties():
+    race, clock = make_clock()
+    race.add_penalty(1, 3)
+    race.finish(1)
+    race.start()
+    assert race.penalty_ns == {1: 0, 2: 0}
+    assert not race.finished(1)
+    race.reset()
+    assert not race.running
+    assert race.lane_time(1) == 0.0
+
+
+def test_break_during_the_countdown_is_refused():
+    race, clock = make_clock()
+    countdown_break = race.start_ns - S
+    clock.now_ns += 2 * S
+    assert not race.add_penalty(1, 3, at_ns=countdown_break)
+    assert race.add_penalty(1, 3, at_ns=race.start_ns)
+    assert race.penalty_ns[1] == 3 * S
+
+
+def test_no_penalty_before_the_race():
+    race = RaceClock(lanes=(1, 2), clock=FakeClock(S))
+    assert not race.add_penalty(1, 3)
+    assert race.penalty_ns[1] == 0
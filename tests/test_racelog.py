@@ -0,0 +1,48 @@
+import racelog
+
+
+def test_round_trip(tmp_path):
+    path = str(tmp_path / "race.lmrl")
+    log = racelog.RaceLog(path, buffer_records=2)
+    log.log(racelog.START, value=1, t_ns=1_000)
+    log.log(racelog.BEAM_BREAK, lane=1, bus=2, addr=0x05, t_ns=2_000)
+    log.log(racelog.BEAM_BREAK, lane=1, bus=2, addr=0x05, t_ns=2_500, value=1)
+    log.log(racelog.PENALTY, lane=1, bus=2, addr=0x05, value=3000, t_ns=3_000)
+    log.log(racelog.FINISH, lane=1, value=12345, t_ns=4_000)
+    log.log(racelog.STOP, value=racelog.STOP_BUTTON, t_ns=5_000)
+    log.close()
+
+    header, records = racelog.read_log(path)
+    assert [r.event for r in records] == [racelog.START, racelog.BEAM_BREAK, racelog.BEAM_BREAK,
+                                          racelog.PENALTY, racelog.FINISH, racelog.STOP]
+    assert records[1] == racelog.Record(racelog.BEAM_BREAK, 1, 2, 0x05, 2_000, 0)
+    assert records[2].value == 1
+    assert records[3].value == 3000
+    assert records[4] == racelog.Record(racelog.FINISH, 1, 0, 0, 4_000, 12345)
+
+
+def test_races_split_on_start(tmp_path):
+    path = str(tmp_path / "race.lmrl")
+    log = racelog.RaceLog(path)
+    for n in (1, 2):
+        log.log(racelog.START, value=n)
+        log.log(racelog.FINISH, lane=1, value=1000 * n)
+        log.log(racelog.STOP, value=racelog.STOP_BUTTON)
+    log.close()
+
+    _, records = racelog.read_log(path)
+    races = racelog.races(records)
+    assert len(races) == 2
+    assert [r.value for r in races[1] if r.event == racelog.FINISH] == [2000]
+
+
+def test_torn_last_record_is_ignored(tmp_path):
+    path = str(tmp_path / "race.lmrl")
+    log = racelog.RaceLog(path)
+    log.log(racelog.START, value=1)
+    log.close()
+    with open(path, "ab") as f:
+        f.write(b"\x03\x01\x02")  # power lost mid-write
+
+    _, records = racelog.read_log(path)
+    assert [r.event for r in records] == [racelog.START]
@@ -0,0 +1,109 @@
+import pytest
+
+import opticamqfunclib as lib
+
+
+@pytest.fixture
+def fast_retries(monkeypatch):
+    monkeypatch.setattr(lib, "retry_base_delay", 0.001)
+    monkeypatch.setattr(lib, "retry_max_delay", 0.002)
+
+
+class Flaky:
+    """Raises OSError for the first failures calls, then returns "ok"."""
+    def __init__(self, failures):
+        self.failures = failures
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        if self.calls <= self.failures:
+            raise OSError(121, "Remote I/O error")
+        return "ok"
+
+
+def test_retries_until_the_module_answers(sim_bus, fast_retries):
+    op = Flaky(2)
+    assert lib.retry_call(0x01, op) == "ok"
+    assert op.calls == 3
+    assert lib.retry_stats["retries"] == 2
+    assert lib.module_available(0x01)
+
+
+def test_gives_up_after_the_attempts(sim_bus, fast_retries):
+    op = Flaky(10)
+    with pytest.raises(OSError):
+        lib.retry_call(0x01, op, attempts=3)
+    assert op.calls == 3
+    assert lib.retry_stats["gave_up"] == 1
+
+
+def test_other_errors_are_not_retried(sim_bus, fast_retries):
+    def old_firmware():
+        raise ValueError("no event buffer")
+
+    with pytest.raises(ValueError):
+        lib.retry_call(0x01, old_firmware)
+    assert lib.retry_stats["retries"] == 0
+    assert lib.module_available(0x01)
+
+
+def test_breaker_parks_a_failing_module(sim_bus, fast_retries):
+    for _ in range(lib.breaker_threshold):
+        with pytest.raises(OSError):
+            lib.retry_call(0x01, Flaky(10), attempts=1)
+    assert not lib.module_available(0x01)
+    assert lib.parked_modules() == [0x01]
+    assert lib.parked_modules(due=True) == []  # its recheck is breaker_recheck away
+
+    op = Flaky(0)
+    with pytest.raises(lib.ModuleUnavailable):
+        lib.retry_call(0x01, op)
+    assert op.calls == 0  # the bus was not touched
+    assert lib.retry_stats["skipped"] == 1
+
+
+def test_success_resets_the_failure_count(sim_bus, fast_retries):
+    for _ in range(lib.breaker_threshold - 1):
+        with pytest.raises(OSError):
+            lib.retry_call(0x01, Flaky(10), attempts=1)
+    lib.retry_call(0x01, Flaky(0))
+    with pytest.raises(OSError):
+        lib.retry_call(0x01, Flaky(10), attempts=1)
+    assert lib.module_available(0x01)
+
+
+def park(address):
+    for _ in range(lib.breaker_threshold):
+        lib._breaker_failure(address)
+    lib.module_breakers[address]["next_check"] = 0.0  # recheck due now
+
+
+def test_recheck_recovers_a_module_that_answers_again(sim_bus):
+    maze, router = sim_bus
+    router.set_route(1)
+    port, module = maze.find(0x01)
+    del maze.ports[port][0x01]  # unplugged
+    park(0x01)
+    assert lib.RECHECK_PARKED_MODULES([0x01, 0x02]) == []
+    assert not lib.module_available(0x01)
+    assert lib.parked_modules(due=True) == []  # next recheck pushed out
+
+    maze.ports[port][0x01] = module  # plugged back in
+    lib.module_breakers[0x01]["next_check"] = 0.0
+    assert lib.RECHECK_PARKED_MODULES([0x01, 0x02]) == [0x01]
+    assert lib.module_available(0x01)
+    assert lib.retry_stats["recovered"] == 1
+
+
+def test_recheck_leaves_latched_breaks_for_the_beam_query(sim_bus):
+    maze, router = sim_bus
+    router.set_route(1)
+    port, module = maze.find(0x01)
+    module.game_mode()
+    maze.block(0x01)
+    maze.unblock(0x01)
+    park(0x01)
+    assert lib.RECHECK_PARKED_MODULES([0x01]) == [0x01]
+    events = lib.READ_BEAM_EVENTS(0x01)
+    assert len(events["events"]) == 1
@@ -0,0 +1,46 @@
+import threading
+
+import opticamqfunclib as lib
+
+
+def test_redundant_route_requests_do_not_switch(sim_bus):
+    maze, router = sim_bus
+    router.invalidate_route()
+    assert router.set_route(1)
+    assert not router.set_route(1)
+    assert router.set_route(2)
+    assert router.stats["route_requests"] == 3
+    assert router.stats["route_switches"] == 2
+    assert maze.route() == 2
+
+
+def test_route_order_starts_with_the_active_route(sim_bus):
+    _, router = sim_bus
+    router.set_route(3)
+    assert router.route_order([1, 3, 4, 1]) == [3, 1, 4]
+    seen = router.for_each_route({1: "a", 3: "b"}, lambda route, work: (route, work))
+    assert list(seen) == [3, 1]
+    assert router.stats["route_switches"] <= 2
+
+
+def test_each_thread_keeps_its_route(sim_bus):
+    maze, router = sim_bus
+    errors = []
+
+    def talk(bus):
+        # Each bus has its own addresses: a transaction on the wrong route NACKs
+        addresses = sorted(maze.ports[bus])
+        try:
+            for _ in range(200):
+                router.set_route(bus)
+                for address in addresses:
+                    assert lib.PROBE_MODULE(address)
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=talk, args=(bus,)) for bus in (1, 2)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == []
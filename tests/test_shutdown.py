@@ -0,0 +1,61 @@
+"""exit_app on the simulated maze: lasers off before the worker stops, and a failed exit leaves a working app."""
+import pytest
+
+import LaserMazeController as controller
+import simhardware
+from i2cworker import I2CWorker
+
+if controller.GPIO is not simhardware.GPIO:
+    pytest.skip("the controller is not on the simulated backend", allow_module_level=True)
+
+
+@pytest.fixture
+def app(sim_bus, monkeypatch):
+    maze, router = sim_bus
+    monkeypatch.setattr(simhardware.GPIO, "cleanup", lambda: None)
+    app = object.__new__(controller.LaserMazeUI)  # no Tk window
+    app.__dict__.update(
+        router=router,
+        bus_to_gpio={1: 16, 2: 19},
+        lane_finish_pins={1: 7, 2: 8},
+        bus_groups_by_lane={1: {1: sorted(maze.ports[1])}, 2: {2: sorted(maze.ports[2])}},
+        scanned_addresses=sorted(m.address for _, m in maze.modules()),
+        i2c_worker=I2CWorker(current_route=lambda: router.active_route),
+        pd_telemetry=None,
+        profiler=None,
+        race_log=False,
+        _race_open=False,
+        _race_id=0,
+        destroyed=False,
+    )
+    app.destroy = lambda: app.__dict__.update(destroyed=True)
+    for _, module in maze.modules():
+        module.game_mode()
+    app.i2c_worker.start()
+    yield app
+    app.i2c_worker.stop(wait=True)
+
+
+def test_exit_turns_every_laser_off_then_stops_the_worker(app, sim_bus):
+    maze, _ = sim_bus
+    app.exit_app()
+    assert not any(m.laser_on for _, m in maze.modules())
+    assert app.destroyed
+    assert not app.i2c_worker.is_alive()
+
+
+def test_failed_exit_keeps_the_worker(app, sim_bus, monkeypatch):
+    maze, _ = sim_bus
+
+    def broken(*args):
+        raise OSError(121, "Remote I/O error")
+
+    with monkeypatch.context() as m:
+        m.setattr(controller, "BROADCAST_ALL", broken)
+        app.exit_app()
+    assert not app.destroyed
+    assert app.i2c_worker.call(lambda: "still running", timeout=5) == "still running"
+
+    app.exit_app()  # the bus is back: exiting again works
+    assert app.destroyed
+    assert not any(m.laser_on for _, m in maze.modules())
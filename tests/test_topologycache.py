@@ -0,0 +1,28 @@
+"""Start-up check of the cached module topology."""
+import opticamqfunclib as lib
+import simhardware
+import topologycache
+
+
+def cache_of(maze):
+    found = {bus: sorted(modules) for bus, modules in maze.ports.items()}
+    return {"modules": [{"address": a, "bus": bus} for bus, addrs in found.items() for a in addrs]}
+
+
+def test_verify_reports_missing_modules(sim_bus):
+    maze, router = sim_bus
+    cache = cache_of(maze)
+    assert topologycache.verify(cache, router, lib.PROBE_MODULE) == []
+    port, _ = maze.find(0x03)
+    del maze.ports[port][0x03]
+    assert topologycache.verify(cache, router, lib.PROBE_MODULE) == [(port, 0x03)]
+
+
+def test_verify_leaves_a_blocked_laser_on(sim_bus):
+    maze, router = sim_bus
+    _, module = maze.find(0x01)
+    module.game_mode()
+    maze.block(0x01)
+    module.request_code = simhardware.CMD_BEAM_BLOCKED  # a bare read would answer this
+    topologycache.verify(cache_of(maze), router, lib.PROBE_MODULE)
+    assert module.laser_on
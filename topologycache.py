@@ -0,0 +1,95 @@
+import json
+import os
+import time
+
+
+# ------------------- Module topology cache -------------------
+# The module layout (address -> bus -> lane, plus colour, current and
+# threshold) found by the last full scan is saved to a small JSON file.
+# On start-up the controller loads it and pings just those addresses on
+# their bus instead of sweeping the whole address range; a full scan is
+# only needed when the ping finds a cached module missing. Modules added
+# since the last scan are not found by the ping - scan again for those.
+CACHE_VERSION = 1
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "module_topology.json")
+
+
+def save(found, bus_to_lane, details=None, path=DEFAULT_PATH):
+    """Write {bus: [addr, ...]} and per-address details ({addr: {color, current, threshold}})."""
+    details = details or {}
+    modules = []
+    for bus in sorted(found):
+        for addr in found[bus]:
+            entry = {"address": addr, "bus": bus, "lane": bus_to_lane.get(bus)}
+            for key in ("color", "current", "threshold"):
+                entry[key] = details.get(addr, {}).get(key)
+            modules.append(entry)
+    data = {
+        "version": CACHE_VERSION,
+        "saved": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "modules": modules,
+    }
+    # Write then rename so a crash mid-write never leaves half a file behind
+    tmp = path + ".tmp"
+    try:
+        with open(tmp, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, path)
+    except OSError as e:
+        print(f"Could not save module topology: {e}")
+        return False
+    print(f"Module topology saved ({len(modules)} modules) to {path}")
+    return True
+
+
+def load(path=DEFAULT_PATH):
+    """Return the cached topology dict, or None if there is no usable cache."""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        print(f"Ignoring module topology cache: {e}")
+        return None
+    if data.get("version") != CACHE_VERSION or not data.get("modules"):
+        return None
+    return data
+
+
+def buses(cache):
+    """{bus: [addr, ...]} from a loaded cache, in the same shape a scan returns."""
+    found = {}
+    for m in cache["modules"]:
+        found.setdefault(m["bus"], []).append(m["address"])
+    return {bus: sorted(addrs) for bus, addrs in found.items()}
+
+
+def details(cache):
+    """{addr: {color, current, threshold}} from a loaded cache."""
+    return {m["address"]: {k: m.get(k) for k in ("color", "current", "threshold")}
+            for m in cache["modules"]}
+
+
+def verify(cache, router, probe):
+    """Ping every cached module on its own bus.
+
+    probe(addr) should return True if the module answers and must not
+    change its state (PROBE_MODULE); a False return or an exception counts
+    as missing. Returns a list of (bus, addr) pairs that did not answer;
+    an empty list means every cached module is still there (new modules
+    are not looked for).
+    """
+    missing = []
+
+    def ping_bus(bus, addrs):
+        for addr in addrs:
+            try:
+                answered = probe(addr)
+            except Exception:
+                answered = False
+            if not answered:
+                missing.append((bus, addr))
+
+    router.for_each_route(buses(cache), ping_bus)
+    return missing